@@ -0,0 +1,111 @@
+"""
+Runs the end-to-end benchmarks against a local mock Kik server.
+
+    python -m benchmarks                                  # every scenario with default sizes
+    python -m benchmarks echo_bot busy_group --size 10000 --output results.json
+    python -m benchmarks --compare results.json           # run again and diff against an earlier run
+    python -m benchmarks --capture capture.kikcap.gz      # replay recorded production traffic
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from benchmarks.harness import run_scenario
+from benchmarks.scenarios import SCENARIOS, ReplayScenario
+from kik_unofficial.device_configuration import kik_version_info
+
+# metrics shown in the summary, and whether a higher value is better
+SUMMARY_METRICS = {
+    "incoming_stanzas_per_second": True,
+    "outgoing_messages_per_second": True,
+    "callback_latency_ms.p50": False,
+    "callback_latency_ms.p99": False,
+    "login_seconds": False,
+    "parser_stanzas_per_second": True,
+    "threads_peak": False,
+    "rss_peak_mb": False,
+}
+
+
+def get_metric(result: dict, path: str):
+    value = result
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def print_summary(results: list[dict], baseline: dict = None):
+    baseline_results = {r["scenario"]: r for r in baseline["results"]} if baseline else {}
+    for result in results:
+        flags = " (timed out)" if result["timed_out"] else ""
+        flags += f" errors={result['errors']}" if result["errors"] else ""
+        print(f"\n{result['scenario']} (size={result['size']}, rate={result['rate']}){flags}")
+        previous = baseline_results.get(result["scenario"])
+        for metric, higher_is_better in SUMMARY_METRICS.items():
+            value = get_metric(result, metric)
+            line = f"  {metric:<32} {value}"
+            old_value = get_metric(previous, metric) if previous else None
+            if isinstance(value, (int, float)) and isinstance(old_value, (int, float)) and old_value:
+                change = (value - old_value) / old_value * 100
+                better = change > 0 if higher_is_better else change < 0
+                line += f"  (was {old_value}, {change:+.1f}%{', better' if better else ', worse' if change else ''})"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end throughput and latency benchmarks against a local mock Kik server")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run. Default: all ({', '.join(SCENARIOS)})")
+    parser.add_argument("--size", type=int, help="Override the scenario size (messages, roster users or history messages)")
+    parser.add_argument("--rate", type=float, help="Override the rate (messages per second) at which the server sends messages")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for a scenario to finish. Default: 120")
+    parser.add_argument("--log-level", type=int, default=3, help="Client log level (1=DEBUG ... 5=CRITICAL). Default: 3")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A JSON file from an earlier run to compare against")
+    parser.add_argument("--capture", help="Also replay this wire capture (only it, if no scenarios are named)")
+    parser.add_argument("--realtime", action="store_true", help="Replay the capture with its recorded timing")
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario '{name}', choose from {', '.join(SCENARIOS)}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    scenarios = []
+    for name in args.scenarios or ([] if args.capture else list(SCENARIOS)):
+        scenario_class, size, rate = SCENARIOS[name]
+        scenarios.append(scenario_class(args.size or size, args.rate if args.rate is not None else rate))
+    if args.capture:
+        scenarios.append(ReplayScenario(args.capture, realtime=args.realtime))
+
+    results = []
+    for scenario in scenarios:
+        print(f"Running {scenario.name}: {scenario.description}...", file=sys.stderr)
+        results.append(run_scenario(scenario, timeout=args.timeout, log_level=args.log_level))
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "kik_version": kik_version_info["kik_version"],
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    print_summary(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Shared plumbing for the end-to-end benchmarks: runs a KikClient against a local MockKikServer
+and collects throughput, callback latency, thread and memory figures.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from typing import Union
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from kik_unofficial.callbacks import KikClientCallback
+from kik_unofficial.client import KikClient
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPResponse
+from kik_unofficial.mock_server.fixtures import MockAccount
+from kik_unofficial.mock_server.server import MockKikServer, client_ssl_context
+from kik_unofficial.utilities.kik_server_clock import KikServerClock
+
+
+def percentile(values: list[float], fraction: float) -> Union[float, None]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def current_rss_bytes() -> int:
+    """
+    Returns the resident set size of this process. Uses /proc on Linux and falls back to the peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ResourceSampler:
+    """
+    Samples the thread count and RSS of the process in the background.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.threads_peak = 0
+        self.rss_peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="Benchmark Sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.threads_peak = max(self.threads_peak, threading.active_count())
+            self.rss_peak = max(self.rss_peak, current_rss_bytes())
+            self._stop.wait(self.interval)
+
+
+class BenchmarkCallback(KikClientCallback):
+    """
+    Base callback for scenarios. Records the latency of every message callback and
+    signals `done` when the scenario decides it has seen enough.
+    """
+
+    def __init__(self):
+        self.authenticated = threading.Event()
+        self.done = threading.Event()
+        self.latencies_ms = []  # type: list[float]
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.errors = []  # type: list[str]
+        self._lock = threading.Lock()
+
+    def on_authenticated(self):
+        self.authenticated.set()
+
+    def on_login_error(self, response):
+        self.errors.append(str(response))
+        self.done.set()
+
+    def on_connection_failed(self, response):
+        self.errors.append(f"connection failed: {response.message}")
+        self.done.set()
+
+    def record_message(self, message: XMPPResponse) -> int:
+        """
+        Records the latency between the server timestamp of a message and now.
+
+        :return: the number of messages received so far, including this one
+        """
+        latency = None
+        if message.metadata and message.metadata.timestamp.isdigit():
+            latency = KikServerClock.get_server_time() - int(message.metadata.timestamp)
+        with self._lock:
+            if latency is not None:
+                self.latencies_ms.append(latency)
+            self.messages_received += 1
+            return self.messages_received
+
+    def record_sent(self) -> int:
+        with self._lock:
+            self.messages_sent += 1
+            return self.messages_sent
+
+
+class Scenario:
+    """
+    An end-to-end benchmark scenario.
+
+    Subclasses configure the mock server, provide a callback and may start work once authenticated.
+    The measurement window runs from authentication (or from client creation if `measure_login` is set)
+    until the callback signals `done`.
+    """
+
+    name = None  # type: str
+    description = None  # type: str
+    measure_login = False
+
+    def __init__(self, size: int, rate: float):
+        self.size = size
+        self.rate = rate
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        raise NotImplementedError
+
+    def make_callback(self) -> BenchmarkCallback:
+        raise NotImplementedError
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        pass
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        return {}
+
+
+def run_scenario(scenario: Scenario, timeout: float = 120.0, log_level: int = 3) -> dict:
+    """
+    Runs a scenario against a fresh mock server and returns its results.
+    """
+    account = MockAccount()
+    account.passkey  # derive the server side key up front, outside of the measurement
+    server = scenario.make_server(account)
+    host, port = server.start_in_thread()
+    callback = scenario.make_callback()
+    sampler = ResourceSampler()
+    sampler.start()
+
+    started = time.perf_counter()
+    client = KikClient(callback, account.username, account.password, log_level=log_level, host=host, port=port, ssl_context=client_ssl_context())
+    timed_out = False
+    try:
+        # a failed login or connection signals done instead
+        deadline = time.monotonic() + timeout
+        while not (callback.authenticated.wait(0.05) or callback.done.is_set() or time.monotonic() > deadline):
+            pass
+        if not callback.authenticated.is_set():
+            if callback.errors:
+                raise RuntimeError(f"{scenario.name}: client didn't authenticate: {'; '.join(callback.errors)}")
+            raise TimeoutError(f"{scenario.name}: client didn't authenticate in {timeout} seconds")
+        authenticated = time.perf_counter()
+        stanzas_before = 0 if scenario.measure_login else server.stanzas_sent
+        messages_before = 0 if scenario.measure_login else server.messages_received
+        window_start = started if scenario.measure_login else authenticated
+
+        scenario.on_started(client, callback)
+        timed_out = not callback.done.wait(timeout)
+        # let the server read what the callbacks sent before closing the window
+        deadline = time.monotonic() + 5
+        while server.messages_received - messages_before < callback.messages_sent and time.monotonic() < deadline:
+            time.sleep(0.005)
+        finished = time.perf_counter()
+    finally:
+        client.disconnect()
+        client.kik_connection_thread.join(5)
+        sampler.stop()
+        server.stop_in_thread()
+
+    duration = finished - window_start
+    incoming = server.stanzas_sent - stanzas_before
+    outgoing = server.messages_received - messages_before
+    latencies = callback.latencies_ms
+    results = {
+        "scenario": scenario.name,
+        "size": scenario.size,
+        "rate": scenario.rate,
+        "timed_out": timed_out,
+        "errors": callback.errors,
+        "login_seconds": round(authenticated - started, 4),
+        "duration_seconds": round(duration, 4),
+        "incoming_stanzas": incoming,
+        "incoming_stanzas_per_second": round(incoming / duration, 1) if duration > 0 else None,
+        "outgoing_messages": outgoing,
+        "outgoing_messages_per_second": round(outgoing / duration, 1) if duration > 0 else None,
+        "callback_latency_ms": {
+            "count": len(latencies),
+            "p50": percentile(latencies, 0.50),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies) if latencies else None,
+        },
+        "threads_peak": sampler.threads_peak,
+        "rss_peak_mb": round(sampler.rss_peak / (1024 * 1024), 1),
+    }
+    results.update(scenario.extra_results(callback))
+    return results
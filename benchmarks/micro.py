@@ -0,0 +1,683 @@
+"""
+Microbenchmarks of hot helpers, each compared against the implementation it replaced where that is useful.
+
+    python -m benchmarks.micro                 # all of them
+    python -m benchmarks.micro kik_uuid --number 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import binascii
+import gc
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from typing import Callable
+
+import pyDes
+import rsa
+from bs4 import BeautifulSoup
+from PIL import Image
+
+from kik_unofficial.datatypes.peers import Group, RosterUser
+from kik_unofficial.datatypes.xmpp import chatting, login
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPResponse
+from kik_unofficial.datatypes.xmpp.history import HistoryResponse
+from kik_unofficial.mock_server.fixtures import MockAccount, MockFixtures
+from kik_unofficial.protobuf.entity.v1.entity_common_pb2 import EntityUser
+from kik_unofficial.utilities import blockhash, crypto_backend
+from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
+from kik_unofficial.utilities.image_preparation import ImagePreparer
+from kik_unofficial.utilities.parsing_utilities import ParsingUtilities, get_file_bytes
+from kik_unofficial.utilities.peer_cache import PeerCache
+
+
+def time_per_call(function: Callable, number: int) -> float:
+    """
+    Returns the mean microseconds per call of `function` over `number` calls.
+    """
+    started = time.perf_counter()
+    for _ in range(number):
+        function()
+    return round((time.perf_counter() - started) / number * 1e6, 3)
+
+
+def reference_make_kik_uuid() -> str:
+    # the original bit-by-bit port of classes2/kik/core/net/f.java
+    random_uuid = uuid.uuid4().int
+    while random_uuid.bit_length() < 121:
+        random_uuid = uuid.uuid4().int
+
+    bytes_array = random_uuid.to_bytes((random_uuid.bit_length() + 7) // 8, "big")
+    most_significant_bits = int.from_bytes(bytes_array[:8], byteorder="big")
+    least_significant_bits = int.from_bytes(bytes_array[8:], byteorder="big")
+    i = 1
+    i2 = int((-1152921504606846976 & most_significant_bits) >> 62)
+    i_arr = [(3, 6), (2, 5), (7, 1), (9, 5)]
+    i3 = i_arr[i2][0]
+    i2 = i_arr[i2][1]
+    j = (((-16777216 & most_significant_bits) >> 22) ^ ((16711680 & most_significant_bits) >> 16)) ^ ((65280 & most_significant_bits) >> 8)
+    i2 = (CryptographicUtils.kik_uuid_sub_func(most_significant_bits, i2) + 1) | (CryptographicUtils.kik_uuid_sub_func(most_significant_bits, i3) << 1)
+    for i4 in range(6):
+        i = (i + (i2 * 7)) % 60
+        least_significant_bits = (least_significant_bits & ((1 << (i + 2)) ^ -1)) | ((CryptographicUtils.kik_uuid_sub_func(j, i4)) << (i + 2))
+    mstb = binascii.hexlify((most_significant_bits.to_bytes((most_significant_bits.bit_length() + 7) // 8, "big") or b"\0"))
+    lstb = binascii.hexlify((least_significant_bits.to_bytes((least_significant_bits.bit_length() + 7) // 8, "big") or b"\0"))
+    return str(uuid.UUID((mstb + lstb).decode("UTF-8")))
+
+
+def check_kik_uuid(kik_uuid: str) -> bool:
+    """
+    Checks the invariants of a message ID: a version 4 UUID with one of its top 7 bits set,
+    whose least significant half embeds six bits of the most significant half at the expected positions.
+    """
+    value = uuid.UUID(kik_uuid)
+    if str(value) != kik_uuid or value.version != 4 or value.variant != uuid.RFC_4122:
+        return False
+    most_significant_bits, least_significant_bits = value.int >> 64, value.int & (2**64 - 1)
+    if most_significant_bits.bit_length() < 57:
+        return False
+    i3, i2 = ((3, 6), (2, 5), (7, 1), (9, 5))[most_significant_bits >> 62]
+    step = (((most_significant_bits >> i2) & 1) + 1) | (((most_significant_bits >> i3) & 1) << 1)
+    j = ((most_significant_bits >> 24) << 2) ^ ((most_significant_bits >> 16) & 0xFF) ^ ((most_significant_bits >> 8) & 0xFF)
+    expected = {}
+    i = 1
+    for i4 in range(6):
+        i = (i + step * 7) % 60
+        expected[i + 2] = (j >> i4) & 1  # later writes to the same position win
+    return all((least_significant_bits >> position) & 1 == bit for position, bit in expected.items())
+
+
+def bench_kik_uuid(number: int) -> dict:
+    samples = [CryptographicUtils.make_kik_uuid() for _ in range(min(number, 20000))]
+    for kik_uuid in samples + [reference_make_kik_uuid() for _ in range(1000)]:
+        assert check_kik_uuid(kik_uuid), kik_uuid
+    assert len(set(samples)) == len(samples), "duplicate message IDs"
+
+    results = {
+        "invariants_hold": True,
+        "unique": True,
+        "reference_us": time_per_call(reference_make_kik_uuid, number),
+        "make_kik_uuid_us": time_per_call(CryptographicUtils.make_kik_uuid, number),
+        "make_kik_uuids_batch_us": round(time_per_call(lambda: CryptographicUtils.make_kik_uuids(100), max(1, number // 100)) / 100, 3),
+    }
+
+    CryptographicUtils.enable_kik_uuid_pool(1024)
+    try:
+        time.sleep(0.1)  # let the pool fill up
+        results["pooled_burst_of_512_us"] = time_per_call(CryptographicUtils.make_kik_uuid, 512)
+    finally:
+        CryptographicUtils.disable_kik_uuid_pool()
+    return results
+
+
+# the maps of MakeAnonymousStreamInitTag and EstablishAuthenticatedSessionRequest, with fixed values
+ANONYMOUS_STREAM_MAP = {
+    "signed": "signature",
+    "lang": "en_US",
+    "sid": "sid",
+    "anon": "1",
+    "ts": "timestamp",
+    "v": "kik_version",
+    "cv": "cv",
+    "conn": "WIFI",
+    "dev": "can+device",
+    "n": 1,
+}
+AUTHENTICATED_STREAM_MAP = {
+    "from": "mockbot_a1b@talk.kik.com/CAN0123456789abcdef0123456789abcdef",
+    "to": "talk.kik.com",
+    "p": "b38a3edb9359d5b51f71aae2b8292bf0",
+    "cv": "0f5a2c4ed0c8b8ff3e48f9d6b8a1dcf1f0e2d1c9",
+    "v": "15.60.1.29587",
+    "sid": "0d5b0f9e-8f0b-4a8b-9a1b-6c3f2d1e0a9b",
+    "n": "1",
+    "conn": "WIFI",
+    "ts": "1700000000000",
+    "lang": "en_US",
+    "signed": "UmVmZXJlbmNlIHNpZ25hdHVyZSBvZiB0aGUgYXV0aGVudGljYXRlZCBzdHJlYW0gbWFw",
+}
+
+
+def reference_sort_kik_map(original_dictionary):
+    # the original implementation, re-sorting and hashing the whole remaining map for every key
+    def sub_func(hash_id, bytes_array):
+        j = 0
+        digest = (hashlib.sha256, hashlib.sha1, hashlib.md5)[hash_id](bytes_array).digest()
+        for i in range(0, len(digest), 4):
+            j ^= (
+                (((ParsingUtilities.byte_to_signed_int(digest[i + 3])) << 24) | ((ParsingUtilities.byte_to_signed_int(digest[i + 2])) << 16))
+                | ((ParsingUtilities.byte_to_signed_int(digest[i + 1])) << 8)
+            ) | (ParsingUtilities.byte_to_signed_int(digest[i]))
+        return j
+
+    def hash_code(dictionary, hash_code_base, hash_code_offset):
+        keys = sorted(dictionary.keys())
+        bytes1 = "".join(key + str(dictionary[key]) for key in keys).encode("UTF-8")
+        bytes2 = "".join(key + str(dictionary[key]) for key in reversed(keys)).encode("UTF-8")
+        array = [sub_func(0, bytes1), sub_func(1, bytes1), sub_func(2, bytes1), sub_func(0, bytes2), sub_func(1, bytes2), sub_func(2, bytes2)]
+        return (
+            (
+                (hash_code_base ^ (ParsingUtilities.sign_extend_with_mask(array[0] << hash_code_offset)))
+                ^ (ParsingUtilities.sign_extend_with_mask(array[5] << (hash_code_offset * 2)))
+            )
+            ^ (ParsingUtilities.sign_extend_with_mask(array[1] << hash_code_offset))
+        ) ^ array[0]
+
+    dictionary = original_dictionary.copy()
+    new_map = OrderedDict()
+    keys = sorted(dictionary.keys())
+    hash_code_for_spaces = hash_code(dictionary, -310256979, 13) % 29
+    for _ in range(len(original_dictionary)):
+        code = hash_code(dictionary, -1964139357, 7)
+        code = code % len(dictionary) if code > 0 else code % -len(dictionary)
+        if code < 0:
+            code += len(dictionary)
+        selected_key = keys[code]
+        del keys[code]
+        new_map[selected_key] = dictionary[selected_key]
+        del dictionary[selected_key]
+    return new_map, " " * hash_code_for_spaces
+
+
+def random_kik_map(rng: random.Random) -> dict:
+    alphabet = string.ascii_letters + string.digits + "-_.@/é"
+    return {
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 6))): "".join(rng.choices(alphabet, k=rng.randint(0, 80)))
+        for _ in range(rng.randint(1, 14))
+    }
+
+
+# fixed (map, sorted keys, spaces, hash codes with the ordering and the spaces bases) vectors of the original implementation
+KIK_MAP_VECTORS = [
+    (ANONYMOUS_STREAM_MAP, ["lang", "dev", "v", "n", "ts", "sid", "cv", "conn", "signed", "anon"], 15, 180980714, -305979420),
+    (AUTHENTICATED_STREAM_MAP, ["v", "cv", "to", "n", "ts", "conn", "sid", "signed", "p", "from", "lang"], 7, -1536345493, 804854117),
+    ({"a": "1", "b": "é", "cc": ""}, ["b", "cc", "a"], 10, 1830109102, -798072160),
+]
+
+
+def check_kik_map_vectors() -> bool:
+    for the_map, keys, spaces, ordering_hash_code, spaces_hash_code in KIK_MAP_VECTORS:
+        new_map, new_spaces = CryptographicUtils.sort_kik_map(the_map)
+        assert list(new_map.keys()) == keys and new_map == the_map, the_map
+        assert new_spaces == " " * spaces, the_map
+        assert CryptographicUtils.kik_map_hash_code(the_map, -1964139357, 7) == ordering_hash_code, the_map
+        assert CryptographicUtils.kik_map_hash_code(the_map, -310256979, 13) == spaces_hash_code, the_map
+    return True
+
+
+def bench_kik_map(number: int) -> dict:
+    rng = random.Random(0)
+    maps = [ANONYMOUS_STREAM_MAP, AUTHENTICATED_STREAM_MAP] + [random_kik_map(rng) for _ in range(500)]
+
+    def same_output(the_map):
+        new_map, spaces = CryptographicUtils.sort_kik_map(the_map)
+        reference_map, reference_spaces = reference_sort_kik_map(the_map)
+        return list(new_map.items()) == list(reference_map.items()) and spaces == reference_spaces
+
+    number = max(1, number // 10)
+    return {
+        "golden_vectors_match": check_kik_map_vectors(),
+        "identical_output": all(same_output(the_map) for the_map in maps),
+        "reference_authenticated_us": time_per_call(lambda: reference_sort_kik_map(AUTHENTICATED_STREAM_MAP), number),
+        "sort_kik_map_authenticated_us": time_per_call(lambda: CryptographicUtils.sort_kik_map(AUTHENTICATED_STREAM_MAP), number),
+        "reference_anonymous_us": time_per_call(lambda: reference_sort_kik_map(ANONYMOUS_STREAM_MAP), number),
+        "sort_kik_map_anonymous_us": time_per_call(lambda: CryptographicUtils.sort_kik_map(ANONYMOUS_STREAM_MAP), number),
+    }
+
+
+def bench_handshake(number: int) -> dict:
+    """
+    The cost of building the <k> payload of a connection, anonymous and authenticated,
+    and of the RSA signature and DES encryption inside it, with the pure-Python libraries as reference.
+    """
+    number = max(1, number // 20)
+    device_id = "0123456789abcdef0123456789abcdef"
+    reference_key = rsa.PrivateKey.load_pkcs1(login.private_key_pem.encode("utf-8"), format="PEM")
+    signed_data = f"mockbot_a1b@talk.kik.com:{login.kik_version}:1700000000000:0d5b0f9e-8f0b-4a8b-9a1b-6c3f2d1e0a9b".encode()
+    des_key, public_key = b"\x01\x23\x45\x67\x89\xab\xcd\xef", bytes(294)
+    return {
+        "backend": "cryptography" if crypto_backend.HAS_CRYPTOGRAPHY else "rsa/pyDes",
+        "anonymous_payload_us": time_per_call(lambda: login.MakeAnonymousStreamInitTag(device_id).serialize(), number),
+        "authenticated_payload_us": time_per_call(
+            lambda: login.EstablishAuthenticatedSessionRequest("mockbot_a1b", "mockbot", "password", device_id).serialize(), number
+        ),
+        "reference_rsa_sign_us": time_per_call(lambda: rsa.sign(signed_data, reference_key, "SHA-256"), number),
+        "rsa_sign_us": time_per_call(lambda: login.get_handshake_signer().sign(signed_data), number),
+        "reference_des_encrypt_us": time_per_call(lambda: pyDes.des(des_key, mode=pyDes.ECB, padmode=pyDes.PAD_PKCS5).encrypt(public_key), number),
+        "des_encrypt_us": time_per_call(lambda: crypto_backend.des_ecb_encrypt(des_key, public_key), number),
+    }
+
+
+# fixed (username, password, key) vectors of the original pure-Python pbkdf2.PBKDF2 derivation
+PASSWORD_KEY_VECTORS = [
+    ("mockbot_a1b", "password", "73f35f05b3b81087c7187e03411ca0c5"),
+    ("MockBot", "pässwörd", "a2e6518976dc1f6fb7abec04627940f1"),
+    ("user", "", "8995cb1d861a1abf0914f378f3c28436"),
+]
+
+
+def reference_key_from_password(username: str, password: str) -> str:
+    # the PBKDF2-HMAC-SHA1 of the pbkdf2 package the key was derived with, one HMAC round at a time
+    sha1_password = binascii.hexlify(hashlib.sha1(password.encode("UTF-8")).digest())
+    salt = (username.lower() + "niCRwL7isZHny24qgLvy").encode("UTF-8")
+    u = hmac.new(sha1_password, salt + b"\x00\x00\x00\x01", hashlib.sha1).digest()
+    block = int.from_bytes(u, "big")
+    for _ in range(8191):
+        u = hmac.new(sha1_password, u, hashlib.sha1).digest()
+        block ^= int.from_bytes(u, "big")
+    return binascii.hexlify(block.to_bytes(20, "big")[:16]).decode("UTF-8")
+
+
+def check_password_keys(derive: Callable, accounts: list[tuple[str, str]]) -> bool:
+    for username, password, key in PASSWORD_KEY_VECTORS:
+        assert derive(username, password) == key, (username, password)
+    for username, password in accounts:
+        assert derive(username, password) == reference_key_from_password(username, password), (username, password)
+    return True
+
+
+def bench_password_key(number: int) -> dict:
+    """
+    The key derived from an account's password on every login, with and without the cache.
+    """
+    derive = CryptographicUtils.key_from_password.__wrapped__
+    rng = random.Random(0)
+    accounts = [
+        ("".join(rng.choices(string.ascii_letters, k=rng.randint(1, 20))), "".join(rng.choices(string.printable + "éß€", k=rng.randint(0, 30))))
+        for _ in range(20)
+    ]
+    number = max(1, number // 1000)
+    return {
+        "identical_output": check_password_keys(derive, accounts),
+        "reference_us": time_per_call(lambda: reference_key_from_password("mockbot_a1b", "password"), number),
+        "key_from_password_us": time_per_call(lambda: derive("mockbot_a1b", "password"), number),
+        "cached_us": time_per_call(lambda: CryptographicUtils.key_from_password("mockbot_a1b", "password"), number * 1000),
+    }
+
+
+def random_image(rng: random.Random, width: int, height: int, mode: str = "RGB") -> Image.Image:
+    length = width * height * len(mode)
+    return Image.frombytes(mode, (width, height), rng.getrandbits(length * 8).to_bytes(length, "little"))
+
+
+def bench_blockhash(number: int) -> dict:
+    """
+    Hashes 400 px previews (like parse_image does) with the pure-Python and NumPy implementations.
+    """
+    rng = random.Random(0)
+    samples = [random_image(rng, rng.randint(16, 160), rng.randint(16, 160), rng.choice(["RGB", "RGBA"])) for _ in range(100)]
+    samples += [Image.new("RGB", (rng.randint(16, 160), rng.randint(16, 160)), (value, value, value)) for value in (0, 1, 128, 255)]
+    landscape, square = random_image(rng, 400, 300), random_image(rng, 400, 400)
+    number = max(1, number // 1000)
+    results = {"numpy": blockhash.numpy is not None, "reference_400x300_ms": round(time_per_call(lambda: blockhash.blockhash(landscape, 16), number) / 1000, 3)}
+    results["reference_400x400_ms"] = round(time_per_call(lambda: blockhash.blockhash(square, 16), number) / 1000, 3)
+    if blockhash.numpy is not None:
+        for image in samples + [landscape, square]:
+            assert blockhash.blockhash_numpy(image, 16) == blockhash.blockhash(image, 16), image
+        results["identical_output"] = True
+        results["numpy_400x300_ms"] = round(time_per_call(lambda: blockhash.blockhash_numpy(landscape, 16), number * 10) / 1000, 3)
+        results["numpy_400x400_ms"] = round(time_per_call(lambda: blockhash.blockhash_numpy(square, 16), number * 10) / 1000, 3)
+    return results
+
+
+def reference_parse_image(data: bytes) -> dict:
+    # the original pipeline: full decode, both sizes resized from the source, hashes over copies
+    preview_out, image_out = io.BytesIO(), io.BytesIO()
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    larger_dim = max(height, width)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    image = img.resize((round(width / (larger_dim / 1600)), round(height / (larger_dim / 1600))))
+    preview_image = img.resize((round(width / (larger_dim / 400)), round(height / (larger_dim / 400))))
+    image.save(image_out, format="JPEG")
+    preview_image.save(preview_out, format="JPEG")
+    final_og, final_pre = image_out.getvalue(), preview_out.getvalue()
+    return {
+        "image_bytes": get_file_bytes(final_pre),
+        "SHA1": ParsingUtilities.read_file_as_sha1(final_og),
+        "SHA1Scaled": ParsingUtilities.read_file_as_sha1(final_pre),
+        "blockhash": blockhash.blockhash(preview_image, 16),
+        "MD5": hashlib.md5(final_og).hexdigest(),
+    }
+
+
+def bench_parse_image(number: int) -> dict:
+    """
+    Prepares a 12 MP phone-sized JPEG and a 4 MP PNG for sending, reporting the time of every stage.
+    """
+    number = max(1, number // 5000)
+    rng = random.Random(0)
+    results = {}
+    for name, size, image_format in (("jpeg_4000x3000", (4000, 3000), "JPEG"), ("png_2000x2000", (2000, 2000), "PNG")):
+        # a smooth image with some noise compresses like a photo
+        image = random_image(rng, size[0] // 40, size[1] // 40).resize(size, Image.BICUBIC)
+        source = io.BytesIO()
+        image.save(source, format=image_format)
+        data = source.getvalue()
+
+        timings = {}
+        started = time.perf_counter()
+        for _ in range(number):
+            for stage, seconds in ParsingUtilities.parse_image(data)["timings"].items():
+                timings[stage] = timings.get(stage, 0) + seconds
+        total = time.perf_counter() - started
+        results[name] = {
+            "source_mb": round(len(data) / 1e6, 2),
+            "reference_ms": round(time_per_call(lambda: reference_parse_image(data), number) / 1000, 1),
+            "parse_image_ms": round(total / number * 1000, 1),
+            "stages_ms": {stage: round(seconds / number * 1000, 1) for stage, seconds in timings.items()},
+        }
+    return results
+
+
+def bench_image_batch(number: int) -> dict:
+    """
+    Prepares a batch of 3 MP JPEGs one after the other and in an ImagePreparer, checking both give the same result.
+    """
+    rng = random.Random(0)
+    batch = []
+    for _ in range(max(2, os.cpu_count() or 1)):
+        source = io.BytesIO()
+        random_image(rng, 50, 38).resize((2000, 1500), Image.BICUBIC).save(source, format="JPEG")
+        batch.append(source.getvalue())
+
+    started = time.perf_counter()
+    serial = [ParsingUtilities.parse_image(data) for data in batch]
+    serial_seconds = time.perf_counter() - started
+
+    preparer = ImagePreparer()
+    preparer.prepare(batch[0])  # start the workers
+    started = time.perf_counter()
+    pooled = [future.result() for future in [preparer.submit(data) for data in batch]]
+    pooled_seconds = time.perf_counter() - started
+    preparer.shutdown()
+
+    for expected, actual in zip(serial, pooled):
+        expected.pop("timings"), actual.pop("timings")
+        if expected != actual:
+            raise AssertionError("ImagePreparer result differs from parse_image")
+    return {
+        "images": len(batch),
+        "serial_ms": round(serial_seconds * 1000, 1),
+        "pool_ms": round(pooled_seconds * 1000, 1),
+    }
+
+
+def bench_content_message(number: int) -> dict:
+    """
+    Parses a group sticker carrying a 20 KB preview, reading only its sticker ID or every collection.
+    """
+    rng = random.Random(0)
+    preview = base64.urlsafe_b64encode(rng.getrandbits(20000 * 8).to_bytes(20000, "big")).decode()
+    stanza = BeautifulSoup(
+        '<message type="groupchat" from="mockbot_a1b@talk.kik.com" id="1"><g jid="1100_g@groups.kik.com"/>'
+        '<content id="c" app-id="com.kik.ext.stickers" v="2"><strings><app-name>Stickers</app-name></strings>'
+        "<extras><item><key>sticker_id</key><val>s</val></item><item><key>sticker_pack_id</key><val>p</val></item></extras>"
+        f"<images><png-preview>{preview}</png-preview><preview>{preview}</preview></images><uris/></content></message>",
+        "xml",
+    ).message
+
+    def read_sticker_id():
+        return chatting.IncomingGroupSticker(stanza).sticker_id
+
+    def read_everything():
+        sticker = chatting.IncomingGroupSticker(stanza)
+        return sticker.strings, sticker.images, sticker.extras, sticker.hashes, sticker.uris
+
+    if base64.urlsafe_b64decode(preview) != read_everything()[1]["png-preview"]:
+        raise AssertionError("the lazily decoded preview differs")
+    number = max(1, number // 10)
+    return {
+        "sticker_id_only_us": round(time_per_call(read_sticker_id, number), 1),
+        "all_collections_us": round(time_per_call(read_everything, number), 1),
+    }
+
+
+class _KnownUser:
+    def __init__(self, jid: str, username: str):
+        self.jid = jid
+        self.username = username
+
+
+def reference_get_jid_from_cache(known_users: set, username: str):
+    for user in known_users:
+        if user.username.lower() == username.lower():
+            return user.jid
+    return None
+
+
+def bench_peer_cache(number: int) -> dict:
+    """
+    Resolves usernames among 5000 known users with the set scan that PeerCache replaced, and with PeerCache.
+    """
+    users = [_KnownUser(f"user{i}_a1b@talk.kik.com", f"User{i}") for i in range(5000)]
+    known_users = set(users)
+    cache = PeerCache()
+    cache.add_all(users)
+    usernames = [user.username.upper() for user in random.Random(0).sample(users, 100)] + ["nobody"]
+
+    for username in usernames:
+        if reference_get_jid_from_cache(known_users, username) != cache.get_jid_by_username(username):
+            raise AssertionError(f"PeerCache resolves {username} differently")
+    lookups = itertools.cycle(usernames)
+    return {
+        "users": len(users),
+        "reference_us": round(time_per_call(lambda: reference_get_jid_from_cache(known_users, next(lookups)), max(1, number // 100)), 2),
+        "peer_cache_us": round(time_per_call(lambda: cache.get_jid_by_username(next(lookups)), number), 2),
+    }
+
+
+def traced_bytes(build: Callable) -> tuple[int, object]:
+    """
+    Returns the bytes still allocated after build() returned, and its result.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return allocated, result
+
+
+def slot_values(obj) -> list[tuple[str, object]]:
+    return [(name, getattr(obj, name)) for cls in type(obj).__mro__ for name in getattr(cls, "__slots__", ()) if hasattr(obj, name)]
+
+
+class _DictBacked:
+    """
+    The dict backed representation that the slotted classes replaced.
+    """
+
+    def __init__(self, values: list[tuple[str, object]]):
+        for name, value in values:
+            setattr(self, name, value)
+
+
+def compare_representations(objects: list) -> dict:
+    """
+    Rebuilds the objects from their attribute values, once slotted and once dict backed. The values are shared,
+    so only the objects themselves are measured.
+    """
+    values = [slot_values(obj) for obj in objects]
+
+    def slotted():
+        copies = []
+        for obj, attributes in zip(objects, values):
+            copy = object.__new__(type(obj))
+            for name, value in attributes:
+                object.__setattr__(copy, name, value)
+            copies.append(copy)
+        return copies
+
+    slotted_bytes, _ = traced_bytes(slotted)
+    # a class of its own, so that its instances share their dict keys like the instances of the replaced class did
+    dict_backed = type(f"DictBacked{type(objects[0]).__name__}", (_DictBacked,), {})
+    dict_bytes, _ = traced_bytes(lambda: [dict_backed(attributes) for attributes in values])
+    return {
+        "dict_bytes_per_object": round(dict_bytes / len(objects)),
+        "slots_bytes_per_object": round(slotted_bytes / len(objects)),
+    }
+
+
+def bench_memory(number: int) -> dict:
+    """
+    Measures the users of a 5000 entry roster, the members of a 5000 member group, and history messages kept with
+    and without their raw_element. The history is measured on number / 10 text messages and projected to 100k,
+    image messages (which keep their content element either way) on number / 100.
+    """
+    fixtures = MockFixtures(roster_users=5000, group_members=5000)
+    roster = BeautifulSoup(fixtures.roster_page("roster", MockAccount()), "xml").query
+    users = [RosterUser(item) for item in roster.find_all("item", recursive=False)]
+    group = Group(roster.find("g", recursive=False))
+
+    messages_count = max(100, number // 10)
+    history = MockFixtures(history_messages=messages_count, history_page_size=100)
+    pages = [history.history_page("history", MockAccount(), delivered)[0] for delivered in range(0, messages_count, 100)]
+
+    def replay_history():
+        messages = []
+        for page in pages:
+            messages += HistoryResponse(BeautifulSoup(page, features="xml", from_encoding="utf-8").iq).messages
+        return messages
+
+    # image messages, whose <content> (with a 2 KB preview) is kept for its lazily parsed collections
+    preview = base64.urlsafe_b64encode(random.Random(0).randbytes(2048)).decode()
+    image_stanzas = [
+        (
+            f'<message type="chat" id="{uuid.uuid4()}" from="friend_{i}_a1b@talk.kik.com" to="mockbot_a1b@talk.kik.com">'
+            f'<content id="{uuid.uuid4()}" app-id="com.kik.ext.gallery" v="2"><strings><app-name>Gallery</app-name>'
+            f"<file-url>https://platform.kik.com/content/files/{i}</file-url></strings>"
+            f"<images><preview>{preview}</preview></images></content></message>"
+        )
+        for i in range(max(100, number // 100))
+    ]
+
+    def replay_images():
+        return [chatting.IncomingImageMessage(BeautifulSoup(stanza, "xml").message) for stanza in image_stanzas]
+
+    retained_bytes, messages = traced_bytes(replay_history)
+    retained_image_bytes, _ = traced_bytes(replay_images)
+    XMPPResponse.retain_raw_element = False
+    try:
+        released_bytes, _ = traced_bytes(replay_history)
+        released_image_bytes, _ = traced_bytes(replay_images)
+    finally:
+        XMPPResponse.retain_raw_element = True
+    if len({id(message.from_jid) for message in messages}) != len({message.from_jid for message in messages}):
+        raise AssertionError("the sender JIDs aren't interned")
+
+    return {
+        "roster_users": {"count": len(users), **compare_representations(users)},
+        "group_members": {"count": len(group.members), **compare_representations(group.members)},
+        "history_messages": {"count": len(messages), **compare_representations(messages)},
+        "history_bytes_per_message_with_raw_element": round(retained_bytes / len(messages)),
+        "history_bytes_per_message_without_raw_element": round(released_bytes / len(messages)),
+        "history_100k_mb_with_raw_element": round(retained_bytes / len(messages) * 100000 / 2**20, 1),
+        "history_100k_mb_without_raw_element": round(released_bytes / len(messages) * 100000 / 2**20, 1),
+        "image_bytes_per_message_with_raw_element": round(retained_image_bytes / len(image_stanzas)),
+        "image_bytes_per_message_without_raw_element": round(released_image_bytes / len(image_stanzas)),
+    }
+
+
+def reference_parse_entity(entity: str) -> dict:
+    user = EntityUser()
+    user.ParseFromString(base64.urlsafe_b64decode(ParsingUtilities.fix_base64_padding(entity)))
+    pic = user.background_profile_pic_extension.extension_detail.pic
+    return {
+        "creation_date_seconds": user.registration_element.creation_date.seconds,
+        "background_pic_full_sized": pic.full_sized_url,
+        "background_pic_thumbnail": pic.thumbnail_url,
+        "background_pic_updated_seconds": pic.last_updated_timestamp.seconds,
+        "interests": [element.localized_verbiage for element in user.interests_element.interests_element],
+    }
+
+
+def bench_user_entity(number: int) -> dict:
+    """
+    Parses a roster page of 500 users carrying entities, decoding the entities right away as User used to,
+    and lazily without reading them.
+    """
+    items = ""
+    for index in range(500):
+        entity = EntityUser()
+        entity.registration_element.creation_date.seconds = 1500000000 + index
+        pic = entity.background_profile_pic_extension.extension_detail.pic
+        pic.full_sized_url = f"https://profilepics.cf.kik.com/background{index}/orig.jpg"
+        pic.thumbnail_url = f"https://profilepics.cf.kik.com/background{index}/thumb.jpg"
+        pic.last_updated_timestamp.seconds = 1600000000 + index
+        for verbiage in ("Music", "Gaming", "Travel"):
+            entity.interests_element.interests_element.add(localized_verbiage=verbiage)
+        encoded = base64.urlsafe_b64encode(entity.SerializeToString()).decode()
+        items += f'<item jid="{MockFixtures.peer_jid(index)}"><username>{MockFixtures.peer_username(index)}</username><entity>{encoded}</entity></item>'
+    elements = BeautifulSoup(f'<query xmlns="jabber:iq:roster">{items}</query>', "xml").query.find_all("item", recursive=False)
+
+    for element in elements:
+        user = RosterUser(element)
+        if {name: getattr(user, name) for name in reference_parse_entity(element.entity.text)} != reference_parse_entity(element.entity.text):
+            raise AssertionError(f"the lazily decoded entity of {user.jid} differs")
+
+    def eager():
+        for element in elements:
+            RosterUser(element)
+            reference_parse_entity(element.entity.text)
+
+    def lazy():
+        for element in elements:
+            RosterUser(element)
+
+    number = max(1, number // 2000)
+    return {
+        "users": len(elements),
+        "eager_ms": round(time_per_call(eager, number) / 1000, 2),
+        "lazy_ms": round(time_per_call(lazy, number) / 1000, 2),
+    }
+
+
+MICROBENCHMARKS = {
+    "kik_uuid": bench_kik_uuid,
+    "kik_map": bench_kik_map,
+    "handshake": bench_handshake,
+    "password_key": bench_password_key,
+    "blockhash": bench_blockhash,
+    "parse_image": bench_parse_image,
+    "image_batch": bench_image_batch,
+    "content_message": bench_content_message,
+    "peer_cache": bench_peer_cache,
+    "memory": bench_memory,
+    "user_entity": bench_user_entity,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of hot helpers")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run. Default: all ({', '.join(MICROBENCHMARKS)})")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per measurement. Default: 20000")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in MICROBENCHMARKS:
+            parser.error(f"unknown benchmark '{name}', choose from {', '.join(MICROBENCHMARKS)}")
+
+    results = {}
+    for name in args.benchmarks or list(MICROBENCHMARKS):
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = MICROBENCHMARKS[name](args.number)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
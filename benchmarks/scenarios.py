@@ -0,0 +1,404 @@
+"""
+The end-to-end benchmark scenarios.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import kik_unofficial.datatypes.xmpp.chatting as chatting
+from benchmarks.harness import BenchmarkCallback, Scenario
+from kik_unofficial.client import KikClient
+from kik_unofficial.datatypes.exceptions import KikErrorException
+from kik_unofficial.datatypes.xmpp.history import HistoryResponse
+from kik_unofficial.datatypes.xmpp.roster import FetchRosterResponse, QueryUserByUsernameRequest
+from kik_unofficial.mock_server.fixtures import MockAccount, MockFixtures
+from kik_unofficial.mock_server.replay import ReplayKikServer
+from kik_unofficial.mock_server.server import MockKikServer, log
+from kik_unofficial.utilities.roster_store import RosterStore
+from kik_unofficial.utilities.wire_capture import replay_stanzas
+
+
+class EchoBotScenario(Scenario):
+    """
+    The server sends chat messages at a fixed rate, the bot replies to each one like examples/echo_bot.py does.
+    """
+
+    name = "echo_bot"
+    description = "Replies to every incoming chat message (mirrors examples/echo_bot.py)"
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        fixtures = MockFixtures(roster_users=50)
+        return MockKikServer(account=account, fixtures=fixtures, echo=False, message_rate=self.rate, message_count=self.size)
+
+    def make_callback(self) -> BenchmarkCallback:
+        scenario = self
+
+        class EchoBotCallback(BenchmarkCallback):
+            def on_chat_message_received(self, chat_message: chatting.IncomingChatMessage):
+                self.record_message(chat_message)
+                self.client.log.info(f"'{chat_message.from_jid}' says: {chat_message.body}")
+                self.client.log.info("Replaying.")
+                self.client.send_chat_message(chat_message.from_jid, 'You said "' + chat_message.body + '"!')
+                if self.record_sent() >= scenario.size:
+                    self.done.set()
+
+        return EchoBotCallback()
+
+
+class BusyGroupScenario(Scenario):
+    """
+    The server floods a public group with messages, the bot only observes them.
+    """
+
+    name = "busy_group"
+    description = "Receives a flood of public group messages without replying"
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        fixtures = MockFixtures(roster_groups=1, group_members=100)
+        return MockKikServer(account=account, fixtures=fixtures, echo=False, message_rate=self.rate, message_count=self.size, message_type="groupchat")
+
+    def make_callback(self) -> BenchmarkCallback:
+        scenario = self
+
+        class BusyGroupCallback(BenchmarkCallback):
+            def on_group_message_received(self, chat_message: chatting.IncomingGroupChatMessage):
+                self.client.log.info(f"'{chat_message.from_jid}' from group ID {chat_message.group_jid} says: {chat_message.body}")
+                if self.record_message(chat_message) >= scenario.size:
+                    self.done.set()
+
+        return BusyGroupCallback()
+
+
+class RosterLoginScenario(Scenario):
+    """
+    Logs in and fetches a large roster. The measurement window includes the login.
+    `size` is the number of users, one group is added for every 10 users.
+    """
+
+    name = "roster_login"
+    description = "Logs in and fetches a roster with many users and groups"
+    measure_login = True
+
+    def __init__(self, size: int, rate: float):
+        super().__init__(size, rate)
+        self.roster_requested = None
+        self.roster_received = None
+        self.roster_peers = 0
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        fixtures = MockFixtures(roster_users=self.size, roster_groups=max(1, self.size // 10), group_members=50)
+        return MockKikServer(account=account, fixtures=fixtures, echo=False)
+
+    def make_callback(self) -> BenchmarkCallback:
+        scenario = self
+
+        class RosterCallback(BenchmarkCallback):
+            def on_roster_received(self, response: FetchRosterResponse):
+                scenario.roster_received = time.perf_counter()
+                scenario.roster_peers = len(response.peers)
+                self.done.set()
+
+        return RosterCallback()
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        self.roster_requested = time.perf_counter()
+        client.request_roster()
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        roster_seconds = self.roster_received - self.roster_requested if self.roster_received else None
+        return {"roster_peers": self.roster_peers, "roster_seconds": round(roster_seconds, 4) if roster_seconds else None}
+
+
+class RosterSyncScenario(Scenario):
+    """
+    Syncs a paged roster into a roster store, which requests the following pages by itself.
+    `size` is the number of users, one group is added for every 10 users, 100 entries per page.
+    """
+
+    name = "roster_sync"
+    description = "Syncs a paged roster into a roster store"
+
+    def __init__(self, size: int, rate: float):
+        super().__init__(size, rate)
+        self.roster_store = RosterStore()
+        self.sync_started = None
+        self.sync_ended = None
+        self.pages = 0
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        fixtures = MockFixtures(roster_users=self.size, roster_groups=max(1, self.size // 10), group_members=50, roster_page_size=100)
+        return MockKikServer(account=account, fixtures=fixtures, echo=False)
+
+    def make_callback(self) -> BenchmarkCallback:
+        scenario = self
+
+        class RosterSyncCallback(BenchmarkCallback):
+            def on_roster_received(self, response: FetchRosterResponse):
+                scenario.pages += 1
+                if not response.more:
+                    scenario.sync_ended = time.perf_counter()
+                    self.done.set()
+
+        return RosterSyncCallback()
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        client.roster_store = self.roster_store
+        self.sync_started = time.perf_counter()
+        client.sync_roster()
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        sync_seconds = self.sync_ended - self.sync_started if self.sync_ended else None
+        return {"roster_pages": self.pages, "roster_peers": len(self.roster_store), "roster_seconds": round(sync_seconds, 4) if sync_seconds else None}
+
+
+class HistoryBacklogScenario(Scenario):
+    """
+    Drains a QoS history backlog, acking each page and requesting the next one.
+    """
+
+    name = "history_backlog"
+    description = "Drains a backlog of QoS history messages page by page"
+
+    def __init__(self, size: int, rate: float):
+        super().__init__(size, rate)
+        self.pages = 0
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        fixtures = MockFixtures(roster_users=50, history_messages=self.size, history_page_size=50)
+        return MockKikServer(account=account, fixtures=fixtures, echo=False)
+
+    def make_callback(self) -> BenchmarkCallback:
+        scenario = self
+
+        class HistoryCallback(BenchmarkCallback):
+            def on_message_history_response(self, response: HistoryResponse):
+                scenario.pages += 1
+                for message in response.messages:
+                    self.record_message(message)
+                self.client.send_ack(response.messages, request_history=response.more)
+                if not response.more:
+                    self.done.set()
+
+        return HistoryCallback()
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        client.request_messaging_history()
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        return {"history_pages": self.pages, "history_messages": callback.messages_received}
+
+
+class UsernameLookupScenario(Scenario):
+    """
+    Resolves usernames to JIDs with get_jid() from many threads at once, each username being looked up by 4 of them.
+    `size` is the number of lookups, 1 in 50 usernames doesn't exist.
+    """
+
+    name = "username_lookup"
+    description = "Resolves usernames from concurrent threads"
+    threads = 16
+
+    def __init__(self, size: int, rate: float):
+        super().__init__(size, rate)
+        self.usernames = [f"mockpeer{i // 4}" if i % 200 else f"nobody{i}" for i in range(size)]
+        self.resolved = 0
+        self.failed = 0
+        self.requests_sent = 0
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        return MockKikServer(account=account, fixtures=MockFixtures(roster_users=50), echo=False)
+
+    def make_callback(self) -> BenchmarkCallback:
+        return BenchmarkCallback()
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        lock = threading.Lock()
+        lookups = iter(self.usernames)
+        send_xmpp_element = client._send_xmpp_element
+
+        def count_requests(element):
+            if isinstance(element, QueryUserByUsernameRequest):
+                with lock:
+                    self.requests_sent += 1
+            return send_xmpp_element(element)
+
+        def look_up():
+            while True:
+                with lock:
+                    username = next(lookups, None)
+                if username is None:
+                    return
+                try:
+                    jid = client.get_jid(username)
+                    if jid != MockFixtures.peer_jid(int(username[len("mockpeer") :])):  # noqa: E203
+                        raise AssertionError(f"{username} resolved to {jid}")
+                    with lock:
+                        self.resolved += 1
+                except KikErrorException:
+                    with lock:
+                        self.failed += 1
+
+        def run():
+            workers = [threading.Thread(target=look_up, name=f"Lookup {i}") for i in range(self.threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            callback.done.set()
+
+        client._send_xmpp_element = count_requests
+        threading.Thread(target=run, name="Lookup Runner", daemon=True).start()
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        return {"usernames_resolved": self.resolved, "usernames_not_found": self.failed, "username_requests": self.requests_sent}
+
+
+class PeerInfoScenario(Scenario):
+    """
+    Looks up the sender of every message of a busy group with request_info_of_user_async(), as bots greeting
+    new members do. `size` is the number of lookups, spread over size / 5 senders, 1 in 50 of them unknown.
+    """
+
+    name = "peer_info"
+    description = "Looks up the peer info of many group message senders"
+    threads = 8
+
+    def __init__(self, size: int, rate: float):
+        super().__init__(size, rate)
+        senders = max(1, size // 5)
+        self.jids = [MockFixtures.peer_jid(i % senders) if i % 50 else f"nobody{i}_x9z@talk.kik.com" for i in range(size)]
+        self.found = 0
+        self.not_found = 0
+        self.requests_sent = 0
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        return MockKikServer(account=account, fixtures=MockFixtures(roster_users=50), echo=False)
+
+    def make_callback(self) -> BenchmarkCallback:
+        return BenchmarkCallback()
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        def look_up(jids):
+            futures = [(jid, client.request_info_of_user_async(jid)) for jid in jids]
+            results = [(jid, future.result(30)) for jid, future in futures]
+            for jid, user in results:
+                if user is not None and user.jid != jid:
+                    raise AssertionError(f"{jid} was answered with {user.jid}")
+            return sum(user is not None for _, user in results), sum(user is None for _, user in results)
+
+        def run():
+            with ThreadPoolExecutor(self.threads) as executor:
+                for found, not_found in executor.map(look_up, [self.jids[i :: self.threads] for i in range(self.threads)]):  # noqa: E203
+                    self.found += found
+                    self.not_found += not_found
+            self.requests_sent = client.peer_info_batcher.requests_sent
+            callback.done.set()
+
+        threading.Thread(target=run, name="Peer Info Runner", daemon=True).start()
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        return {"peers_found": self.found, "peers_not_found": self.not_found, "peer_info_requests": self.requests_sent}
+
+
+class AliasResolutionScenario(Scenario):
+    """
+    Resolves the alias senders of public group messages (and some user JIDs) with xiphias_get_user_async(),
+    as moderation bots do. `size` is the number of lookups, spread over size / 5 alias JIDs and 1 in 10 of them user JIDs.
+    """
+
+    name = "alias_resolution"
+    description = "Resolves many public group alias senders through xiphias"
+    threads = 8
+
+    def __init__(self, size: int, rate: float):
+        super().__init__(size, rate)
+        senders = max(1, size // 5)
+        self.jids = [MockFixtures.peer_jid(i % senders) if i % 10 == 0 else f"{i % senders:052d}_a@talk.kik.com" for i in range(size)]
+        self.resolved = 0
+        self.requests_sent = 0
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        return MockKikServer(account=account, fixtures=MockFixtures(roster_users=50), echo=False)
+
+    def make_callback(self) -> BenchmarkCallback:
+        return BenchmarkCallback()
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        def resolve(jids):
+            futures = [(jid, client.xiphias_get_user_async(jid)) for jid in jids]
+            for jid, future in futures:
+                user = future.result(30)
+                if jid not in (user.jid, user.alias_jid):
+                    raise AssertionError(f"{jid} was resolved to {user.jid} / {user.alias_jid}")
+            return len(futures)
+
+        def run():
+            with ThreadPoolExecutor(self.threads) as executor:
+                self.resolved = sum(executor.map(resolve, [self.jids[i :: self.threads] for i in range(self.threads)]))  # noqa: E203
+            self.requests_sent = client.xiphias_user_resolver.requests_sent
+            callback.done.set()
+
+        threading.Thread(target=run, name="Alias Resolution Runner", daemon=True).start()
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        return {"users_resolved": self.resolved, "xiphias_requests": self.requests_sent}
+
+
+class ReplayScenario(Scenario):
+    """
+    Replays a wire capture recorded with KikClient(capture_file_path=...) through the whole client,
+    and separately through KikXmlParser alone. `size` is the number of stanzas in the capture.
+    Message latencies aren't recorded since the replayed timestamps are old.
+    """
+
+    name = "replay"
+    description = "Replays a recorded wire capture through the client"
+    measure_login = True
+
+    def __init__(self, capture_path: str, realtime: bool = False):
+        super().__init__(0, 0.0)
+        self.capture_path = capture_path
+        self.realtime = realtime
+        self.server = None  # type: ReplayKikServer
+        self.parser_seconds = None
+
+    def make_server(self, account: MockAccount) -> MockKikServer:
+        started = time.perf_counter()
+        replay_stanzas(self.capture_path, log)
+        self.parser_seconds = time.perf_counter() - started
+        self.server = ReplayKikServer(self.capture_path, realtime=self.realtime)
+        self.size = sum(self.server.stanzas_per_connection.values())
+        return self.server
+
+    def make_callback(self) -> BenchmarkCallback:
+        return BenchmarkCallback()
+
+    def on_started(self, client: KikClient, callback: BenchmarkCallback) -> None:
+        def wait_for_replay():
+            self.server.finished.wait()
+            callback.done.set()
+
+        threading.Thread(target=wait_for_replay, name="Replay Waiter", daemon=True).start()
+
+    def extra_results(self, callback: BenchmarkCallback) -> dict:
+        return {
+            "capture": self.capture_path,
+            "parser_seconds": round(self.parser_seconds, 4),
+            "parser_stanzas_per_second": round(self.size / self.parser_seconds, 1) if self.parser_seconds else None,
+        }
+
+
+# name -> (scenario class, default size, default rate)
+SCENARIOS = {
+    EchoBotScenario.name: (EchoBotScenario, 2000, 1000.0),
+    BusyGroupScenario.name: (BusyGroupScenario, 5000, 2500.0),
+    RosterLoginScenario.name: (RosterLoginScenario, 2000, 0.0),
+    RosterSyncScenario.name: (RosterSyncScenario, 2000, 0.0),
+    HistoryBacklogScenario.name: (HistoryBacklogScenario, 2000, 0.0),
+    UsernameLookupScenario.name: (UsernameLookupScenario, 2000, 0.0),
+    PeerInfoScenario.name: (PeerInfoScenario, 2000, 0.0),
+    AliasResolutionScenario.name: (AliasResolutionScenario, 2000, 0.0),
+}
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import io
 import pathlib
+import random
 import ssl
 import time
 import traceback
-from threading import Thread, Event
+from concurrent.futures import Executor, Future
+from threading import Thread, Lock, Timer
 from typing import Union, List
 from asyncio import StreamReader, StreamWriter
 from bs4 import BeautifulSoup
@@ -19,19 +22,32 @@ import kik_unofficial.datatypes.xmpp.roster as roster
 import kik_unofficial.datatypes.xmpp.history as history
 import kik_unofficial.datatypes.xmpp.sign_up as sign_up
 import kik_unofficial.xmlns_handlers as xmlns_handlers
+from kik_unofficial.datatypes.exceptions import KikErrorException
 from kik_unofficial.datatypes.xmpp.auth_stanza import AuthStanza
 from kik_unofficial.datatypes.xmpp import account, xiphias
 from kik_unofficial.parser.parser import KikXmlParser
 from kik_unofficial.utilities import xml_utilities, jid_utilities
-from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
+from kik_unofficial.utilities.auth_cert_keys import AuthCertKeyPool, AuthCertKeyStore
+from kik_unofficial.utilities.device_profile import get_device_profile
+from kik_unofficial.utilities.image_preparation import ImagePreparer
 from kik_unofficial.utilities.kik_server_clock import KikServerClock
+from kik_unofficial.utilities.media_cache import MediaCache
+from kik_unofficial.utilities.parsing_utilities import ParsingUtilities
+from kik_unofficial.utilities.peer_cache import PeerCache
+from kik_unofficial.utilities.peer_info_batcher import PeerInfoBatcher
+from kik_unofficial.utilities.roster_store import RosterStore
 from kik_unofficial.utilities.threading_utils import run_in_new_thread
-from kik_unofficial.datatypes.xmpp.base_elements import XMPPElement, XMPPResponse
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPContentResponse, XMPPElement, XMPPResponse
 from kik_unofficial.http_requests import profile_pictures, content
+from kik_unofficial.http_requests.media_fetcher import MediaFetcher
+from kik_unofficial.http_requests.tenor_client import get_tenor_client
+from kik_unofficial.http_requests.upload_service import UploadService, get_upload_service
 from kik_unofficial.utilities.credential_utilities import random_device_id, random_android_id
 from kik_unofficial.utilities.logging_utils import set_up_basic_logging
+from kik_unofficial.utilities.wire_capture import WireCaptureWriter, open_capturing_connection
+from kik_unofficial.utilities.xiphias_user_resolver import XiphiasUserResolver
 
-HOST, PORT = CryptographicUtils.get_kik_host_name(), 5223
+HOST, PORT = get_device_profile().host_name, 5223
 
 
 class KikClient:
@@ -51,6 +67,18 @@ class KikClient:
         enable_console_logging: bool = False,
         log_file_path: str = None,
         disable_auth_cert: bool = True,
+        host: str = None,
+        port: int = None,
+        ssl_context: ssl.SSLContext = None,
+        capture_file_path: str = None,
+        auth_cert_key_dir: str = None,
+        auth_cert_key_pool: AuthCertKeyPool = None,
+        image_executor: Executor = None,
+        media_cache: MediaCache = None,
+        upload_service: UploadService = None,
+        media_fetcher: MediaFetcher = None,
+        roster_store: RosterStore = None,
+        peer_cache: PeerCache = None,
     ) -> None:
         """
         Initializes a connection to Kik servers.
@@ -70,6 +98,33 @@ class KikClient:
         :param disable_auth_cert: If true, auth certs will not be generated on every connection.
             This greatly improves startup time.
             True by default.
+            If auth certs are enabled, their keys are generated ahead of time in the background.
+        :param host: The XMPP host to connect to. Defaults to the kik host of the emulated version.
+                     Override it to point the client at a local server (see kik_unofficial.mock_server).
+        :param port: The XMPP port to connect to (default: 5223)
+        :param ssl_context: The SSL context used for the connection. Defaults to ssl.create_default_context()
+        :param capture_file_path: If set, the raw inbound stream of every connection is recorded to this file
+                                  (gzip compressed if it ends with .gz). Replay it with kik_unofficial.mock_server.replay.
+        :param auth_cert_key_dir: If set, auth certificate keys are kept in this directory, one file per account,
+                                  so they're only generated once per account.
+        :param auth_cert_key_pool: The pool generating auth certificate keys ahead of time, e.g. one generating them in
+                                   processes. Defaults to the one shared by all clients (see auth_cert_keys.set_key_pool()).
+        :param image_executor: The executor in which send_chat_images() and send_chat_image_async() prepare images,
+                               e.g. a ProcessPoolExecutor created before starting the client. Defaults to a pool of
+                               worker threads (one per CPU).
+        :param media_cache: If set, prepared images are cached by the hash of their bytes, and sending an image
+                            that was uploaded recently references that upload instead of uploading it again.
+        :param upload_service: The service running image and picture uploads, which bounds their concurrency and
+                               retries failures. Defaults to one shared by all clients.
+        :param media_fetcher: The fetcher that downloads the files of received images and videos (see fetch_media()),
+                              and prefetches them from the chats it's configured to. Created on first use if not given,
+                              in which case it's shut down and its files removed when the client disconnects for good.
+        :param roster_store: If set, received roster pages are applied to this store, further pages are requested
+                             automatically while Kik announces more, and sync_roster() only fetches the changes
+                             since the last sync. Give it a file (one per account) to keep the roster across restarts.
+        :param peer_cache: The cache of the users learned from peer info and xiphias responses, used to resolve
+                           usernames to JIDs. Defaults to an in-memory PeerCache of 10000 users. Give it a path to
+                           start warm; it's saved there when the client disconnects for good.
         """
         # turn on logging with basic configuration
         self.log = set_up_basic_logging(
@@ -83,10 +138,25 @@ class KikClient:
         self.device_id = device_id
         self.android_id = android_id
 
+        self.host = host or HOST
+        self.port = port or PORT
+        self.ssl_context = ssl_context
+        self.wire_capture = WireCaptureWriter(capture_file_path) if capture_file_path else None
+        self.image_preparer = ImagePreparer(image_executor)
+        self.media_cache = media_cache
+        self.upload_service = upload_service or get_upload_service()
+        self.media_fetcher = media_fetcher
+        self._owns_media_fetcher = False
+        self.roster_store = roster_store
+
         self.callback = callback
         if self.callback:
             self.callback._on_client_init(self)
+        self.auth_cert_key_store = AuthCertKeyStore(auth_cert_key_dir) if auth_cert_key_dir else None
+        self.auth_cert_key_pool = auth_cert_key_pool
         self.authenticator = AuthStanza(self)
+        if not disable_auth_cert:
+            self.authenticator.prefetch_keys()
 
         self.connected = False
         self.authenticated = False
@@ -95,8 +165,12 @@ class KikClient:
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
 
-        self._known_users_information = set()
-        self._new_user_added_event = Event()
+        self.peer_cache = peer_cache if peer_cache is not None else PeerCache()
+        self.peer_info_batcher = PeerInfoBatcher(self._send_xmpp_element, self.peer_cache)
+        self.xiphias_user_resolver = XiphiasUserResolver(self._send_xmpp_element)
+        self._username_lookups = {}  # type: dict[str, Future]  # lowercase username -> future of its JID
+        self._username_lookup_ids = {}  # type: dict[str, str]  # request ID -> lowercase username
+        self._username_lookups_lock = Lock()
 
         self.should_login_on_connection = kik_username is not None and kik_password is not None
         self.disable_auth_cert = disable_auth_cert
@@ -188,6 +262,28 @@ class KikClient:
         self.log.info("Requesting roster (list of chat partners)...")
         return self._send_xmpp_element(roster.FetchRosterRequest(is_batched=is_batched, timestamp=timestamp, mts=mts))
 
+    def sync_roster(self):
+        """
+        Requests the roster changes since the last sync of the roster store (the whole roster the first time).
+        Requires a roster store, see the roster_store parameter of KikClient.
+        """
+        if self.roster_store is None:
+            raise ValueError("sync_roster() requires a roster store")
+        is_batched, timestamp, mts = self.roster_store.next_request_tokens()
+        return self.request_roster(is_batched=is_batched, timestamp=timestamp, mts=mts)
+
+    def _on_roster_page(self, response: roster.FetchRosterResponse):
+        self.roster_store.apply(response)
+        if response.is_roster_full:
+            # Kik asks to refetch everything after a short while
+            delay = random.uniform(30, 60)
+            self.log.info(f"Kik requested a full roster refresh, refetching in {delay:.0f}s")
+            timer = Timer(delay, self.sync_roster)
+            timer.daemon = True
+            timer.start()
+        elif response.more:
+            self.sync_roster()
+
     # -------------------------------
     # Common Messaging Operations
     # -------------------------------
@@ -213,19 +309,126 @@ class KikClient:
                          If you don't know the JID of someone, you can also specify a kik username here.
         :param file: The path to the image file OR its bytes OR an IOBase object to send.
         :param forward: True to allow the client to forward the image to other chats
+        :raises KikUploadError: if the image couldn't be uploaded, in which case no message is sent
         """
         peer_jid = self.get_jid(peer_jid)
-        image = chatting.OutgoingChatImage(peer_jid, file, forward)
+        cache_key = None
+        if self.media_cache:
+            cache_key, file, parsed = self.media_cache.lookup(file)
+            if parsed is None:
+                parsed = ParsingUtilities.parse_image(file)
+                self.media_cache.put(cache_key, parsed)
+            image = chatting.OutgoingChatImage(peer_jid, None, forward, parsed=parsed)
+        else:
+            image = chatting.OutgoingChatImage(peer_jid, file, forward)
         self.log.info(f"Sending chat image to {'group' if image.is_group else 'user'} '{peer_jid}'...")
 
-        content.upload_gallery_image(
-            image,
-            f"{self.kik_node}@talk.kik.com",
-            self.username,
-            self.password,
-        )
+        self.upload_service.wait(self._upload_gallery_image(image, cache_key))
         return self._send_xmpp_element(image)
 
+    def send_chat_images(self, peer_jid: str, files: list, forward: bool = True) -> list[Future]:
+        """
+        Sends several images to another person or a group without blocking.
+        The images are prepared in parallel in the image executor, then uploaded and sent in order.
+
+        :param peer_jid: The Jabber ID for which to send the messages (looks like username_ejs@talk.kik.com)
+                         If you don't know the JID of someone, you can also specify a kik username here.
+        :param files: The images to send, each a path to the image file OR its bytes OR an IOBase object.
+        :param forward: True to allow the client to forward the images to other chats
+        :return: A future per image, resolving to the ID of its message once it was sent
+        """
+        cache_keys, preparations = zip(*[self._submit_image(file) for file in files]) if files else ((), ())
+        results = [Future() for _ in preparations]
+        Thread(target=self._send_prepared_images, args=(peer_jid, cache_keys, preparations, results, forward), name="Kik Image Sender").start()
+        return results
+
+    def send_chat_image_async(self, peer_jid: str, file, forward: bool = True) -> Future:
+        """
+        Like send_chat_image(), but prepares the image in the image executor and returns right away.
+
+        :return: A future resolving to the ID of the message once it was sent
+        """
+        return self.send_chat_images(peer_jid, [file], forward)[0]
+
+    def _submit_image(self, file) -> tuple[Union[str, None], Future]:
+        # returns the media cache key of the file (if caching) and a future of its parse_image() result
+        if not self.media_cache:
+            return None, self.image_preparer.submit(file)
+        cache_key, data, parsed = self.media_cache.lookup(file)
+        if parsed is not None:
+            future = Future()
+            future.set_result(parsed)
+            return cache_key, future
+
+        def cache_result(prepared: Future):
+            if not prepared.cancelled() and prepared.exception() is None:
+                self.media_cache.put(cache_key, prepared.result())
+
+        future = self.image_preparer.submit(data)
+        future.add_done_callback(cache_result)
+        return cache_key, future
+
+    def _upload_gallery_image(self, image: chatting.OutgoingChatImage, cache_key: Union[str, None]) -> Future:
+        # uploads the image, or points it at a previous upload of the same image
+        if cache_key:
+            content_id = self.media_cache.get_uploaded_content_id(cache_key)
+            if content_id:
+                self.log.debug(f"Referencing previously uploaded content {content_id}")
+                image.content_id = content_id
+                uploaded = Future()
+                uploaded.set_result(None)
+                return uploaded
+
+        upload = content.upload_gallery_image(image, f"{self.kik_node}@talk.kik.com", self.username, self.password, self.upload_service)
+        if cache_key:
+            content_id = image.content_id
+
+            def remember_upload(finished: Future):
+                if not finished.cancelled() and finished.exception() is None:
+                    self.media_cache.set_uploaded_content_id(cache_key, content_id)
+
+            upload.add_done_callback(remember_upload)
+        return upload
+
+    def _send_prepared_images(self, peer_jid: str, cache_keys: tuple, preparations: tuple, results: list[Future], forward: bool):
+        try:
+            peer_jid = self.get_jid(peer_jid)
+        except Exception as e:
+            for result in results:
+                result.set_exception(e)
+            return
+
+        # start every upload as soon as its image is prepared, then send the messages in order once uploaded
+        uploads = []
+        for cache_key, preparation, result in zip(cache_keys, preparations, results):
+            try:
+                image = chatting.OutgoingChatImage(peer_jid, None, forward, parsed=preparation.result())
+                uploads.append((image, self._upload_gallery_image(image, cache_key), result))
+            except Exception as e:
+                self.log.error(f"Failed to prepare chat image for '{peer_jid}': {e}")
+                result.set_exception(e)
+
+        for image, upload, result in uploads:
+            try:
+                self.upload_service.wait(upload)
+                self.log.info(f"Sending chat image to {'group' if image.is_group else 'user'} '{peer_jid}'...")
+                result.set_result(self._send_xmpp_element(image))
+            except Exception as e:
+                self.log.error(f"Failed to send chat image to '{peer_jid}': {e}")
+                result.set_exception(e)
+
+    def fetch_media(self, message: XMPPContentResponse) -> Future:
+        """
+        Downloads the file of a received image or video message, see MediaFetcher.fetch().
+
+        :param message: the message, e.g. the IncomingImageMessage given to on_image_received
+        :return: a future of the path of the downloaded file
+        """
+        if self.media_fetcher is None:
+            self.media_fetcher = MediaFetcher()
+            self._owns_media_fetcher = True
+        return self.media_fetcher.fetch(message)
+
     def send_read_receipt(self, peer_jid: str, receipt_message_id: Union[str, list[str]], group_jid=None):
         """
         Sends a receipt indicating that the message was read.
@@ -302,6 +505,35 @@ class KikClient:
         self.log.info(f"Sending a GIF message to {'group' if gif.is_group else 'user'} '{peer_jid}'...")
         return self._send_xmpp_element(gif)
 
+    def send_gif_image_async(self, peer_jid: str, search_term: str, api_key: str) -> Future:
+        """
+        Like send_gif_image(), but looks the GIF up in the background and returns right away.
+
+        :return: A future resolving to the ID of the message once it was sent
+        """
+        result = Future()
+
+        def send(lookup: Future):
+            try:
+                gif = chatting.OutgoingGIFMessage(peer_jid, search_term, api_key, gif=lookup.result())
+                self.log.info(f"Sending a GIF message to {'group' if gif.is_group else 'user'} '{peer_jid}'...")
+                result.set_result(self._send_xmpp_element(gif))
+            except Exception as e:
+                self.log.error(f"Failed to send a GIF message to '{peer_jid}': {e}")
+                result.set_exception(e)
+
+        get_tenor_client(api_key).search_for_gif_async(search_term).add_done_callback(send)
+        return result
+
+    @staticmethod
+    def prefetch_gifs(search_terms: List[str], api_key: str) -> List[Future]:
+        """
+        Looks up GIFs in the background so that sending them later with send_gif_image() costs no round trip to tenor.com.
+
+        :return: A future of the lookup of each search term
+        """
+        return get_tenor_client(api_key).prefetch(search_terms)
+
     def request_info_of_users(self, peer_jids: Union[str, List[str]]):
         """
         Requests basic information (username, JID, display name, picture) of some users.
@@ -318,6 +550,17 @@ class KikClient:
         else:
             return self._send_xmpp_element(roster.PeersInfoRequest(peer_jids))
 
+    def request_info_of_user_async(self, peer_jid: str) -> Future:
+        """
+        Requests basic information (username, JID, display name, picture) of a single user, batched with the other
+        lookups made within 50 ms (up to 50 JIDs per request). Users already in the peer cache are answered right away.
+        Batches still fire on_peer_info_received() when they arrive.
+
+        :param peer_jid: The JID of the user
+        :return: a future of the User, or of None if kik doesn't know the JID
+        """
+        return self.peer_info_batcher.request(peer_jid)
+
     def request_info_of_username(self, peer_username: str):
         """
         Requests basic information (username, JID, display name, picture) of a single user by their username.
@@ -407,6 +650,17 @@ class KikClient:
         """
         return self._send_xmpp_element(xiphias.UsersByAliasRequest(alias_jids))
 
+    def xiphias_get_user_async(self, jid: str) -> Future:
+        """
+        Resolves one user JID or alias JID (e.g. IncomingGroupChatMessage.alias_sender) with xiphias.
+        The lookups made within 50 ms are sent as one GetUsers or GetUsersByAlias call, and the results
+        are cached for 10 minutes under both the alias JID and the real JID.
+
+        :param jid: a user JID or an alias JID
+        :return: a future of the UsersResponseUser, or of None if kik returned nothing for the JID
+        """
+        return self.xiphias_user_resolver.resolve(jid)
+
     # --------------------------
     #  Group Admin Operations
     # -------------------------
@@ -586,18 +840,20 @@ class KikClient:
         Sets the profile picture of the current user
 
         :param file: The path to the file OR its bytes OR an IOBase object to set
+        :return: A future that resolves once the picture was uploaded
         """
         self.log.info(f"Changing profile picture for {self.username}")
-        profile_pictures.set_profile_picture(file, f"{self.kik_node}@talk.kik.com", self.username, self.password)
+        return profile_pictures.set_profile_picture(file, f"{self.kik_node}@talk.kik.com", self.username, self.password, upload_service=self.upload_service)
 
     def set_background_picture(self, file: str or bytes or pathlib.Path or io.IOBase):
         """
         Sets the background picture of the current user
 
         :param file: The path to the image file OR its bytes OR an IOBase object to set
+        :return: A future that resolves once the picture was uploaded
         """
         self.log.info(f"Changing background picture for {self.username}")
-        profile_pictures.set_background_picture(file, f"{self.kik_node}@talk.kik.com", self.username, self.password)
+        return profile_pictures.set_background_picture(file, f"{self.kik_node}@talk.kik.com", self.username, self.password, upload_service=self.upload_service)
 
     def set_group_picture(self, file: str or bytes or pathlib.Path or io.IOBase, group_jid: str, silent: bool = False):
         """
@@ -608,9 +864,12 @@ class KikClient:
         :param file: The path to the image file OR its bytes OR an IOBase object to set
         :param group_jid: the JID of the group to change the picture for
         :param silent: If true, no status message is generated when the picture is changed
+        :return: A future that resolves once the picture was uploaded
         """
         self.log.info(f"Changing group picture for {self.username} in {group_jid} (silent={silent})")
-        profile_pictures.set_group_picture(file, f"{self.kik_node}@talk.kik.com", group_jid, self.username, self.password, silent)
+        return profile_pictures.set_group_picture(
+            file, f"{self.kik_node}@talk.kik.com", group_jid, self.username, self.password, silent, upload_service=self.upload_service
+        )
 
     def send_ping(self):
         """
@@ -782,6 +1041,12 @@ class KikClient:
         result_type = iq_element["type"]
         if result_type == "error":
             error = iq_element.find("error", recursive=False)
+            request_id = iq_element.get("id")
+            condition = error.find(True).name if error and error.find(True) else "unknown error"
+            exception = KikErrorException(iq_element, f"Kik returned an error for request {request_id}: {condition}")
+            self._fail_username_lookup(request_id, exception)
+            self.peer_info_batcher.on_error(request_id, exception)
+            self.xiphias_user_resolver.on_error(request_id, exception)
             if error:
                 if error.find("bad-request", recursive=False):
                     raise Exception(f'Received a Bad Request error for stanza with ID {iq_element.attrs["id"]}')
@@ -873,6 +1138,21 @@ class KikClient:
 
         self.loop.run_until_complete(task)
         self.log.debug("Main loop ended.")
+        # the responses to requests sent on the lost connection won't come
+        self.peer_info_batcher.fail_in_flight(ConnectionError("The connection to kik was lost"))
+        self.xiphias_user_resolver.fail_in_flight(ConnectionError("The connection to kik was lost"))
+        if self.is_permanent_disconnection:
+            if self.wire_capture:
+                self.wire_capture.close()
+            self.image_preparer.shutdown()
+            if self._owns_media_fetcher:
+                # also removes its temporary directory
+                self.media_fetcher.shutdown(wait=False)
+            if self.peer_cache.path:
+                try:
+                    self.peer_cache.save()
+                except OSError as e:
+                    self.log.warning(f"Failed to save the peer cache: {e}")
         self.callback.on_disconnected()
         self._connect()
 
@@ -887,22 +1167,56 @@ class KikClient:
         username = username_or_jid
 
         # first search if we already have it
-        if self.get_jid_from_cache(username) is None:
-            # go request for it
+        jid = self.get_jid_from_cache(username)
+        if jid is not None:
+            return jid
+
+        # go request for it, unless another thread already did
+        key = username.lower()
+        with self._username_lookups_lock:
+            future = self._username_lookups.get(key)
+            is_new_lookup = future is None
+            if is_new_lookup:
+                future = self._username_lookups[key] = Future()
+                request = roster.QueryUserByUsernameRequest(username)
+                self._username_lookup_ids[request.message_id] = key
+        if is_new_lookup:
+            self._send_xmpp_element(request)
 
-            self._new_user_added_event.clear()
-            self.request_info_of_username(username)
-            if not self._new_user_added_event.wait(5.0):
-                raise TimeoutError(f"Could not get the JID for username {username} in time")
-
-        return self.get_jid_from_cache(username)
+        try:
+            return future.result(timeout=5.0)
+        except concurrent.futures.TimeoutError:
+            with self._username_lookups_lock:
+                if self._username_lookups.get(key) is future:
+                    del self._username_lookups[key]
+                    # the response may never come, so its request ID would be kept for good
+                    for request_id in [request_id for request_id, requested in self._username_lookup_ids.items() if requested == key]:
+                        del self._username_lookup_ids[request_id]
+            raise TimeoutError(f"Could not get the JID for username {username} in time") from None
+
+    def _resolve_username_lookups(self, request_id: str, users: list) -> None:
+        """
+        Completes the get_jid() lookups waiting for this username query response, or for the usernames in it.
+        """
+        with self._username_lookups_lock:
+            requested = self._username_lookup_ids.pop(request_id, None)
+            jids = {user.username.lower(): user.jid for user in users if user.username}
+            if requested is not None and requested not in jids:
+                jids[requested] = users[0].jid if users else None
+            futures = [(self._username_lookups.pop(key, None), jid) for key, jid in jids.items()]
+        for future, jid in futures:
+            if future is not None and not future.done():
+                future.set_result(jid)
+
+    def _fail_username_lookup(self, request_id: str, exception: Exception) -> None:
+        with self._username_lookups_lock:
+            key = self._username_lookup_ids.pop(request_id, None)
+            future = self._username_lookups.pop(key, None) if key is not None else None
+        if future is not None and not future.done():
+            future.set_exception(exception)
 
     def get_jid_from_cache(self, username):
-        for user in self._known_users_information:
-            if user.username.lower() == username.lower():
-                return user.jid
-
-        return None
+        return self.peer_cache.get_jid_by_username(username)
 
     @staticmethod
     def is_group_jid(jid: str) -> bool:
@@ -920,7 +1234,11 @@ class KikConnection:
     # noinspection PyProtectedMember
     async def read_loop(self):
         try:
-            self.reader, self.writer = await asyncio.open_connection(host=HOST, port=PORT, ssl=ssl.create_default_context())
+            ssl_context = self.api.ssl_context or ssl.create_default_context()
+            if self.api.wire_capture:
+                self.reader, self.writer = await open_capturing_connection(self.api.host, self.api.port, ssl_context, self.api.wire_capture)
+            else:
+                self.reader, self.writer = await asyncio.open_connection(host=self.api.host, port=self.api.port, ssl=ssl_context)
             parser = KikXmlParser(self.reader, self.log)
 
             self.log.info("Connected.")
@@ -944,6 +1262,8 @@ class KikConnection:
             if not self.is_closed:
                 self.log.warning("Connection unexpectedly lost")
             self.close()
+            if self.api.wire_capture and self.reader:
+                self.api.wire_capture.disconnected()
 
     def send_raw_data(self, data: bytes):
         if not self.writer:
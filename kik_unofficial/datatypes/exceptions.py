@@ -44,5 +44,5 @@ class KikUploadError(Exception):
 
     def __repr__(self):
         if self.reason is None:
-            return self.status_code
+            return str(self.status_code)
         return f"[{self.status_code}] {self.reason}"
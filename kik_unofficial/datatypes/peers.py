@@ -4,6 +4,7 @@ from typing import Union
 
 from bs4 import BeautifulSoup
 
+from kik_unofficial.utilities.jid_utilities import intern_jid
 from kik_unofficial.utilities.parsing_utilities import ParsingUtilities, get_text_of_tag, is_tag_present
 from kik_unofficial.datatypes.exceptions import KikApiException
 from kik_unofficial.protobuf.entity.v1.entity_common_pb2 import EntityUser
@@ -12,13 +13,19 @@ from kik_unofficial.protobuf.entity.v1.entity_common_pb2 import EntityUser
 class Peer:
     """
     a base class for representing a kik entity that has a JID (such as a user or a group)
+
+    Peers and their subclasses use __slots__, as large rosters and groups hold thousands of them.
     """
 
+    __slots__ = ("jid",)
+
     def __init__(self, jid: str):
-        self.jid = jid
+        self.jid = intern_jid(jid)
 
 
 class ProfilePic:
+    __slots__ = ("url", "thumb_url", "last_modified", "is_background")
+
     def __init__(self, url: str, thumb_url: str, last_modified: int, is_background: bool):
         self.url = url
         self.thumb_url = thumb_url
@@ -69,6 +76,8 @@ class User(Peer):
     Every user has a username, display name, etc.
     """
 
+    __slots__ = ("username", "display_name", "verified", "profile_pic", "pic", "_entity", "_decoded_entity")
+
     def __init__(self, data: BeautifulSoup):
         if "jid" not in data.attrs:
             raise KikApiException(f"No jid in user xml {data}")
@@ -76,8 +85,9 @@ class User(Peer):
         self.username = get_text_of_tag(data, "username")
         self.display_name = get_text_of_tag(data, "display-name")
         self.verified = is_tag_present(data, "verified")
-        if data.entity:
-            self._parse_entity(data.entity.text)
+        # the entity is decoded when one of its fields is first read, as most callers never do
+        self._entity = data.entity.text if data.entity else None
+        self._decoded_entity = None
 
         self.profile_pic = ProfilePic.parse(data)
 
@@ -85,18 +95,38 @@ class User(Peer):
         # Callers should migrate to self.profile_pic
         self.pic = self.profile_pic.url if self.profile_pic else None
 
-    def _parse_entity(self, entity):
-        decoded_entity = base64.urlsafe_b64decode(ParsingUtilities.fix_base64_padding(entity))
-        user = EntityUser()
-        user.ParseFromString(decoded_entity)
-        if user.registration_element:
-            self.creation_date_seconds = user.registration_element.creation_date.seconds
-        if user.background_profile_pic_extension:
-            self.background_pic_full_sized = user.background_profile_pic_extension.extension_detail.pic.full_sized_url
-            self.background_pic_thumbnail = user.background_profile_pic_extension.extension_detail.pic.thumbnail_url
-            self.background_pic_updated_seconds = user.background_profile_pic_extension.extension_detail.pic.last_updated_timestamp.seconds
-        if user.interests_element:
-            self.interests = [element.localized_verbiage for element in user.interests_element.interests_element]
+    def _get_entity(self) -> Union[EntityUser, None]:
+        if self._decoded_entity is None and self._entity is not None:
+            decoded_entity = base64.urlsafe_b64decode(ParsingUtilities.fix_base64_padding(self._entity))
+            user = EntityUser()
+            user.ParseFromString(decoded_entity)
+            self._decoded_entity = user
+        return self._decoded_entity
+
+    @property
+    def creation_date_seconds(self) -> Union[int, None]:
+        entity = self._get_entity()
+        return entity.registration_element.creation_date.seconds if entity is not None else None
+
+    @property
+    def background_pic_full_sized(self) -> Union[str, None]:
+        entity = self._get_entity()
+        return entity.background_profile_pic_extension.extension_detail.pic.full_sized_url if entity is not None else None
+
+    @property
+    def background_pic_thumbnail(self) -> Union[str, None]:
+        entity = self._get_entity()
+        return entity.background_profile_pic_extension.extension_detail.pic.thumbnail_url if entity is not None else None
+
+    @property
+    def background_pic_updated_seconds(self) -> Union[int, None]:
+        entity = self._get_entity()
+        return entity.background_profile_pic_extension.extension_detail.pic.last_updated_timestamp.seconds if entity is not None else None
+
+    @property
+    def interests(self) -> Union[list[str], None]:
+        entity = self._get_entity()
+        return [element.localized_verbiage for element in entity.interests_element.interests_element] if entity is not None else None
 
     def __str__(self):
         return f"{self.display_name} ({self.username})"
@@ -110,6 +140,8 @@ class RosterUser(User):
     Represents a user roster entry.
     """
 
+    __slots__ = ("is_blocked",)
+
     def __init__(self, data: BeautifulSoup):
         """
         Represents a user (person) in Kik, as received from the roster.
@@ -131,6 +163,8 @@ class Group(Peer):
     Each group has its members, public code (such as #Music), name, etc.
     """
 
+    __slots__ = ("members", "banned_members", "removed_members", "code", "name", "is_public", "profile_pic", "pic")
+
     def __init__(self, data: BeautifulSoup):
         if "jid" not in data.attrs:
             raise KikApiException("No jid in group xml")
@@ -160,6 +194,8 @@ class GroupMember(Peer):
     Members may also admin or own the group
     """
 
+    __slots__ = ("is_creator", "is_admin", "is_owner", "is_dm_disabled")
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data.text)
         # This is only true when sent as part of a server message when a user creates a group
@@ -3,15 +3,16 @@ import bs4
 import hashlib
 import hmac
 import logging
-import pyDes
-import rsa
 
 from kik_unofficial.datatypes.xmpp.base_elements import XMPPElement
+from kik_unofficial.utilities.auth_cert_keys import IDENTIFIER_HEX, AuthCertKeyPool, get_key_pool
+from kik_unofficial.utilities.crypto_backend import des_ecb_encrypt
 from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
 from kik_unofficial.utilities.kik_server_clock import KikServerClock
+from kik_unofficial.utilities.threading_utils import run_in_new_thread
 
 log = logging.getLogger(__name__)
-identifierHex = "30820122300d06092a864886f70d01010105000382010f00"
+identifierHex = IDENTIFIER_HEX
 
 
 class AuthStanza(XMPPElement):
@@ -22,6 +23,7 @@ class AuthStanza(XMPPElement):
     rsa_private_key: bytes = None
     encrypted_rsa_public_key: bytes = None
     decrypted_rsa_public_key: bytes = None
+    signature: str = None
     cert_revalidate_time: int = None
     cert_url: str = None
 
@@ -29,9 +31,19 @@ class AuthStanza(XMPPElement):
         super().__init__()
         self.client = client
 
+    def prefetch_keys(self) -> None:
+        """
+        Starts generating a key pair in the background, unless the account already has a stored one
+        """
+        store = self.client.auth_cert_key_store
+        if not (store and store.load(self.client.username)):
+            self._key_pool().prefetch()
+
+    @run_in_new_thread
     def send_stanza(self) -> None:
         """
-        Send the outgoing auth stanza
+        Send the outgoing auth stanza.
+        Runs in a new thread, as the keys may still have to be generated.
         """
         stanza = self.serialize()
         log.info("Sending authentication certificate")
@@ -66,11 +78,19 @@ class AuthStanza(XMPPElement):
 
     def generate_keys(self) -> None:
         """
-        Generate new 2048 bits RSA keys, could take from about a second to six
+        Gets 2048 bits RSA keys: the ones stored for the account if there are any,
+        otherwise a pair pre-generated by the client's key pool, which is then stored
         """
-        (pubkey, privkey) = rsa.newkeys(2048)
-        self.rsa_public_key = bytes.fromhex(identifierHex) + pubkey.save_pkcs1("DER")
-        self.rsa_private_key = bytes.fromhex(identifierHex) + privkey.save_pkcs1("DER")
+        store = self.client.auth_cert_key_store
+        key_pair = store.load(self.client.username) if store else None
+        if key_pair is None:
+            key_pair = self._key_pool().get_key_pair()
+            if store:
+                store.save(self.client.username, key_pair)
+        self.rsa_public_key, self.rsa_private_key = key_pair
+
+    def _key_pool(self) -> AuthCertKeyPool:
+        return self.client.auth_cert_key_pool or get_key_pool()
 
     def get_key_phrase(self) -> bytes:
         """
@@ -99,9 +119,9 @@ class AuthStanza(XMPPElement):
             key = self.get_des_key(self.get_des_secret())
             self.get_parity_bit(key, 0)
         if not self.decrypted_rsa_public_key:
-            des = pyDes.des(self.des_secret_key, mode=pyDes.ECB, padmode=pyDes.PAD_PKCS5)
-            self.encrypted_rsa_public_key = des.encrypt(self.rsa_public_key)
-            self.decrypted_rsa_public_key = des.decrypt(self.encrypted_rsa_public_key)
+            self.encrypted_rsa_public_key = des_ecb_encrypt(self.des_secret_key, self.rsa_public_key)
+            # decrypting with the same key and padding gives back the public key, so skip the actual decryption
+            self.decrypted_rsa_public_key = self.rsa_public_key
         return self.decrypted_rsa_public_key
 
     def get_public_key_base64(self) -> str:
@@ -147,11 +167,13 @@ class AuthStanza(XMPPElement):
         """
         Base64 of the encrypted and decrypted public key with our username passkey
         """
-        msg = self.get_public_key_bytes()
-        key = self.get_key_phrase()
-        digest = hashlib.sha1
-        signature = hmac.new(key, msg, digest).digest()
-        return base64.urlsafe_b64encode(signature).decode()
+        if not self.signature:
+            msg = self.get_public_key_bytes()
+            key = self.get_key_phrase()
+            digest = hashlib.sha1
+            signature = hmac.new(key, msg, digest).digest()
+            self.signature = base64.urlsafe_b64encode(signature).decode()
+        return self.signature
 
     def handle(self, data: bs4.BeautifulSoup):
         """
@@ -175,13 +197,16 @@ class AuthStanza(XMPPElement):
 
     def teardown(self):
         """
-        Removes all the generated data to build a new Key
+        Removes all the generated data (and the stored keys) to build a new Key
         """
+        if self.client.auth_cert_key_store:
+            self.client.auth_cert_key_store.delete(self.client.username)
         self.des_key_bytes = None
         self.des_secret_key = None
         self.rsa_public_key = None
         self.rsa_private_key = None
         self.encrypted_rsa_public_key = None
         self.decrypted_rsa_public_key = None
+        self.signature = None
         self.cert_url = None
         self.cert_revalidate_time = None
@@ -1,6 +1,10 @@
+from __future__ import annotations
+
 import base64
 import binascii
+import copy
 import uuid
+from functools import cached_property
 from typing import Union, final
 
 from bs4 import BeautifulSoup
@@ -10,7 +14,7 @@ from lxml.etree import Element
 from kik_unofficial.utilities import jid_utilities
 from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
 from kik_unofficial.utilities.kik_server_clock import KikServerClock
-from kik_unofficial.utilities.parsing_utilities import get_optional_attribute, get_text_of_tag
+from kik_unofficial.utilities.parsing_utilities import get_optional_attribute, get_text_of_tag, is_kik_platform_url
 
 
 class XMPPElement:
@@ -299,20 +303,41 @@ class XMPPResponse:
     This is an incoming stanza from Kik.
 
     When a message stanza is encountered, this will parse the basic attributes of the message.
+
+    Responses use __slots__ (subclasses that don't declare their own get a __dict__ as usual), and the whole
+    stanza is kept as raw_element. Set XMPPResponse.retain_raw_element to False to let the parsed trees be freed
+    once they're parsed, raw_element is then None, and the elements a response keeps (such as the <content> of
+    content messages) are detached copies. Responses that need the tree later keep it regardless.
     """
 
+    __slots__ = (
+        "message_id",
+        "raw_element",
+        "type",
+        "from_jid",
+        "xmlns",
+        "to_jid",
+        "group_jid",
+        "is_group",
+        "metadata",
+        "request_delivered_receipt",
+        "request_read_receipt",
+    )
+
+    retain_raw_element = True
+
     def __init__(self, data: BeautifulSoup):
         self.message_id = data["id"]
-        self.raw_element = data
+        self.raw_element = data if self.retain_raw_element else None
 
         if data.name in ("message", "msg"):
             self.type = data["type"]
-            self.from_jid = data["from"]
+            self.from_jid = jid_utilities.intern_jid(data["from"])
             self.xmlns = get_optional_attribute(data, "xmlns")
-            self.to_jid = get_optional_attribute(data, "to")
+            self.to_jid = jid_utilities.intern_jid(get_optional_attribute(data, "to"))
 
             g = data.find("g", recursive=False)
-            self.group_jid = g["jid"] if g and "jid" in g.attrs and jid_utilities.is_group_jid(g["jid"]) else None
+            self.group_jid = jid_utilities.intern_jid(g["jid"]) if g and "jid" in g.attrs and jid_utilities.is_group_jid(g["jid"]) else None
             self.is_group = self.group_jid is not None
 
             kik = data.find("kik", recursive=False)
@@ -326,8 +351,19 @@ class XMPPResponse:
                 self.request_delivered_receipt = False
                 self.request_read_receipt = False
 
+    def _keep_element(self, element: Union[BeautifulSoup, None]) -> Union[BeautifulSoup, None]:
+        """
+        Returns an element of the stanza for the response to keep: the element itself if the tree is retained anyway,
+        otherwise a copy detached from the tree, whose parents would keep the whole tree alive.
+        """
+        if element is None or self.retain_raw_element:
+            return element
+        return copy.copy(element)
+
 
 class XMPPResponseMetadata:
+    __slots__ = ("timestamp", "qos", "push", "app", "hop")
+
     def __init__(self, kik: BeautifulSoup):
         """
         The timestamp of the message, in unix millis.
@@ -366,34 +402,46 @@ class XMPPResponseMetadata:
 class XMPPContentResponse(XMPPResponse):
     """
     This is an incoming content message from another user.
+
+    strings, images, extras, hashes and uris are parsed from the stanza when they're first accessed,
+    so callbacks that don't look at them don't pay for decoding the image previews.
     """
 
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
-        self.content = data.find("content", recursive=False)
+        self.content = self._keep_element(data.find("content", recursive=False))
         self.content_id = self.content["id"]  # type: str
         self.app_id = self.content["app-id"]  # type: str
         self.content_version = self.content["v"]  # type: str
         self.server_sig = get_optional_attribute(self.content, "server-sig")  # type: str | None
 
-        self.strings = {}  # type: dict[str, str]
-        self.images = {}  # type: dict[str, bytes]
-        self.extras = {}  # type: dict[str, str]
-        self.hashes = {}  # type: dict[str, str]
-        self.uris = []  # type: list[XMPPContentResponse.ContentUri]
+        strings_element = self._find_content_element("strings")
+        self.file_url = get_text_of_tag(strings_element, "file-url") if strings_element else None
+        if self.file_url is not None:
+            if not is_kik_platform_url(self.file_url):
+                raise ValueError(f"invalid file-url (expected https://platform.kik.com, received {self.file_url})")
 
+    def _find_content_element(self, name: str) -> Union[BeautifulSoup, None]:
         if self.content_version != "2":
             # content version must be 2.
             # Version 2 has been required since ~2012.
-            return
+            return None
+        return self.content.find(name, recursive=False)
 
-        strings_element = self.content.find("strings", recursive=False)
+    @cached_property
+    def strings(self) -> dict[str, str]:
+        strings = {}
+        strings_element = self._find_content_element("strings")
         if strings_element:
             for string in strings_element.find_all(recursive=False):
                 if string.text:
-                    self.strings[string.name] = string.text
+                    strings[string.name] = string.text
+        return strings
 
-        images_element = self.content.find("images", recursive=False)
+    @cached_property
+    def images(self) -> dict[str, bytes]:
+        images = {}
+        images_element = self._find_content_element("images")
         if images_element:
             for image in images_element.find_all(recursive=False):
                 image_name = image.name
@@ -401,36 +449,45 @@ class XMPPContentResponse(XMPPResponse):
                     image_text = image.text
                     if len(image_text) > 0:
                         try:
-                            self.images[image_name] = base64.urlsafe_b64decode(image_text)
+                            images[image_name] = base64.urlsafe_b64decode(image_text)
                         except binascii.Error:
                             # Guard against invalid base-64 image data (server doesn't validate this data for us)
                             pass
+        return images
 
-        extras_element = self.content.find("extras", recursive=False)
+    @cached_property
+    def extras(self) -> dict[str, str]:
+        extras = {}
+        extras_element = self._find_content_element("extras")
         if extras_element:
             for extra in extras_element.find_all(recursive=False):
                 extra_key = get_text_of_tag(extra, "key", default="")
                 extra_val = get_text_of_tag(extra, "val", default="")
                 if extra_key and extra_val:
-                    self.extras[extra_key] = extra_val
+                    extras[extra_key] = extra_val
+        return extras
 
-        hashes_element = self.content.find("hashes", recursive=False)
+    @cached_property
+    def hashes(self) -> dict[str, str]:
+        hashes = {}
+        hashes_element = self._find_content_element("hashes")
         if hashes_element:
             for hash_element in hashes_element.find_all(recursive=False):
                 if hash_element.text:
                     hash_name = hash_element.name
                     if hash_name == "sha1-original" or hash_name == "sha1-scaled" or hash_name == "blockhash-scaled":
-                        self.hashes[hash_name] = hash_element.text
-
-        uris = self.content.find("uris", recursive=False)
-        for uri in uris.find_all("uri", recursive=False, limit=50):
-            if uri.text:
-                self.uris.append(self.ContentUri(uri))
-
-        self.file_url = get_text_of_tag(strings_element, "file-url")
-        if self.file_url is not None:
-            if not self.file_url.startswith("https://platform.kik.com"):
-                raise ValueError(f"invalid file-url (expected https://platform.kik.com, received {self.file_url})")
+                        hashes[hash_name] = hash_element.text
+        return hashes
+
+    @cached_property
+    def uris(self) -> list[XMPPContentResponse.ContentUri]:
+        uris = []
+        uris_element = self._find_content_element("uris")
+        if uris_element:
+            for uri in uris_element.find_all("uri", recursive=False, limit=50):
+                if uri.text:
+                    uris.append(self.ContentUri(uri))
+        return uris
 
     class ContentUri:
         """
@@ -441,6 +498,8 @@ class XMPPContentResponse(XMPPResponse):
         For other content types, the link is opened in the browser when the content is tapped.
         """
 
+        __slots__ = ("platform", "type", "file_content_type", "priority", "url")
+
         def __init__(self, uri: BeautifulSoup):
             self.platform = get_optional_attribute(uri, "platform")
             self.type = get_optional_attribute(uri, "type")
@@ -454,6 +513,8 @@ class XMPPReceiptResponse(XMPPResponse):
     An incoming receipt received from another user.
     """
 
+    __slots__ = ("receipt_type", "receipt_ids", "receipt_message_id")
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         receipt = data.find("receipt", recursive=False)
@@ -5,6 +5,7 @@ Defines classes for dealing with generic chatting (text messaging, read receipts
 from __future__ import annotations
 
 import time
+from functools import cached_property
 from typing import Union
 
 from bs4 import BeautifulSoup
@@ -14,7 +15,8 @@ from lxml.etree import Element
 from kik_unofficial.datatypes.peers import Group
 from kik_unofficial.datatypes.xmpp.base_elements import XMPPResponse, XMPPContentResponse, XMPPReceiptResponse, XMPPOutgoingContentMessageElement
 from kik_unofficial.datatypes.xmpp import base_elements
-from kik_unofficial.http_requests.tenor_client import KikTenorClient
+from kik_unofficial.http_requests.tenor_client import get_tenor_client
+from kik_unofficial.utilities import jid_utilities
 from kik_unofficial.utilities.parsing_utilities import ParsingUtilities, get_text_of_tag, get_optional_attribute
 
 
@@ -40,10 +42,14 @@ class OutgoingChatImage(XMPPOutgoingContentMessageElement):
     Represents an outgoing image chat message to another kik entity (member or group)
     """
 
-    def __init__(self, peer_jid: str, file_location, forward: bool = True):
+    def __init__(self, peer_jid: str, file_location, forward: bool = True, parsed: dict = None):
+        """
+        :param parsed: the ParsingUtilities.parse_image() result of the file if it was already prepared
+                       (see kik_unofficial.utilities.image_preparation), in which case file_location is ignored
+        """
         super().__init__(peer_jid, app_id="com.kik.ext.gallery")
         self.allow_forward = forward
-        self.parsed = ParsingUtilities.parse_image(file_location)
+        self.parsed = parsed if parsed is not None else ParsingUtilities.parse_image(file_location)
 
     def serialize_content(self) -> None:
         self.add_string("app-name", "Gallery")
@@ -64,6 +70,8 @@ class IncomingChatMessage(XMPPResponse):
     Represents an incoming text chat message from another user
     """
 
+    __slots__ = ("preview", "body")
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         self.preview = get_text_of_tag(data, "preview")
@@ -75,6 +83,8 @@ class IncomingGroupChatMessage(IncomingChatMessage):
     Represents an incoming text chat message from a group
     """
 
+    __slots__ = ("alias_sender",)
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         # Messages from public groups include an alias user which can be resolved with client.xiphias_get_users_by_alias
@@ -149,21 +159,29 @@ class OutgoingLinkShareEvent(XMPPOutgoingContentMessageElement):
 
 
 class IncomingMessageReadEvent(XMPPReceiptResponse):
+    __slots__ = ()
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
 
 
 class IncomingMessageDeliveredEvent(XMPPReceiptResponse):
+    __slots__ = ()
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
 
 
 class IncomingGroupReceiptsEvent(XMPPReceiptResponse):
+    __slots__ = ()
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
 
 
 class IncomingIsTypingEvent(XMPPResponse):
+    __slots__ = ("is_typing",)
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         is_typing = data.find("is-typing", recursive=False)
@@ -171,22 +189,28 @@ class IncomingIsTypingEvent(XMPPResponse):
 
 
 class IncomingGroupIsTypingEvent(IncomingIsTypingEvent):
+    __slots__ = ()
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
 
 
 class IncomingStatusResponse(XMPPResponse):
+    __slots__ = ("status", "status_jid", "special_visibility", "group")
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         status = data.find("status", recursive=False)
         self.status = status.text
-        self.status_jid = status["jid"]
+        self.status_jid = jid_utilities.intern_jid(status["jid"])
         self.special_visibility = get_optional_attribute(status, "special-visibility") == "true"
         group = data.find("g", recursive=False)
         self.group = Group(group) if group and len(group.contents) > 0 else None
 
 
 class IncomingGroupStatus(IncomingStatusResponse):
+    __slots__ = ()
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
 
@@ -194,6 +218,8 @@ class IncomingGroupStatus(IncomingStatusResponse):
 class IncomingGroupSysmsg(XMPPResponse):
     """xmlns=jabber:client type=groupchat"""
 
+    __slots__ = ("sysmsg_xmlns", "sysmsg", "group")
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         sysmsg = data.find("sysmsg", recursive=False)
@@ -204,6 +230,8 @@ class IncomingGroupSysmsg(XMPPResponse):
 
 
 class IncomingFriendAttribution(XMPPResponse):
+    __slots__ = ("context_type", "referrer_jid", "referrer_group_jid", "referrer_url", "referrer_name", "reply", "body")
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         self.context_type = None
@@ -242,7 +270,10 @@ class IncomingGroupSticker(XMPPContentResponse):
         self.sticker_url = self.extras.get("sticker_url")  # type: str | None
         self.sticker_id = self.extras.get("sticker_id")  # type: str | None
         self.sticker_source = self.extras.get("sticker_source")  # type: str | None
-        self.png_preview = self.images.get("png-preview")  # type: bytes | None
+
+    @cached_property
+    def png_preview(self) -> bytes | None:
+        return self.images.get("png-preview")
 
 
 class IncomingGifMessage(XMPPContentResponse):
@@ -261,10 +292,14 @@ class OutgoingGIFMessage(XMPPOutgoingContentMessageElement):
     Represents an outgoing GIF message to another kik entity (member or group)
     """
 
-    def __init__(self, peer_jid: str, search_term: str, api_key: str):
+    def __init__(self, peer_jid: str, search_term: str, api_key: str, gif: tuple[bytes, dict] = None):
+        """
+        :param gif: the KikTenorClient.search_for_gif() result of the search term if it was already looked up,
+                    otherwise it's looked up with the shared tenor client of the API key
+        """
         super().__init__(peer_jid, app_id="com.kik.ext.gif")
         self.allow_forward = True
-        self.gif_preview, self.gif_data = KikTenorClient(api_key).search_for_gif(search_term)
+        self.gif_preview, self.gif_data = gif if gif is not None else get_tenor_client(api_key).search_for_gif(search_term)
 
     def serialize_content(self) -> None:
         self.add_string("app-name", "GIF")
@@ -304,8 +339,14 @@ class IncomingCardMessage(XMPPContentResponse):
         self.title = self.strings.get("title")  # type: str | None
         self.text = self.strings.get("text")  # type: str | None
         self.allow_forward = self.strings.get("allow-forward") == "true"  # type: bool
-        self.icon = self.images.get("icon")  # type: bytes | None
-        self.uri = self.uris[0] if len(self.uris) > 0 else None
+
+    @cached_property
+    def icon(self) -> bytes | None:
+        return self.images.get("icon")
+
+    @cached_property
+    def uri(self) -> XMPPContentResponse.ContentUri | None:
+        return self.uris[0] if len(self.uris) > 0 else None
 
 
 class KikPingRequest(base_elements.XMPPElement):
@@ -343,7 +384,9 @@ class IncomingErrorMessage(XMPPResponse):
     This can be used for retry logic when sending messages or debugging.
     """
 
+    __slots__ = ("error", "error_message")
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
-        self.error = data.error
+        self.error = self._keep_element(data.error)
         self.error_message = get_text_of_tag(self.error, "text")
@@ -10,7 +10,7 @@ CAPTCHA_CALLBACK_PARAMETER = "&callback_url=https://kik.com/captcha-url"
 class KikIqError(XMPPResponse):
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
-        self.error = data.find("error", recursive=False)
+        self.error = self._keep_element(data.find("error", recursive=False))
         self.error_code = int(self.error["code"])
         self.error_type = self.error["type"]
         self.errors = [e.name for e in self.error.find_all(recursive=False)]
@@ -1,14 +1,14 @@
 import base64
-import binascii
-import hashlib
-import hmac
 import uuid
+from functools import lru_cache
 
 import rsa
 from bs4 import BeautifulSoup
 from kik_unofficial.datatypes.xmpp.base_elements import XMPPElement
 from kik_unofficial.device_configuration import kik_version_info
+from kik_unofficial.utilities.crypto_backend import RsaSigner
 from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
+from kik_unofficial.utilities.device_profile import get_device_profile
 from kik_unofficial.utilities.parsing_utilities import is_tag_present
 
 kik_version = kik_version_info["kik_version"]
@@ -21,7 +21,19 @@ private_key_pem = (
     "/uGkFoe0CIQC6uYgHPqVhcm5IHqHM6/erQ7jpkLmzcCnWXgT87ABF2QIhAIzrfyKXp1ZfBY9R0H4pbboHI4uatySKc"
     "Q5XHlAMo9qhAiEA43zuIMknJSGwa2zLt/3FmVnuCInD6Oun5dbcYnqraJo=\n-----END RSA PRIVATE KEY----- "
 )
-private_key = rsa.PrivateKey.load_pkcs1(private_key_pem.encode("utf-8"), format="PEM")
+
+
+@lru_cache(maxsize=None)
+def get_handshake_signer() -> RsaSigner:
+    # the key is parsed on first use rather than when the module is imported
+    return RsaSigner(private_key_pem.encode("utf-8"))
+
+
+def __getattr__(name):
+    # `private_key` used to be parsed at import time, keep it available for existing imports
+    if name == "private_key":
+        return rsa.PrivateKey.load_pkcs1(private_key_pem.encode("utf-8"), format="PEM")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class LoginRequest(XMPPElement):
@@ -99,12 +111,11 @@ class MakeAnonymousStreamInitTag(XMPPElement):
         timestamp = str(CryptographicUtils.make_kik_timestamp())
         sid = str(uuid.uuid4())
 
-        signature = rsa.sign(f"{can + device}:{kik_version}:{timestamp}:{sid}".encode(), private_key, "SHA-256")
+        signature = get_handshake_signer().sign(f"{can + device}:{kik_version}:{timestamp}:{sid}".encode())
         signature = base64.b64encode(signature, "-_".encode()).decode().rstrip("=")
 
         hmac_data = f"{timestamp}:{can}{device}"
-        hmac_secret_key = CryptographicUtils.build_hmac_key()
-        cv = binascii.hexlify(hmac.new(hmac_secret_key, hmac_data.encode(), hashlib.sha1).digest()).decode()
+        cv = get_device_profile().make_cv(hmac_data)
 
         the_map = {
             "signed": signature,
@@ -159,11 +170,10 @@ class EstablishAuthenticatedSessionRequest(XMPPElement):
 
         # some super secret cryptographic stuff
 
-        signature = rsa.sign(f"{jid}:{kik_version}:{timestamp}:{sid}".encode(), private_key, "SHA-256")
+        signature = get_handshake_signer().sign(f"{jid}:{kik_version}:{timestamp}:{sid}".encode())
         signature = base64.b64encode(signature, "-_".encode()).decode().rstrip("=")
         hmac_data = f"{timestamp}:{jid}"
-        hmac_secret_key = CryptographicUtils.build_hmac_key()
-        cv = binascii.hexlify(hmac.new(hmac_secret_key, hmac_data.encode(), hashlib.sha1).digest()).decode()
+        cv = get_device_profile().make_cv(hmac_data)
 
         password_key = CryptographicUtils.key_from_password(self.username, self.password)
 
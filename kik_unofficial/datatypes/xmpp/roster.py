@@ -9,8 +9,8 @@ from lxml.etree import Element
 
 from kik_unofficial.datatypes.peers import Group, User, Peer, RosterUser
 from kik_unofficial.datatypes.xmpp.base_elements import XMPPElement, XMPPResponse
-from kik_unofficial.device_configuration import kik_version_info
 from kik_unofficial.utilities import jid_utilities
+from kik_unofficial.utilities.device_profile import get_device_profile
 from kik_unofficial.utilities.parsing_utilities import get_optional_attribute
 
 
@@ -51,9 +51,8 @@ class FetchRosterRequest(XMPPElement):
 
     @staticmethod
     def _needs_v9_protocol():
-        version_number = int(kik_version_info["kik_version"].replace(".", ""))
         # 15.56.0.28947 is the first version where the protocol was changed to 9 (mts)
-        return version_number >= 15_56_0_28947
+        return get_device_profile().needs_v9_roster_protocol
 
 
 class FetchRosterResponse(XMPPResponse):
@@ -61,6 +60,8 @@ class FetchRosterResponse(XMPPResponse):
     Represents the response to a 'get roster' request which contains the peers list
     """
 
+    retain_raw_element = True  # RosterStore stores the roster entries as they were received
+
     def __init__(self, data: BeautifulSoup):
         super().__init__(data)
         self.peers: list[Peer] = []
@@ -1,5 +1,6 @@
 import base64
 from builtins import NotImplementedError
+from functools import cached_property
 from typing import List, TypeVar, final
 
 from bs4 import BeautifulSoup
@@ -70,20 +71,13 @@ class UsersResponseUser:
     Alias jids provided in public groups (used with client.xiphias_get_users_by_alias):
         Includes all the private profile data (username, display_name, etc) of a user
         if you're chatting with them, else it'll get the local jid and the creation date.
+
+    The JIDs and the username are read right away, the other profile fields when they're first accessed.
     """
 
     username = None
     jid = None
     alias_jid = None
-    display_name = None
-    creation_date_seconds = None
-    creation_date_nanos = None
-    bio = None
-    background_pic_full_sized = None
-    background_pic_thumbnail = None
-    background_pic_updated_seconds = None
-    interests = None
-    kin_user_id = None
 
     def __init__(self, user):
         if hasattr(user, "private_profile"):
@@ -100,23 +94,53 @@ class UsersResponseUser:
         if hasattr(user, "public_group_member_profile"):
             # The attrs below are found in the member's profile
             user = user.public_group_member_profile
-
-        if user.registration_element:
-            self.creation_date_seconds = user.registration_element.creation_date.seconds
-            self.creation_date_nanos = user.registration_element.creation_date.nanos
-        if hasattr(user, "display_name"):
-            self.display_name = user.display_name.display_name
-        if hasattr(user, "bio_element"):
-            self.bio = user.bio_element.bio
-        if hasattr(user, "background_profile_pic_extension"):
-            pic = user.background_profile_pic_extension.extension_detail.pic
-            self.background_pic_full_sized = pic.full_sized_url
-            self.background_pic_thumbnail = pic.thumbnail_url
-            self.background_pic_updated_seconds = pic.last_updated_timestamp.seconds
-        if hasattr(user, "interests_element"):
-            self.interests = [element.localized_verbiage for element in user.interests_element.interests_element]
-        if hasattr(user, "kin_user_id_element"):
-            self.kin_user_id = user.kin_user_id_element.kin_user_id.id
+        self._profile = user
+
+    @cached_property
+    def creation_date_seconds(self):
+        return self._profile.registration_element.creation_date.seconds if self._profile.registration_element else None
+
+    @cached_property
+    def creation_date_nanos(self):
+        return self._profile.registration_element.creation_date.nanos if self._profile.registration_element else None
+
+    @cached_property
+    def display_name(self):
+        return self._profile.display_name.display_name if hasattr(self._profile, "display_name") else None
+
+    @cached_property
+    def bio(self):
+        return self._profile.bio_element.bio if hasattr(self._profile, "bio_element") else None
+
+    @cached_property
+    def background_pic_full_sized(self):
+        pic = self._background_pic()
+        return pic.full_sized_url if pic is not None else None
+
+    @cached_property
+    def background_pic_thumbnail(self):
+        pic = self._background_pic()
+        return pic.thumbnail_url if pic is not None else None
+
+    @cached_property
+    def background_pic_updated_seconds(self):
+        pic = self._background_pic()
+        return pic.last_updated_timestamp.seconds if pic is not None else None
+
+    @cached_property
+    def interests(self):
+        if not hasattr(self._profile, "interests_element"):
+            return None
+        return [element.localized_verbiage for element in self._profile.interests_element.interests_element]
+
+    @cached_property
+    def kin_user_id(self):
+        return self._profile.kin_user_id_element.kin_user_id.id if hasattr(self._profile, "kin_user_id_element") else None
+
+    def _background_pic(self):
+        if not hasattr(self._profile, "background_profile_pic_extension"):
+            return None
+        return self._profile.background_profile_pic_extension.extension_detail.pic
 
 
 class UsersResponse(XiphiasResponse):
@@ -1,10 +1,13 @@
 import hashlib
 import logging
-import requests
-from threading import Thread
+import mmap
+import os
+import pathlib
+from concurrent.futures import Future
+from typing import Union
 
-from kik_unofficial.datatypes.exceptions import KikUploadError
 from kik_unofficial.datatypes.xmpp.chatting import OutgoingChatImage
+from kik_unofficial.http_requests.upload_service import UploadService, get_upload_service
 from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
 from kik_unofficial.device_configuration import kik_version_info
 
@@ -12,13 +15,21 @@ from kik_unofficial.device_configuration import kik_version_info
 log = logging.getLogger("kik_unofficial")
 SALT = "YA=57aSA!ztajE5"
 
+# content larger than this is uploaded in several chunks
+CHUNK_SIZE = 1024 * 1024
 
-def upload_gallery_image(outgoing_chat_image: OutgoingChatImage, jid, username, password):
+
+def upload_gallery_image(outgoing_chat_image: OutgoingChatImage, jid, username, password, upload_service: UploadService = None) -> Future:
+    """
+    Uploads the image in the upload service (the shared one by default).
+
+    :return: a future that resolves once the upload succeeded, or fails with a KikUploadError
+    """
     url = f"https://platform.kik.com/content/files/{outgoing_chat_image.content_id}"
-    send(url, outgoing_chat_image, jid, username, password)
+    return send(url, outgoing_chat_image, jid, username, password, upload_service)
 
 
-def send(url, image, jid, username, password):
+def send(url, image, jid, username, password, upload_service: UploadService = None) -> Future:
     username_passkey = CryptographicUtils.key_from_password(username, password)
     app_id = "com.kik.ext.gallery"
     v = SALT + image.content_id + app_id
@@ -27,29 +38,96 @@ def send(url, image, jid, username, password):
     headers = {
         "Host": "platform.kik.com",
         "Connection": "Keep-Alive",
-        "Content-Length": str(image.parsed["size"]),
         "User-Agent": f'Kik/{kik_version_info["kik_version"]} (Android 7.1.2) Content',
         "x-kik-jid": jid,
         "x-kik-password": username_passkey,
         "x-kik-verification": verification,
         "x-kik-app-id": app_id,
-        "x-kik-content-chunks": "1",
         "x-kik-content-size": str(image.parsed["size"]),
         "x-kik-content-md5": image.parsed["MD5"],
-        "x-kik-chunk-number": "0",
-        "x-kik-chunk-md5": image.parsed["MD5"],
         "x-kik-sha1-original": image.parsed["SHA1"].upper(),
         "x-kik-sha1-scaled": image.parsed["SHA1Scaled"].upper(),
         "x-kik-blockhash-scaled": image.parsed["blockhash"].upper(),
         "Content-Type": "image/jpeg",
         "x-kik-content-extension": ".jpg",
     }
-    # Sometimes Kik's servers throw 5xx when they're having issues, the new thread won't handle the exception
-    Thread(target=content_upload_thread, args=(url, image.parsed["original"], headers), name="KikContent").start()
+    return (upload_service or get_upload_service()).submit(content_upload, url, image.parsed["original"], headers)
 
 
-def content_upload_thread(url, image, headers):
+def content_upload(upload_service: UploadService, url, image, headers):
     log.debug("Uploading Image")
-    r = requests.put(url, data=image, headers=headers)
-    if r.status_code != 200:
-        raise KikUploadError(r.status_code, r.reason)
+    with ContentSource(image) as source:
+        upload_content(upload_service, url, source, headers)
+
+
+class ContentSource:
+    """
+    The bytes of an upload, read one chunk at a time from memory or from a memory-mapped file,
+    so uploading a file never needs a copy of all of it in memory.
+
+    :param data: the bytes to upload, or the path of the file to upload
+    """
+
+    def __init__(self, data: Union[bytes, str, pathlib.Path]):
+        self._file = None
+        self._mmap = None
+        if isinstance(data, (str, pathlib.Path)):
+            self._file = open(data, "rb")
+            self.size = os.fstat(self._file.fileno()).st_size
+            self._buffer = memoryview(mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b"")
+        else:
+            self.size = len(data)
+            self._buffer = memoryview(data)
+
+    def chunk_count(self, chunk_size: int) -> int:
+        return max(1, -(-self.size // chunk_size))
+
+    def chunk(self, chunk_number: int, chunk_size: int) -> bytes:
+        return bytes(self._view(chunk_number, chunk_size))
+
+    def md5(self, chunk_size: int = CHUNK_SIZE) -> str:
+        md5 = hashlib.md5()
+        for chunk_number in range(self.chunk_count(chunk_size)):
+            md5.update(self._view(chunk_number, chunk_size))
+        return md5.hexdigest()
+
+    def _view(self, chunk_number: int, chunk_size: int) -> memoryview:
+        start = chunk_number * chunk_size
+        return self._buffer[start : start + chunk_size]  # noqa: E203
+
+    def close(self):
+        mapping = self._buffer.obj
+        self._buffer.release()
+        if isinstance(mapping, mmap.mmap):
+            mapping.close()
+        if self._file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def upload_content(upload_service: UploadService, url: str, source: ContentSource, headers: dict, chunk_size: int = CHUNK_SIZE):
+    """
+    PUTs the content in chunks of chunk_size bytes, numbered with the x-kik-chunk-number header and checked
+    with x-kik-chunk-md5. A chunk that fails with a 5xx or a connection error is retried by the upload service,
+    resuming the upload from that chunk rather than from the start.
+
+    :param headers: the headers of every chunk, x-kik-content-md5 is computed if missing
+    :raises KikUploadError: if a chunk was rejected, or still failed after all retries
+    """
+    headers = dict(headers)
+    headers.setdefault("x-kik-content-md5", source.md5(chunk_size))
+    chunk_count = source.chunk_count(chunk_size)
+    headers["x-kik-content-chunks"] = str(chunk_count)
+
+    for chunk_number in range(chunk_count):
+        chunk = source.chunk(chunk_number, chunk_size)
+        chunk_headers = dict(headers)
+        chunk_headers["Content-Length"] = str(len(chunk))
+        chunk_headers["x-kik-chunk-number"] = str(chunk_number)
+        chunk_headers["x-kik-chunk-md5"] = hashlib.md5(chunk).hexdigest()
+        upload_service.request("PUT", url, chunk, chunk_headers, description=f"Uploading chunk {chunk_number + 1}/{chunk_count}")
@@ -0,0 +1,213 @@
+"""
+Downloads the files of incoming content messages (images and videos) to a size-bounded disk cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from kik_unofficial.datatypes.exceptions import KikApiException
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPContentResponse
+from kik_unofficial.device_configuration import kik_version_info
+from kik_unofficial.utilities.parsing_utilities import is_kik_platform_url
+
+log = logging.getLogger("kik_unofficial")
+
+
+class MediaFetcher:
+    """
+    Streams content files to disk with a bounded number of parallel downloads.
+
+    Files are cached by content ID, least recently used first out once the cache exceeds max_bytes, and survive
+    restarts when a directory is given. Concurrent fetches of the same content share one download.
+    Only files on kik's content platform are fetched.
+
+    :param directory: where files are kept, in its "kik-media" subdirectory, which the fetcher manages on its own.
+                      Defaults to a new temporary directory, removed with its files on shutdown()
+    :param max_bytes: the disk budget of the cache, a larger file fails to download
+    :param max_concurrent_downloads: the number of downloads running at once, the others wait in line
+    :param chunk_size: the bytes read from the network and written to disk at a time
+    :param prefetch_chats: JIDs of users and groups whose images and videos are downloaded as soon as they're received.
+                           Use prefetch_all to prefetch from every chat.
+    :param prefetch_all: prefetch the media of every chat
+    """
+
+    def __init__(
+        self,
+        directory: str = None,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_concurrent_downloads: int = 4,
+        chunk_size: int = 64 * 1024,
+        prefetch_chats: Iterable[str] = (),
+        prefetch_all: bool = False,
+    ):
+        self._owns_directory = not directory
+        self.directory = tempfile.mkdtemp(prefix="kik-media-") if self._owns_directory else os.path.join(directory, "kik-media")
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.prefetch_chats = set(prefetch_chats)
+        self.prefetch_all = prefetch_all
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_concurrent_downloads)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = f'Kik/{kik_version_info["kik_version"]} (Android 7.1.2) Content'
+        self._executor = ThreadPoolExecutor(max_concurrent_downloads, thread_name_prefix="KikMediaFetch")
+        self._files = OrderedDict()  # type: OrderedDict[str, int]  # content ID -> size, least recently used first
+        self._content_ids_by_sha1 = {}  # type: dict[str, str]
+        self._in_flight = {}  # type: dict[str, Future]
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def fetch(self, message: XMPPContentResponse) -> Future:
+        """
+        Downloads the file of a content message, unless it's cached or already being downloaded.
+
+        :return: a future of the path of the downloaded file, failing with a requests exception if the download failed,
+                 or with a KikApiException if the file is larger than max_bytes
+        """
+        if not message.file_url:
+            raise KikApiException(f"Content message {message.content_id} has no file to fetch")
+        return self.fetch_url(message.file_url, message.content_id, message.hashes.get("sha1-original"))
+
+    def fetch_url(self, url: str, content_id: str, sha1: str = None) -> Future:
+        """
+        Like fetch(), with the file's URL and content ID given directly.
+
+        :param sha1: the expected SHA-1 of the file, if known. A file cached under another content ID with
+                     the same SHA-1 is returned instead of downloading it again.
+        :raises KikApiException: if the URL isn't on kik's content platform
+        """
+        if not is_kik_platform_url(url):
+            raise KikApiException(f"Not fetching {url}, it isn't on kik's content platform")
+        with self._lock:
+            path = self._cached_path(content_id, sha1)
+            if path:
+                future = Future()
+                future.set_result(path)
+                return future
+            future = self._in_flight.get(content_id)
+            if future is None:
+                future = self._in_flight[content_id] = self._executor.submit(self._download, url, content_id, sha1)
+            return future
+
+    def get_cached_path(self, content_id: str = None, sha1: str = None) -> Union[str, None]:
+        with self._lock:
+            return self._cached_path(content_id, sha1)
+
+    def should_prefetch(self, message: XMPPContentResponse) -> bool:
+        if not message.file_url:
+            return False
+        return self.prefetch_all or message.from_jid in self.prefetch_chats or message.group_jid in self.prefetch_chats
+
+    def maybe_prefetch(self, message: XMPPContentResponse) -> Union[Future, None]:
+        """
+        Starts fetching the message's file if it's from a chat configured for prefetching.
+        """
+        return self.fetch(message) if self.should_prefetch(message) else None
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        self.session.close()
+        if self._owns_directory:
+            with self._lock:
+                self._files.clear()
+                self._content_ids_by_sha1.clear()
+                self._size = 0
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _cached_path(self, content_id: Union[str, None], sha1: Union[str, None]) -> Union[str, None]:
+        if content_id not in self._files and sha1:
+            content_id = self._content_ids_by_sha1.get(sha1.lower())
+        if content_id not in self._files:
+            return None
+        self._files.move_to_end(content_id)
+        path = self._path(content_id)
+        try:
+            # the modification time orders the cache across restarts
+            os.utime(path)
+        except FileNotFoundError:
+            self._size -= self._files.pop(content_id)
+            return None
+        return path
+
+    def _download(self, url: str, content_id: str, expected_sha1: Union[str, None]) -> str:
+        path = self._path(content_id)
+        temporary_path = f"{path}.{threading.get_ident()}.part"
+        sha1 = hashlib.sha1()
+        size = 0
+        try:
+            log.debug(f"Downloading content {content_id}")
+            with self.session.get(url, stream=True, timeout=30) as r:
+                r.raise_for_status()
+                if int(r.headers.get("Content-Length") or 0) > self.max_bytes:
+                    raise KikApiException(f"Content {content_id} is larger than the cache ({r.headers['Content-Length']} bytes)")
+                with open(temporary_path, "wb") as f:
+                    for chunk in r.iter_content(self.chunk_size):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise KikApiException(f"Content {content_id} is larger than the cache ({self.max_bytes} bytes)")
+                        f.write(chunk)
+                        sha1.update(chunk)
+            if expected_sha1 and sha1.hexdigest() != expected_sha1.lower():
+                log.warning(f"Content {content_id} doesn't match its sha1-original hash")
+            os.replace(temporary_path, path)
+        except BaseException:
+            try:
+                os.remove(temporary_path)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._in_flight.pop(content_id, None)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(content_id, None)
+            self._add(content_id, size)
+            self._content_ids_by_sha1[sha1.hexdigest()] = content_id
+            self._evict(keep=content_id)
+        return path
+
+    def _add(self, content_id: str, size: int) -> None:
+        self._size += size - self._files.pop(content_id, 0)
+        self._files[content_id] = size
+
+    def _evict(self, keep: str = None) -> None:
+        for content_id in list(self._files):
+            if self._size <= self.max_bytes:
+                break
+            if content_id == keep:
+                continue
+            self._size -= self._files.pop(content_id)
+            try:
+                os.remove(self._path(content_id))
+            except FileNotFoundError:
+                pass
+
+    def _load_index(self) -> None:
+        # files left by a previous run, oldest first
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._add(name, size)
+        # the budget may have been lowered since
+        self._evict()
+
+    def _path(self, content_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9._-]", "_", content_id))
@@ -1,23 +1,115 @@
 from __future__ import annotations
 
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
 import requests
+from requests.adapters import HTTPAdapter
+
+TENOR_API_URL = "https://tenor.googleapis.com/v2"
 
 
 class KikTenorClient:
-    def __init__(self, api_key: str):
+    """
+    Searches tenor.com for GIFs.
+
+    Results (the media formats of the first GIF found and its thumbnail) are cached for cache_ttl seconds, and
+    concurrent searches for the same term share one lookup. Use get_tenor_client() to share the cache and the
+    keep-alive session between all senders using the same API key.
+
+    :param api_key: the tenor API key (Get one from https://developers.google.com/tenor/)
+    :param cache_ttl: the seconds a search result is reused for
+    :param max_cache_entries: the number of search terms kept, least recently used first out
+    :param max_workers: the number of lookups running at once
+    :param base_url: the tenor API URL, override it to point the client at a local server
+    """
+
+    def __init__(self, api_key: str, cache_ttl: float = 3600, max_cache_entries: int = 256, max_workers: int = 4, base_url: str = TENOR_API_URL):
         if not api_key:
             raise Exception("A tenor.com API key is required to search for GIFs")
         self.headers = {"X-Goog-Api-Key": api_key}
+        self.cache_ttl = cache_ttl
+        self.max_cache_entries = max_cache_entries
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="KikTenor")
+        self._cache = OrderedDict()  # type: OrderedDict[str, tuple[float, tuple[bytes, dict]]]
+        self._in_flight = {}  # type: dict[str, Future]
+        self._lock = threading.Lock()
 
     def search_for_gif(self, search_term: str) -> tuple[bytes, dict]:
-        params = {"q": search_term, "limit": "1"}
-        r = requests.get("https://tenor.googleapis.com/v2/search", params=params, headers=self.headers)
-        r.raise_for_status()
+        """
+        :return: the thumbnail of the first GIF found and its media formats
+        """
+        return self.search_for_gif_async(search_term).result()
+
+    def search_for_gif_async(self, search_term: str) -> Future:
+        """
+        Like search_for_gif(), but returns a future of its result right away.
+        """
+        with self._lock:
+            cached = self._cache.get(search_term)
+            if cached and cached[0] > time.monotonic():
+                self._cache.move_to_end(search_term)
+                future = Future()
+                future.set_result(cached[1])
+                return future
+            future = self._in_flight.get(search_term)
+            if future is None:
+                future = self._in_flight[search_term] = self._executor.submit(self._search, search_term)
+            return future
+
+    def prefetch(self, search_terms: Iterable[str]) -> list[Future]:
+        """
+        Starts looking up search terms, so that sending them later costs no round trip.
+        """
+        return [self.search_for_gif_async(search_term) for search_term in search_terms]
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _search(self, search_term: str) -> tuple[bytes, dict]:
+        try:
+            params = {"q": search_term, "limit": "1"}
+            r = self.session.get(f"{self.base_url}/search", params=params, headers=self.headers, timeout=30)
+            r.raise_for_status()
+
+            gif = r.json()["results"][0]
+            media_formats = gif["media_formats"]
+
+            thumbnail_url = media_formats["nanogifpreview"]["url"]
+            thumbnail = self.session.get(thumbnail_url, timeout=30)
+            thumbnail.raise_for_status()
+            result = thumbnail.content, media_formats
+        except BaseException:
+            with self._lock:
+                self._in_flight.pop(search_term, None)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(search_term, None)
+            self._cache[search_term] = (time.monotonic() + self.cache_ttl, result)
+            self._cache.move_to_end(search_term)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+        return result
+
 
-        gif = r.json()["results"][0]
-        media_formats = gif["media_formats"]
+_tenor_clients = {}  # type: dict[str, KikTenorClient]
+_tenor_clients_lock = threading.Lock()
 
-        thumbnail_url = media_formats["nanogifpreview"]["url"]
-        thumbnail_bytes = requests.get(thumbnail_url).content
 
-        return thumbnail_bytes, media_formats
+def get_tenor_client(api_key: str) -> KikTenorClient:
+    """
+    Returns the tenor client shared by every sender using this API key.
+    """
+    with _tenor_clients_lock:
+        client = _tenor_clients.get(api_key)
+        if client is None:
+            client = _tenor_clients[api_key] = KikTenorClient(api_key)
+        return client
@@ -0,0 +1,118 @@
+"""
+Runs HTTP uploads (content and profile pictures) in a bounded pool of threads sharing one keep-alive session,
+so consecutive uploads reuse their TLS connections and every upload reports back through a Future.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from kik_unofficial.datatypes.exceptions import KikUploadError
+
+log = logging.getLogger("kik_unofficial")
+
+
+class UploadService:
+    """
+    :param max_concurrent_uploads: the number of uploads running at once, the others wait in line
+    :param max_retries: the number of times a request failing with a 5xx, a connection error or a timeout is retried
+    :param retry_backoff: the seconds to wait before the first retry, doubled on every following one
+    :param timeout: the seconds a request may take to connect, and to receive each part of the response
+    :param result_timeout: the seconds a client waits for an upload it needs the result of, waiting in line included
+    """
+
+    def __init__(
+        self,
+        max_concurrent_uploads: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        timeout: float = 30,
+        result_timeout: float = 300,
+    ):
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.result_timeout = result_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrent_uploads)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_concurrent_uploads, thread_name_prefix="KikUpload")
+
+    def submit(self, upload: Callable, *args, **kwargs) -> Future:
+        """
+        Runs upload(self, *args, **kwargs) in the pool.
+
+        :return: a future of its result. Failures are logged and set as the future's exception.
+        """
+        future = self._executor.submit(upload, self, *args, **kwargs)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def wait(self, upload: Future) -> object:
+        """
+        Waits for an upload submitted to this service for at most result_timeout seconds.
+
+        :raises KikUploadError: if the upload failed or didn't finish in time, in which case it's cancelled if it hasn't started
+        """
+        try:
+            return upload.result(timeout=self.result_timeout)
+        except concurrent.futures.TimeoutError:
+            upload.cancel()
+            raise KikUploadError(None, f"Upload didn't finish in {self.result_timeout} seconds") from None
+
+    def request(self, method: str, url: str, data: bytes = None, headers: dict = None, description: str = "Upload") -> requests.Response:
+        """
+        Sends a request in the session, retrying it with a backoff while it fails with a 5xx, a connection error or a timeout.
+
+        :raises KikUploadError: if the request was rejected with a status other than 200, or still failed after all retries
+        """
+        for retry_number in range(self.max_retries + 1):
+            try:
+                response = self.session.request(method, url, data=data, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                status_code, reason = None, str(e)
+            else:
+                if response.status_code == 200:
+                    return response
+                status_code, reason = response.status_code, response.reason
+                if status_code < 500:
+                    raise KikUploadError(status_code, reason)
+            if retry_number == self.max_retries:
+                raise KikUploadError(status_code, reason)
+            delay = self.retry_backoff * 2**retry_number
+            log.warning(f"{description} failed with {status_code or reason}, retrying in {delay}s ({retry_number + 1}/{self.max_retries})")
+            time.sleep(delay)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        self.session.close()
+
+
+def _log_failure(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        log.error(f"Upload failed: {future.exception()!r}")
+
+
+_upload_service: Union[UploadService, None] = None
+_upload_service_lock = threading.Lock()
+
+
+def get_upload_service() -> UploadService:
+    """
+    Returns the upload service shared by all clients.
+    """
+    global _upload_service
+    with _upload_service_lock:
+        if _upload_service is None:
+            _upload_service = UploadService()
+        return _upload_service
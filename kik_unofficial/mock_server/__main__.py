@@ -0,0 +1,63 @@
+"""
+Runs the mock Kik server standalone, for example as a load generator:
+
+    python -m kik_unofficial.mock_server --port 5223 --rate 200 --type groupchat
+
+or to replay a wire capture recorded with KikClient(capture_file_path=...):
+
+    python -m kik_unofficial.mock_server --replay capture.kikcap.gz --realtime
+"""
+
+import argparse
+import asyncio
+import logging
+
+from kik_unofficial.mock_server.fixtures import MockAccount, MockFixtures
+from kik_unofficial.mock_server.replay import ReplayKikServer
+from kik_unofficial.mock_server.server import MockKikServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for Kik's XMPP server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on. Default: 127.0.0.1")
+    parser.add_argument("--port", type=int, default=5223, help="Port to listen on. Default: 5223")
+    parser.add_argument("--username", default="mockbot", help="Username of the accepted account. Default: mockbot")
+    parser.add_argument("--password", default="password", help="Password of the accepted account. Default: password")
+    parser.add_argument("--rate", type=float, default=0.0, help="Messages per second generated towards each session. Default: 0")
+    parser.add_argument("--count", type=int, default=0, help="Messages generated per session, 0 for unlimited. Default: 0")
+    parser.add_argument("--type", choices=["chat", "groupchat"], default="chat", help="Type of generated messages. Default: chat")
+    parser.add_argument("--roster-users", type=int, default=2, help="Users in the roster. Default: 2")
+    parser.add_argument("--roster-groups", type=int, default=1, help="Groups in the roster. Default: 1")
+    parser.add_argument("--history", type=int, default=0, help="Messages waiting in QoS history. Default: 0")
+    parser.add_argument("--no-echo", action="store_true", help="Don't echo incoming messages back")
+    parser.add_argument("--replay", metavar="CAPTURE", help="Serve the recorded connections of a wire capture instead of fixtures")
+    parser.add_argument("--realtime", action="store_true", help="With --replay, keep the recorded timing instead of replaying at full speed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.replay:
+        server = ReplayKikServer(args.replay, realtime=args.realtime, host=args.host, port=args.port)
+    else:
+        server = MockKikServer(
+            host=args.host,
+            port=args.port,
+            account=MockAccount(args.username, args.password),
+            fixtures=MockFixtures(roster_users=args.roster_users, roster_groups=args.roster_groups, history_messages=args.history),
+            echo=not args.no_echo,
+            message_rate=args.rate,
+            message_count=args.count,
+            message_type=args.type,
+        )
+
+    async def serve():
+        await server.start()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Canned stanzas that the mock server answers with.
+
+The formats follow the captures in docs/message_formats.md, with the placeholders filled in by
+deterministic, generated peers so that a scenario can be scaled up (thousands of roster entries,
+long history backlogs) without hand-writing XML.
+"""
+
+from __future__ import annotations
+
+import base64
+import uuid
+
+from kik_unofficial.protobuf.entity.v1 import entity_service_pb2
+from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
+from kik_unofficial.utilities.kik_server_clock import KikServerClock
+from kik_unofficial.utilities.parsing_utilities import ParsingUtilities
+
+FIRST_GROUP_NUMBER = 1100000000000
+
+
+class MockAccount:
+    """
+    The single account that the mock server accepts logins for.
+    """
+
+    def __init__(self, username: str = "mockbot", password: str = "password", node: str = None, first_name: str = "Mock", last_name: str = "Bot"):
+        self.username = username
+        self.password = password
+        self.node = node or f"{username}_a1b"
+        self.jid = f"{self.node}@talk.kik.com"
+        self.email = f"{username}@example.com"
+        self.first_name = first_name
+        self.last_name = last_name
+        self._passkey = None
+
+    @property
+    def passkey(self) -> str:
+        """
+        The password key that clients send in login and authenticated stream requests.
+        Computed once, the derivation is deliberately slow.
+        """
+        if self._passkey is None:
+            self._passkey = CryptographicUtils.key_from_password(self.username, self.password)
+        return self._passkey
+
+
+class MockFixtures:
+    """
+    Builds the responses that the mock server sends.
+
+    :param roster_users: the number of users in the roster
+    :param roster_groups: the number of groups in the roster
+    :param group_members: the number of members listed in each roster group
+    :param roster_page_size: the number of roster entries per page, later pages are requested with `b="1"`
+    :param history_messages: the number of messages waiting in the QoS history
+    :param history_page_size: the number of history messages returned per QoS request
+    """
+
+    def __init__(
+        self,
+        roster_users: int = 2,
+        roster_groups: int = 1,
+        group_members: int = 5,
+        roster_page_size: int = 0,
+        history_messages: int = 0,
+        history_page_size: int = 50,
+    ):
+        self.roster_users = roster_users
+        self.roster_groups = roster_groups
+        self.group_members = group_members
+        self.roster_page_size = roster_page_size
+        self.history_messages = history_messages
+        self.history_page_size = history_page_size
+
+    # -----------------
+    # Generated peers
+    # -----------------
+
+    @staticmethod
+    def peer_username(index: int) -> str:
+        return f"mockpeer{index}"
+
+    @staticmethod
+    def peer_jid(index: int) -> str:
+        return f"mockpeer{index}_x9z@talk.kik.com"
+
+    @staticmethod
+    def group_jid(index: int) -> str:
+        return f"{FIRST_GROUP_NUMBER + index}_g@groups.kik.com"
+
+    @staticmethod
+    def alias_jid(index: int) -> str:
+        return f"{index:052d}_a@talk.kik.com"
+
+    def user_item(self, index: int, tag: str = "item") -> str:
+        return (
+            f'<{tag} jid="{self.peer_jid(index)}">'
+            f"<username>{self.peer_username(index)}</username>"
+            f"<display-name>Mock Peer {index}</display-name>"
+            f'<pic ts="1479751536620">http://profilepics.cf.kik.com/mockpic{index}</pic>'
+            f"</{tag}>"
+        )
+
+    def group_item(self, index: int, account: MockAccount) -> str:
+        members = f'<m s="1" a="1">{account.jid}</m>'
+        members += "".join(f"<m>{self.peer_jid(m)}</m>" for m in range(self.group_members))
+        return (
+            f'<g is-public="true" jid="{self.group_jid(index)}">'
+            f"<code>#mockgroup{index}</code>"
+            f"<n>Mock Group {index}</n>"
+            f'<pic ts="1505911808105">http://profilepics.cf.kik.com/mockgrouppic{index}</pic>'
+            f"{members}"
+            "</g>"
+        )
+
+    # -----------------
+    # IQ responses
+    # -----------------
+
+    @staticmethod
+    def login_result(request_id: str, account: MockAccount) -> bytes:
+        return (
+            f'<iq type="result" id="{request_id}">'
+            '<query xmlns="jabber:iq:register">'
+            f"<node>{account.node}</node>"
+            f'<email confirmed="true">{account.email}</email>'
+            f"<username>{account.username}</username>"
+            f"<first>{account.first_name}</first>"
+            f"<last>{account.last_name}</last>"
+            "</query></iq>"
+        ).encode()
+
+    @staticmethod
+    def login_error(request_id: str) -> bytes:
+        return (
+            f'<iq type="error" id="{request_id}">'
+            '<query xmlns="jabber:iq:register" />'
+            '<error code="406" type="modify"><password-mismatch /></error>'
+            "</iq>"
+        ).encode()
+
+    def roster_page(self, request_id: str, account: MockAccount, page: int = 0) -> bytes:
+        entries = [self.group_item(i, account) for i in range(self.roster_groups)]
+        entries += [self.user_item(i) for i in range(self.roster_users)]
+        more = False
+        if self.roster_page_size > 0:
+            start = page * self.roster_page_size
+            more = start + self.roster_page_size < len(entries)
+            entries = entries[start : start + self.roster_page_size]  # noqa: E203
+
+        timestamp = KikServerClock.get_server_time()
+        more_attribute = ' more="1"' if more else ""
+        return (
+            f'<iq type="result" id="{request_id}" to="{account.jid}">'
+            f'<query xmlns="jabber:iq:roster" p="9" ts="{timestamp}" mts="{timestamp}"{more_attribute}>'
+            f'{"".join(entries)}'
+            "</query></iq>"
+        ).encode()
+
+    def user_by_username(self, request_id: str, username: str) -> bytes:
+        index = self._index_of_username(username)
+        if index is None:
+            return f'<iq type="error" id="{request_id}"><error code="404" type="cancel"><item-not-found /></error></iq>'.encode()
+        return f'<iq type="result" id="{request_id}"><query xmlns="kik:iq:friend">{self.user_item(index)}</query></iq>'.encode()
+
+    def friend_batch(self, request_id: str, jids: list[str]) -> bytes:
+        success = ""
+        failed = ""
+        for jid in jids:
+            index = self._index_of_username(jid.split("_", 1)[0])
+            if index is None:
+                failed += f'<item jid="{jid}" />'
+            else:
+                success += self.user_item(index)
+        return (
+            f'<iq type="result" id="{request_id}">'
+            f'<query xmlns="kik:iq:friend:batch"><success>{success}</success><failed>{failed}</failed></query>'
+            "</iq>"
+        ).encode()
+
+    @staticmethod
+    def friend_status_ok(request_id: str, xmlns: str) -> bytes:
+        return f'<iq type="result" id="{request_id}"><query status="ok" xmlns="{xmlns}" /></iq>'.encode()
+
+    def xiphias_response(self, request_id: str, service: str, method: str, body: str) -> bytes:
+        data = base64.b64decode(ParsingUtilities.fix_base64_padding(body))
+        if method == "GetUsers":
+            request = entity_service_pb2.GetUsersRequest()
+            request.ParseFromString(data)
+            response = entity_service_pb2.GetUsersResponse()
+            for requested in request.ids:
+                user = response.users.add()
+                user.id.local_part = requested.local_part
+                user.registration_element.creation_date.seconds = 1500000000
+        elif method == "GetUsersByAlias":
+            request = entity_service_pb2.GetUsersByAliasRequest()
+            request.ParseFromString(data)
+            response = entity_service_pb2.GetUsersByAliasResponse()
+            for index, requested in enumerate(request.ids):
+                payload = response.payloads.add()
+                payload.id.alias_jid.local_part = requested.alias_jid.local_part
+                payload.request_index = index
+                payload.public_group_member_profile.registration_element.creation_date.seconds = 1500000000
+                payload.public_group_member_profile.display_name.display_name = f"Mock Alias {index}"
+        else:
+            return f'<iq type="error" id="{request_id}"><error code="501" type="cancel"><feature-not-implemented /></error></iq>'.encode()
+
+        protobuf_data = base64.b64encode(response.SerializeToString()).decode()
+        return (
+            f'<iq type="result" id="{request_id}">'
+            f'<query xmlns="kik:iq:xiphias:bridge" service="{service}" method="{method}">'
+            f"<body>{protobuf_data}</body>"
+            "</query></iq>"
+        ).encode()
+
+    def history_page(self, request_id: str, account: MockAccount, delivered: int) -> tuple[bytes, int]:
+        """
+        Returns the next QoS history page and the number of messages it contains.
+
+        :param delivered: the number of history messages that were already acked by the client
+        """
+        count = max(0, min(self.history_page_size, self.history_messages - delivered))
+        more = delivered + count < self.history_messages
+        messages = "".join(self.chat_message(account, f"history message {delivered + i}", peer_index=i, tag="msg") for i in range(count))
+        data = (
+            f'<iq type="result" id="{request_id}" from="warehouse@talk.kik.com" to="{account.jid}">'
+            '<query xmlns="kik:iq:QoS">'
+            f'<history more="{"1" if more else "0"}" attach="true">{messages}</history>'
+            '<polling interval="60" />'
+            "</query></iq>"
+        )
+        return data.encode(), count
+
+    @staticmethod
+    def auth_cert_result(request_id: str, revalidate_seconds: int = 86400) -> bytes:
+        return (
+            f'<iq type="result" id="{request_id}">'
+            '<query xmlns="kik:auth:cert">'
+            f"<certificate><revalidate>{revalidate_seconds}</revalidate><url>https://localhost/mock-cert</url></certificate>"
+            "</query></iq>"
+        ).encode()
+
+    @staticmethod
+    def empty_result(request_id: str) -> bytes:
+        return f'<iq type="result" id="{request_id}" />'.encode()
+
+    # -----------------
+    # Messages
+    # -----------------
+
+    def chat_message(self, account: MockAccount, body: str, peer_index: int = 0, tag: str = "message") -> str:
+        timestamp = KikServerClock.get_server_time()
+        return (
+            f'<{tag} type="chat" id="{uuid.uuid4()}" from="{self.peer_jid(peer_index)}" to="{account.jid}" xmlns="jabber:client" cts="{timestamp}">'
+            f"<body>{ParsingUtilities.escape_xml(body)}</body>"
+            f"<preview>{ParsingUtilities.escape_xml(body[:20])}</preview>"
+            f'<kik push="true" qos="true" timestamp="{timestamp}" app="chat" hop="true" />'
+            '<request xmlns="kik:message:receipt" r="true" d="true" />'
+            "<ri />"
+            f"</{tag}>"
+        )
+
+    def group_message(self, account: MockAccount, body: str, peer_index: int = 0, group_index: int = 0) -> str:
+        timestamp = KikServerClock.get_server_time()
+        return (
+            f'<message type="groupchat" id="{uuid.uuid4()}" from="{self.peer_jid(peer_index)}" to="{account.jid}" xmlns="kik:groups" cts="{timestamp}">'
+            f"<body>{ParsingUtilities.escape_xml(body)}</body>"
+            "<pb />"
+            f"<preview>{ParsingUtilities.escape_xml(body[:20])}</preview>"
+            f'<kik push="true" qos="true" timestamp="{timestamp}" app="chat" hop="true" />'
+            '<request xmlns="kik:message:receipt" r="true" d="true" />'
+            "<ri />"
+            f"<alias-sender>{self.alias_jid(peer_index)}</alias-sender>"
+            f'<g jid="{self.group_jid(group_index)}" />'
+            "</message>"
+        )
+
+    @staticmethod
+    def delivered_receipt(account: MockAccount, from_jid: str, message_id: str) -> str:
+        timestamp = KikServerClock.get_server_time()
+        return (
+            f'<message type="receipt" id="{uuid.uuid4()}" xmlns="jabber:client" to="{account.jid}" from="{from_jid}">'
+            f'<receipt type="delivered" xmlns="kik:message:receipt"><msgid id="{message_id}" /></receipt>'
+            f'<kik app="chat" push="false" timestamp="{timestamp}" qos="true" hop="true" />'
+            "</message>"
+        )
+
+    def _index_of_username(self, username: str):
+        prefix = "mockpeer"
+        if not username.lower().startswith(prefix):
+            return None
+        number = username[len(prefix) :]  # noqa: E203
+        return int(number) if number.isdigit() else None
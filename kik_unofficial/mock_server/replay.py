@@ -0,0 +1,102 @@
+"""
+Replays a wire capture (see KikClient(capture_file_path=...)) to a real KikClient.
+
+Every client connection is served the inbound stream of the next recorded connection, so the capture
+goes through the client's TLS stream, KikXmlParser, stanza dispatch and callbacks exactly like the
+original traffic did. What the client sends is read and discarded.
+
+Example::
+
+    server = ReplayKikServer("capture.kikcap.gz", realtime=False)
+    host, port = server.start_in_thread()
+    client = KikClient(callback, "username", "password", host=host, port=port, ssl_context=client_ssl_context())
+    server.finished.wait()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ssl
+from asyncio import StreamReader, StreamWriter
+from collections import Counter
+from threading import Event
+
+from kik_unofficial.mock_server.server import MockKikServer, log
+from kik_unofficial.utilities.wire_capture import read_connections, replay_stanzas
+
+
+class ReplayKikServer(MockKikServer):
+    """
+    A mock server that answers with recorded traffic instead of fixtures.
+
+    :param capture_path: the capture file to replay
+    :param realtime: if True, data is sent with the delays it was recorded with, otherwise as fast as possible
+    :param close_timeout: seconds to wait for the client to close a replayed connection (as it does after a login)
+                          before the server closes it to move on to the next recorded connection
+    """
+
+    def __init__(
+        self,
+        capture_path: str,
+        realtime: bool = False,
+        close_timeout: float = 2.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        super().__init__(host=host, port=port, echo=False, ssl_context=ssl_context)
+        self.capture_path = capture_path
+        self.realtime = realtime
+        self.close_timeout = close_timeout
+        self.connections = read_connections(capture_path)
+        # the server can't tell stanzas apart in raw chunks, so count them up front with the client's parser
+        self.stanzas_per_connection = Counter(index for index, _ in replay_stanzas(capture_path, log))
+        self.bytes_sent = 0
+        self.finished = Event()
+        self._next_connection = 0
+
+    async def _on_client_connected(self, reader: StreamReader, writer: StreamWriter):
+        index = self._next_connection
+        self._next_connection += 1
+        try:
+            if index >= len(self.connections):
+                log.info("Capture exhausted, refusing connection %s", index)
+                return
+
+            # wait for the client's stream header before answering, like the real server
+            await reader.readuntil(separator=b">")
+            await self._replay(index, writer)
+
+            is_last = index == len(self.connections) - 1
+            if is_last:
+                self.finished.set()
+            drain = asyncio.get_running_loop().create_task(self._discard(reader))
+            try:
+                await asyncio.wait_for(asyncio.shield(drain), None if is_last else self.close_timeout)
+            except asyncio.TimeoutError:
+                drain.cancel()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            if index == len(self.connections) - 1:
+                self.finished.set()
+            if not writer.is_closing():
+                writer.close()
+
+    async def _replay(self, index: int, writer: StreamWriter) -> None:
+        records = self.connections[index]
+        log.info("Replaying connection %s (%s records)", index, len(records))
+        previous = records[0].timestamp if records else 0
+        for record in records:
+            if self.realtime and record.timestamp > previous:
+                await asyncio.sleep(record.timestamp - previous)
+            previous = record.timestamp
+            writer.write(record.payload)
+            self.bytes_sent += len(record.payload)
+            await writer.drain()
+        self.stanzas_sent += self.stanzas_per_connection[index]
+
+    @staticmethod
+    async def _discard(reader: StreamReader) -> None:
+        while await reader.read(65536):
+            pass
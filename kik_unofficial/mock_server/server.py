@@ -0,0 +1,350 @@
+"""
+A local stand-in for Kik's XMPP server.
+
+It speaks enough of the protocol (the <k> stream handshake, login, roster, peer info, xiphias, QoS history,
+auth certs and pings) for a KikClient to log in and exchange messages with it, so the client can be
+exercised in tests, benchmarks and load generators without touching talk*.kik.com.
+
+Example::
+
+    server = MockKikServer(message_rate=100)
+    host, port = server.start_in_thread()
+    client = KikClient(callback, "mockbot", "password", host=host, port=port, ssl_context=client_ssl_context())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import ssl
+import time
+from asyncio import StreamReader, StreamWriter
+from threading import Thread, Event
+from typing import Union
+
+from bs4 import BeautifulSoup
+
+from kik_unofficial.mock_server.fixtures import FIRST_GROUP_NUMBER, MockAccount, MockFixtures
+from kik_unofficial.parser.parser import KikXmlParser
+from kik_unofficial.utilities.kik_server_clock import KikServerClock
+
+log = logging.getLogger("kik_unofficial.mock_server")
+
+CERT_FILE = os.path.join(os.path.dirname(__file__), "mock_cert.pem")
+KEY_FILE = os.path.join(os.path.dirname(__file__), "mock_key.pem")
+
+k_attribute_re = re.compile(rb'([a-z]+)="([^"]*)"')
+
+
+def server_ssl_context() -> ssl.SSLContext:
+    """
+    Returns the TLS context of the mock server, using the self-signed certificate bundled with this package.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERT_FILE, KEY_FILE)
+    return context
+
+
+def client_ssl_context() -> ssl.SSLContext:
+    """
+    Returns a client TLS context that trusts the mock server certificate (valid for localhost and 127.0.0.1).
+    Pass it to KikClient(ssl_context=...).
+    """
+    return ssl.create_default_context(cafile=CERT_FILE)
+
+
+class MockKikServer:
+    """
+    An asyncio TLS server that emulates Kik's XMPP endpoint.
+
+    :param host: the interface to listen on
+    :param port: the port to listen on, 0 picks a free port (see `port` after starting)
+    :param account: the account that logins and authenticated streams are accepted for
+    :param fixtures: the canned responses to answer with
+    :param echo: if True, incoming chat and group messages are echoed back to the sender
+    :param message_rate: messages per second generated towards every authenticated session (0 to disable)
+    :param message_count: the number of messages to generate per session (0 for unlimited)
+    :param message_type: 'chat' or 'groupchat', the type of generated messages
+    :param ssl_context: the TLS context to serve with, defaults to server_ssl_context()
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        account: MockAccount = None,
+        fixtures: MockFixtures = None,
+        echo: bool = True,
+        message_rate: float = 0.0,
+        message_count: int = 0,
+        message_type: str = "chat",
+        ssl_context: ssl.SSLContext = None,
+    ):
+        self.host = host
+        self.port = port
+        self.account = account or MockAccount()
+        self.fixtures = fixtures or MockFixtures()
+        self.echo = echo
+        self.message_rate = message_rate
+        self.message_count = message_count
+        self.message_type = message_type
+        self.ssl_context = ssl_context or server_ssl_context()
+
+        self.sessions = []  # type: list[MockKikSession]
+        self.stanzas_received = 0
+        self.stanzas_sent = 0
+        self.messages_received = 0
+        self.loop = None  # type: Union[asyncio.AbstractEventLoop, None]
+        self._server = None  # type: Union[asyncio.AbstractServer, None]
+        self._thread = None  # type: Union[Thread, None]
+
+    async def start(self) -> None:
+        """
+        Starts listening on the running event loop.
+        """
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._on_client_connected, self.host, self.port, ssl=self.ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info("Mock Kik server listening on %s:%s", self.host, self.port)
+
+    async def stop(self) -> None:
+        """
+        Closes every session and stops listening.
+        """
+        for session in list(self.sessions):
+            session.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> tuple[str, int]:
+        """
+        Runs the server on its own event loop in a daemon thread.
+
+        :return: the (host, port) pair to point clients at
+        """
+        started = Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self._thread = Thread(target=run, name="Mock Kik Server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.host, self.port
+
+    def stop_in_thread(self) -> None:
+        """
+        Stops a server that was started with start_in_thread().
+        """
+        if self._thread:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def broadcast(self, data: Union[bytes, str]) -> None:
+        """
+        Sends a raw stanza to every authenticated session. Safe to call from any thread.
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        for session in list(self.sessions):
+            if session.authenticated:
+                self.loop.call_soon_threadsafe(session.send, data)
+
+    async def _on_client_connected(self, reader: StreamReader, writer: StreamWriter):
+        session = MockKikSession(self, reader, writer)
+        self.sessions.append(session)
+        try:
+            await session.run()
+        finally:
+            self.sessions.remove(session)
+
+
+class MockKikSession:
+    """
+    A single client connection to the mock server.
+    """
+
+    def __init__(self, server: MockKikServer, reader: StreamReader, writer: StreamWriter):
+        self.server = server
+        self.account = server.account
+        self.fixtures = server.fixtures
+        self.reader = reader
+        self.writer = writer
+        self.authenticated = False
+        self.stream_attributes = {}  # type: dict[str, str]
+        self._history_delivered = 0
+        self._roster_page = 0
+        self._generator_task = None  # type: Union[asyncio.Task, None]
+
+    async def run(self) -> None:
+        try:
+            if not await self._handshake():
+                return
+
+            parser = KikXmlParser(self.reader, log)
+            while not self.writer.is_closing():
+                stanza = await parser.read_next_stanza()
+                self.server.stanzas_received += 1
+                self._handle_stanza(stanza)
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        except Exception as e:
+            # includes the SAXException raised when the client closes the stream with </k>
+            log.debug("Mock session ended: %r", e)
+        finally:
+            self.close()
+
+    def send(self, data: bytes) -> None:
+        if not self.writer.is_closing():
+            self.server.stanzas_sent += 1
+            self.writer.write(data)
+
+    def close(self) -> None:
+        if self._generator_task:
+            self._generator_task.cancel()
+            self._generator_task = None
+        if not self.writer.is_closing():
+            self.writer.write(b"</k>")
+            self.writer.close()
+
+    async def _handshake(self) -> bool:
+        """
+        Reads the opening <k> tag and accepts (or rejects) the stream.
+        """
+        header = await self.reader.readuntil(separator=b">")
+        header = header.strip()
+        if not header.startswith(b"<k "):
+            log.warning("Unexpected stream header: %s", header)
+            return False
+
+        self.stream_attributes = {k.decode(): v.decode() for k, v in k_attribute_re.findall(header)}
+        if self.stream_attributes.get("anon") == "1":
+            self.send(b'<k ok="1">')
+            return True
+
+        node = self.stream_attributes.get("from", "").split("@", 1)[0]
+        if node == self.account.node and self.stream_attributes.get("p") == self.account.passkey:
+            self.authenticated = True
+            self.send(f'<k ok="1" ts="{KikServerClock.get_system_time()}">'.encode())
+            self._start_generator()
+            return True
+
+        self.send(b'<k ok="0"><noauth><msg>mock server rejected the credentials</msg></noauth></k>')
+        return False
+
+    def _handle_stanza(self, stanza: BeautifulSoup) -> None:
+        if stanza.name == "iq":
+            self._handle_iq(stanza)
+        elif stanza.name == "message":
+            self._handle_message(stanza)
+        elif stanza.name == "ping":
+            self.send(b"<pong/>")
+        else:
+            log.debug("Mock server ignoring stanza: %s", stanza.name)
+
+    def _handle_iq(self, iq: BeautifulSoup) -> None:
+        request_id = iq["id"]
+        query = iq.find("query", recursive=False)
+        xmlns = query.get("xmlns") if query else None
+
+        if xmlns == "jabber:iq:register":
+            username = query.find("username", recursive=False) or query.find("email", recursive=False)
+            passkey = query.find("passkey-u", recursive=False) or query.find("passkey-e", recursive=False)
+            if username and passkey and passkey.text == self.account.passkey:
+                self.send(self.fixtures.login_result(request_id, self.account))
+            else:
+                self.send(self.fixtures.login_error(request_id))
+        elif xmlns == "jabber:iq:roster":
+            self._roster_page = self._roster_page + 1 if query.get("b") == "1" else 0
+            self.send(self.fixtures.roster_page(request_id, self.account, self._roster_page))
+        elif xmlns == "kik:iq:friend":
+            item = query.find("item", recursive=False)
+            if item and item.get("username"):
+                self.send(self.fixtures.user_by_username(request_id, item["username"]))
+            else:
+                self.send(self.fixtures.friend_status_ok(request_id, xmlns))
+        elif xmlns == "kik:iq:friend:batch":
+            jids = [item["jid"] for item in query.find_all("item", recursive=False)]
+            self.send(self.fixtures.friend_batch(request_id, jids))
+        elif xmlns == "kik:iq:xiphias:bridge":
+            self.send(self.fixtures.xiphias_response(request_id, query["service"], query["method"], query.body.text))
+        elif xmlns == "kik:iq:QoS":
+            acked = query.find("msg-acks", recursive=False)
+            if acked:
+                self._history_delivered += len(acked.find_all("ack-id"))
+            history = query.find("history", recursive=False)
+            if history and history.get("attach") == "true":
+                data, _ = self.fixtures.history_page(request_id, self.account, self._history_delivered)
+                self.send(data)
+            else:
+                self.send(self.fixtures.empty_result(request_id))
+        elif xmlns == "kik:auth:cert":
+            self.send(self.fixtures.auth_cert_result(request_id))
+        else:
+            self.send(self.fixtures.empty_result(request_id))
+
+    def _handle_message(self, message: BeautifulSoup) -> None:
+        self.server.messages_received += 1
+        message_id = message.get("id")
+        if message_id:
+            self.send(f'<ack id="{message_id}" />'.encode())
+
+        body = message.find("body", recursive=False)
+        if not self.server.echo or body is None:
+            return
+
+        to_jid = message.get("to", "")
+        if message.get("type") == "groupchat":
+            group_index = self._group_index(to_jid)
+            self.send(self.fixtures.group_message(self.account, body.text, group_index=group_index).encode())
+        else:
+            self.send(self.fixtures.delivered_receipt(self.account, to_jid, message_id).encode())
+            self.send(self.fixtures.chat_message(self.account, body.text, peer_index=self._peer_index(to_jid)).encode())
+
+    def _start_generator(self) -> None:
+        if self.server.message_rate > 0:
+            self._generator_task = asyncio.get_running_loop().create_task(self._generate_messages())
+
+    async def _generate_messages(self) -> None:
+        """
+        Sends messages to the client at the configured rate.
+        Sleeps are scheduled against a fixed start time so the rate doesn't drift with send overhead.
+        """
+        interval = 1.0 / self.server.message_rate
+        start = time.monotonic()
+        sent = 0
+        while self.server.message_count == 0 or sent < self.server.message_count:
+            if self.server.message_type == "groupchat":
+                stanza = self.fixtures.group_message(self.account, f"generated message {sent}", peer_index=sent % max(1, self.fixtures.group_members))
+            else:
+                stanza = self.fixtures.chat_message(self.account, f"generated message {sent}", peer_index=sent % max(1, self.fixtures.roster_users))
+            self.send(stanza.encode())
+            sent += 1
+            delay = start + sent * interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif sent % 100 == 0:
+                # running behind the requested rate, still let the loop breathe
+                await asyncio.sleep(0)
+
+    @staticmethod
+    def _peer_index(jid: str) -> int:
+        local_part = jid.split("_", 1)[0]
+        number = local_part[len("mockpeer") :] if local_part.startswith("mockpeer") else ""  # noqa: E203
+        return int(number) if number.isdigit() else 0
+
+    @staticmethod
+    def _group_index(jid: str) -> int:
+        number = jid.split("_", 1)[0]
+        return int(number) - FIRST_GROUP_NUMBER if number.isdigit() else 0
@@ -0,0 +1,177 @@
+"""
+RSA key pairs for auth certificates (kik:auth:cert).
+
+rsa.newkeys(2048) is seconds of pure-Python work, so key pairs are generated ahead of time, one per client that will
+need one (AuthCertKeyPool), and can be persisted per account (AuthCertKeyStore), so that a client gets its key without
+waiting.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import BrokenExecutor, Executor, Future
+from typing import Union
+
+import rsa
+
+from kik_unofficial.utilities.threading_utils import new_worker_pool
+
+log = logging.getLogger(__name__)
+
+# the DER header of an RSA SubjectPublicKeyInfo, prepended to the PKCS#1 keys like the Android client does
+IDENTIFIER_HEX = "30820122300d06092a864886f70d01010105000382010f00"
+
+KeyPair = tuple  # (public key DER, private key DER), both prefixed with IDENTIFIER_HEX
+
+
+def generate_key_pair() -> KeyPair:
+    """
+    Generates a new 2048 bits RSA key pair, could take from about a second to six.
+    """
+    (pubkey, privkey) = rsa.newkeys(2048)
+    identifier = bytes.fromhex(IDENTIFIER_HEX)
+    return identifier + pubkey.save_pkcs1("DER"), identifier + privkey.save_pkcs1("DER")
+
+
+class AuthCertKeyPool:
+    """
+    Generates key pairs in the background ahead of the logins that need them.
+
+    Every prefetch() starts one key pair for the client that will take it with get_key_pair(), so a pool shared by
+    many clients generates as many pairs as they asked for, and goes idle once they got them.
+
+    By default the pairs are generated in one worker thread, which holds the GIL while it works. To keep that work
+    off the clients' threads entirely, give the pool a process pool, e.g.
+    AuthCertKeyPool(executor=ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))),
+    and pass it to the clients (KikClient's auth_cert_key_pool) or make it the shared one with set_key_pool().
+
+    :param size: the most key pairs ready or in progress at once, further prefetches are ignored
+    :param max_workers: the number of worker threads of the created pool, one by default since the work holds the GIL
+    :param executor: the executor to generate keys in instead of a pool of threads
+    """
+
+    def __init__(self, size: int = 64, max_workers: int = 1, executor: Executor = None):
+        self.size = size
+        self.max_workers = max_workers
+        self._pending = deque()  # type: deque[Future]
+        self._executor: Union[Executor, None] = executor
+        self._owns_executor = executor is None
+        self._lock = threading.Lock()
+
+    def prefetch(self) -> None:
+        """
+        Starts generating a key pair for a later get_key_pair(), unless `size` of them are already ready or in progress.
+        """
+        with self._lock:
+            if len(self._pending) < self.size:
+                self._pending.append(self._submit())
+
+    def get_key_pair(self) -> KeyPair:
+        """
+        Returns a pre-generated key pair, or generates one in the calling thread if none was prefetched.
+        """
+        with self._lock:
+            future = self._pending.popleft() if self._pending else None
+        if future is None:
+            return generate_key_pair()
+        try:
+            return future.result()
+        except BrokenExecutor:
+            log.warning("Auth cert key worker pool broke, generating the key inline")
+            with self._lock:
+                self._pending.clear()
+                if self._owns_executor:
+                    self._executor = None
+            return generate_key_pair()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            if self._executor and self._owns_executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _submit(self) -> Future:
+        if self._executor is None:
+            self._executor = new_worker_pool(self.max_workers, thread_name_prefix="Auth Cert Keys")
+        try:
+            return self._executor.submit(generate_key_pair)
+        except (BrokenExecutor, RuntimeError):
+            # the pool broke or the interpreter is shutting down
+            future = Future()
+            future.set_result(generate_key_pair())
+            return future
+
+
+class AuthCertKeyStore:
+    """
+    Persists one key pair per account as a JSON file in `directory`, so it's only ever generated once per account.
+    The files hold private keys and are created readable by the owner only.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self, account: str) -> Union[KeyPair, None]:
+        try:
+            with open(self._path(account)) as f:
+                data = json.load(f)
+            return base64.b64decode(data["public_key"]), base64.b64decode(data["private_key"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"Ignoring unreadable auth cert key file for {account}: {e}")
+            return None
+
+    def save(self, account: str, key_pair: KeyPair) -> None:
+        data = {"public_key": base64.b64encode(key_pair[0]).decode(), "private_key": base64.b64encode(key_pair[1]).decode()}
+        path = self._path(account)
+        temporary_path = path + ".tmp"
+        with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(data, f)
+        os.replace(temporary_path, path)
+
+    def delete(self, account: str) -> None:
+        try:
+            os.remove(self._path(account))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, account: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^a-z0-9._@-]", "_", account.lower()) + ".json")
+
+
+_key_pool = None  # type: Union[AuthCertKeyPool, None]
+_key_pool_lock = threading.Lock()
+
+
+def get_key_pool() -> AuthCertKeyPool:
+    """
+    Returns the key pool shared by the clients that weren't given one, see set_key_pool().
+    """
+    global _key_pool
+    with _key_pool_lock:
+        if _key_pool is None:
+            _key_pool = AuthCertKeyPool()
+        return _key_pool
+
+
+def set_key_pool(key_pool: AuthCertKeyPool) -> None:
+    """
+    Makes key_pool the one shared by all clients that weren't given one, e.g. a pool generating keys in processes.
+    The pool it replaces is shut down.
+    """
+    global _key_pool
+    with _key_pool_lock:
+        previous, _key_pool = _key_pool, key_pool
+    if previous is not None and previous is not key_pool:
+        previous.shutdown()
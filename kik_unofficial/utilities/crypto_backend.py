@@ -0,0 +1,62 @@
+"""
+RSA signing and DES encryption for the handshake and auth certs.
+
+Uses the `cryptography` package (OpenSSL) when it's installed (pip install kik_unofficial[fast]),
+and the pure-Python `rsa` and `pyDes` packages otherwise. Both produce identical output:
+PKCS#1 v1.5 signatures are deterministic, and single DES is 3DES with the key repeated three times.
+"""
+
+from __future__ import annotations
+
+import warnings
+
+import pyDes
+import rsa
+
+try:
+    from cryptography.hazmat.primitives import hashes, padding as symmetric_padding, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, modes
+
+    try:
+        from cryptography.hazmat.decrepit.ciphers.algorithms import TripleDES
+    except ImportError:  # cryptography < 43
+        from cryptography.hazmat.primitives.ciphers.algorithms import TripleDES
+except ImportError:
+    serialization = None
+
+HAS_CRYPTOGRAPHY = serialization is not None
+
+
+class RsaSigner:
+    """
+    Signs data with SHA-256 and PKCS#1 v1.5 padding, like rsa.sign(data, key, "SHA-256").
+
+    :param pem: a PKCS#1 ("BEGIN RSA PRIVATE KEY") PEM private key
+    """
+
+    def __init__(self, pem: bytes):
+        if HAS_CRYPTOGRAPHY:
+            self._key = serialization.load_pem_private_key(pem, password=None)
+        else:
+            self._key = rsa.PrivateKey.load_pkcs1(pem, format="PEM")
+
+    def sign(self, data: bytes) -> bytes:
+        if HAS_CRYPTOGRAPHY:
+            return self._key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+        return rsa.sign(data, self._key, "SHA-256")
+
+
+def des_ecb_encrypt(key: bytes, data: bytes) -> bytes:
+    """
+    DES-ECB with PKCS#5 padding, like pyDes.des(key, mode=pyDes.ECB, padmode=pyDes.PAD_PKCS5).encrypt(data).
+    """
+    if HAS_CRYPTOGRAPHY:
+        padder = symmetric_padding.PKCS7(64).padder()
+        padded = padder.update(data) + padder.finalize()
+        with warnings.catch_warnings():
+            # single DES is only used here because the protocol requires it
+            warnings.simplefilter("ignore")
+            encryptor = Cipher(TripleDES(key * 3), modes.ECB()).encryptor()
+        return encryptor.update(padded) + encryptor.finalize()
+    return pyDes.des(key, mode=pyDes.ECB, padmode=pyDes.PAD_PKCS5).encrypt(data)
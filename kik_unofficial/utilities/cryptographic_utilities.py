@@ -1,14 +1,52 @@
-import uuid
+import os
 import hashlib
 import binascii
-import pbkdf2
 import base64
-from collections import OrderedDict
+import struct
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
 
 from kik_unofficial.utilities.kik_server_clock import KikServerClock
 from kik_unofficial.utilities.parsing_utilities import ParsingUtilities
 from kik_unofficial.device_configuration import kik_version_info
 
+# uuid.uuid4() bits: version 4 in bits 76-79, RFC 4122 variant in bits 62-63
+_UUID4_CLEAR_MASK = ~((0xF000 << 64) | (0xC000 << 48))
+_UUID4_SET_BITS = (4 << 76) | (0x8000 << 48)
+# make_kik_uuid() only uses UUIDs whose bit length is at least 121
+_KIK_UUID_MIN_MSB = 1 << 56
+# (i3, i2) bit indexes, selected by the top 2 bits of the most significant half
+_KIK_UUID_BIT_INDEXES = ((3, 6), (2, 5), (7, 1), (9, 5))
+
+
+def _build_kik_uuid_embeddings():
+    """
+    For every step (1-3) and every value of the 6 embedded bits, precomputes the mask clearing
+    the target positions and the bits to set, applying the writes in the original order.
+    """
+    embeddings = [None]
+    for step in range(1, 4):
+        positions = []
+        i = 1
+        for _ in range(6):
+            i = (i + (step * 7)) % 60
+            positions.append(i + 2)
+        clear_mask = ~0
+        for position in positions:
+            clear_mask &= ~(1 << position)
+        table = []
+        for j in range(64):
+            bits = 0
+            for i4, position in enumerate(positions):
+                bits = (bits & ~(1 << position)) | (((j >> i4) & 1) << position)
+            table.append((clear_mask, bits))
+        embeddings.append(tuple(table))
+    return tuple(embeddings)
+
+
+_KIK_UUID_EMBEDDINGS = _build_kik_uuid_embeddings()
+
 
 class CryptographicUtils:
     """
@@ -32,22 +70,28 @@ class CryptographicUtils:
         return j4 | (j3 << 5) | j2
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def key_from_password(username, password) -> str:
         # Kik's secret algorithm for hashing passwords
         # relevant source file: classes1\kik\android\chat\fragment\KikLoginFragmentAbstract.java
+        # The key is needed for every login, session and upload, and 8192 rounds aren't free,
+        # so it is derived once per (username, password). The cache isn't bounded: a process running
+        # a fleet of accounts would otherwise evict and re-derive the keys of its own accounts in turn.
         sha1_password = binascii.hexlify(hashlib.sha1(password.encode("UTF-8")).digest())
         salt = username.lower() + "niCRwL7isZHny24qgLvy"
-        key = pbkdf2.PBKDF2(sha1_password, salt, 8192).read(16)  # 128-bit key
+        key = hashlib.pbkdf2_hmac("sha1", sha1_password, salt.encode("UTF-8"), 8192, 16)  # 128-bit key
         return binascii.hexlify(key).decode("UTF-8")
 
     @staticmethod
-    def build_hmac_key() -> bytes:
+    def build_hmac_key(version_info: dict = None) -> bytes:
         # secret algorithm for creating the hmac key
         # relevant kik source files:
         # classes1\kik\android\c.java
         # classes2\kik\core\net\l.java
         # classes2\kik\android\net\communicator\c.java
-        kik_version = kik_version_info["kik_version"].encode("UTF-8")
+        # prefer DeviceProfile.hmac_key, which computes this once per emulated version
+        version_info = version_info or kik_version_info
+        kik_version = version_info["kik_version"].encode("UTF-8")
         apk_signature_hex = (
             "308203843082026CA00302010202044C23D625300D06092A864886F70D0101050500308183310B3009060355"
             "0406130243413110300E060355040813074F6E746172696F3111300F0603550407130857617465726C6F6F31"
@@ -72,7 +116,7 @@ class CryptographicUtils:
             "0270C355DC38F9560469B452C36560AD5AB9619B6EB33705"
         )
 
-        classes_dex_sha1_digest = kik_version_info["classes_dex_sha1_digest"].encode()
+        classes_dex_sha1_digest = version_info["classes_dex_sha1_digest"].encode()
         source_bytes = "hello".encode("UTF-8") + binascii.unhexlify(apk_signature_hex) + kik_version + classes_dex_sha1_digest + "bar".encode("UTF-8")
         return base64.b64encode(hashlib.sha1(source_bytes).digest())
 
@@ -80,28 +124,53 @@ class CryptographicUtils:
     def make_kik_uuid() -> str:
         # a manually converted code from classes2/kik/core/net/f.java
         # used to make UUIDs for messages
-        random_uuid = uuid.uuid4().int
-        while random_uuid.bit_length() < 121:
-            random_uuid = uuid.uuid4().int
+        if _kik_uuid_pool is not None:
+            return _kik_uuid_pool.get()
+        return CryptographicUtils.make_kik_uuids(1)[0]
 
-        bytes_array = random_uuid.to_bytes((random_uuid.bit_length() + 7) // 8, "big")
-        most_significant_bits = int.from_bytes(bytes_array[:8], byteorder="big")
-        least_significant_bits = int.from_bytes(bytes_array[8:], byteorder="big")
-        i = 1
-        i2 = int((-1152921504606846976 & most_significant_bits) >> 62)
-        i_arr = [(3, 6), (2, 5), (7, 1), (9, 5)]
-        i3 = i_arr[i2][0]
-        i2 = i_arr[i2][1]
-        j = (((-16777216 & most_significant_bits) >> 22) ^ ((16711680 & most_significant_bits) >> 16)) ^ ((65280 & most_significant_bits) >> 8)
-        i2 = (CryptographicUtils.kik_uuid_sub_func(most_significant_bits, i2) + 1) | (CryptographicUtils.kik_uuid_sub_func(most_significant_bits, i3) << 1)
-        for i4 in range(6):
-            i = (i + (i2 * 7)) % 60
-            least_significant_bits = (least_significant_bits & ((1 << (i + 2)) ^ -1)) | ((CryptographicUtils.kik_uuid_sub_func(j, i4)) << (i + 2))
-        mstb = binascii.hexlify((most_significant_bits.to_bytes((most_significant_bits.bit_length() + 7) // 8, "big") or b"\0"))
-        lstb = binascii.hexlify((least_significant_bits.to_bytes((least_significant_bits.bit_length() + 7) // 8, "big") or b"\0"))
-        str1 = mstb + lstb
-        uuid_final = uuid.UUID(str1.decode("UTF-8"))
-        return str(uuid_final)
+    @staticmethod
+    def make_kik_uuids(count: int) -> list:
+        """
+        Generates `count` message IDs at once, in the format of make_kik_uuid().
+
+        The most significant bits are a random version 4 UUID with one of its top 7 bits set. Six bits derived from them
+        are embedded in the least significant bits, at positions that depend on two bits of the most significant half.
+        """
+        ids = []
+        while len(ids) < count:
+            randomness = os.urandom(16 * (count - len(ids)))
+            for offset in range(0, len(randomness), 16):
+                value = int.from_bytes(randomness[offset : offset + 16], "big")  # noqa: E203
+                # the same version and variant bits as uuid.uuid4()
+                value = (value & _UUID4_CLEAR_MASK) | _UUID4_SET_BITS
+                most_significant_bits = value >> 64
+                if most_significant_bits < _KIK_UUID_MIN_MSB:
+                    continue
+                i3, i2 = _KIK_UUID_BIT_INDEXES[most_significant_bits >> 62]
+                step = (((most_significant_bits >> i2) & 1) + 1) | (((most_significant_bits >> i3) & 1) << 1)
+                j = ((most_significant_bits >> 24) << 2) ^ ((most_significant_bits >> 16) & 0xFF) ^ ((most_significant_bits >> 8) & 0xFF)
+                clear_mask, embedded_bits = _KIK_UUID_EMBEDDINGS[step][j & 0x3F]
+                value = (value & clear_mask) | embedded_bits
+                hex_value = f"{value:032x}"
+                ids.append(f"{hex_value[:8]}-{hex_value[8:12]}-{hex_value[12:16]}-{hex_value[16:20]}-{hex_value[20:]}")
+        return ids
+
+    @staticmethod
+    def enable_kik_uuid_pool(size: int = 1024) -> None:
+        """
+        Serves make_kik_uuid() from a pool of pre-generated IDs that a background thread keeps filled,
+        taking ID generation off the send path during bursts.
+        """
+        global _kik_uuid_pool
+        if _kik_uuid_pool is None:
+            _kik_uuid_pool = KikUuidPool(size)
+
+    @staticmethod
+    def disable_kik_uuid_pool() -> None:
+        global _kik_uuid_pool
+        if _kik_uuid_pool is not None:
+            _kik_uuid_pool.close()
+            _kik_uuid_pool = None
 
     @staticmethod
     def kik_uuid_sub_func(j, i):
@@ -123,55 +192,67 @@ class CryptographicUtils:
         # relevant java sources:
         # classes2\kik\core\datatypes\SortedMap.java
         # classes2\kik\core\datatypes\StrongHashMap.java
+        #
+        # Every round hashes the remaining entries, so the sorted "key + value" parts are kept in a list
+        # that shrinks with the map instead of re-sorting and re-joining the dictionary each time.
+        # The spaces hash and the first round hash the same full map, so they share the digests.
 
-        dictionary = original_dictionary.copy()
         new_map = OrderedDict()
-        original_length = len(dictionary)
-        keys = sorted(dictionary.keys())
-        hash_code_for_spaces = CryptographicUtils.kik_map_hash_code(dictionary, -310256979, 13)
+        keys = sorted(original_dictionary.keys())
+        parts = [key + str(original_dictionary[key]) for key in keys]
+        digest_words = CryptographicUtils._kik_map_digest_words(parts)
+        hash_code_for_spaces = CryptographicUtils._combine_kik_map_hash_code(digest_words, -310256979, 13)
         hash_code_for_spaces = hash_code_for_spaces % 29
         if hash_code_for_spaces < 0:
             hash_code_for_spaces += 29
 
-        for _ in range(original_length):
-            hash_code = CryptographicUtils.kik_map_hash_code(dictionary, -1964139357, 7)
-            hash_code = hash_code % len(dictionary) if hash_code > 0 else hash_code % -len(dictionary)
+        while keys:
+            if digest_words is None:
+                digest_words = CryptographicUtils._kik_map_digest_words(parts)
+            hash_code = CryptographicUtils._combine_kik_map_hash_code(digest_words, -1964139357, 7)
+            hash_code = hash_code % len(keys) if hash_code > 0 else hash_code % -len(keys)
             if hash_code < 0:
-                hash_code += len(dictionary)
-            selected_key = keys[hash_code]
-            del keys[hash_code]
-            new_map[selected_key] = dictionary[selected_key]
-            del dictionary[selected_key]
+                hash_code += len(keys)
+            selected_key = keys.pop(hash_code)
+            del parts[hash_code]
+            new_map[selected_key] = original_dictionary[selected_key]
+            digest_words = None
 
         return new_map, " " * hash_code_for_spaces
 
     @staticmethod
     def kik_map_hash_code(dictionary, hash_code_base, hash_code_offset):
         keys = sorted(dictionary.keys())
-        string1 = "".join(key + str(dictionary[key]) for key in keys)
-        string2 = "".join(key + str(dictionary[key]) for key in reversed(keys))
-        bytes1 = string1.encode("UTF-8")
-        bytes2 = string2.encode("UTF-8")
-        array = [
+        parts = [key + str(dictionary[key]) for key in keys]
+        return CryptographicUtils._combine_kik_map_hash_code(CryptographicUtils._kik_map_digest_words(parts), hash_code_base, hash_code_offset)
+
+    @staticmethod
+    def _kik_map_digest_words(parts: list) -> tuple:
+        # of the six digests kik computes (SHA-256, SHA-1 and MD5 of the map in both orders),
+        # only these three end up in the hash code
+        bytes1 = "".join(parts).encode("UTF-8")
+        bytes2 = "".join(reversed(parts)).encode("UTF-8")
+        return (
             CryptographicUtils.kik_hash_code_sub_func(0, bytes1),
             CryptographicUtils.kik_hash_code_sub_func(1, bytes1),
-            CryptographicUtils.kik_hash_code_sub_func(2, bytes1),
-            CryptographicUtils.kik_hash_code_sub_func(0, bytes2),
-            CryptographicUtils.kik_hash_code_sub_func(1, bytes2),
             CryptographicUtils.kik_hash_code_sub_func(2, bytes2),
-        ]
+        )
 
+    @staticmethod
+    def _combine_kik_map_hash_code(digest_words: tuple, hash_code_base, hash_code_offset):
+        sha256_forward, sha1_forward, md5_reversed = digest_words
         return (
             (
-                (hash_code_base ^ (ParsingUtilities.sign_extend_with_mask(array[0] << hash_code_offset)))
-                ^ (ParsingUtilities.sign_extend_with_mask(array[5] << (hash_code_offset * 2)))
+                (hash_code_base ^ (ParsingUtilities.sign_extend_with_mask(sha256_forward << hash_code_offset)))
+                ^ (ParsingUtilities.sign_extend_with_mask(md5_reversed << (hash_code_offset * 2)))
             )
-            ^ (ParsingUtilities.sign_extend_with_mask(array[1] << hash_code_offset))
-        ) ^ array[0]
+            ^ (ParsingUtilities.sign_extend_with_mask(sha1_forward << hash_code_offset))
+        ) ^ sha256_forward
 
     @staticmethod
     def kik_hash_code_sub_func(hash_id, bytes_array):
-        j = 0
+        # XOR of the digest's little endian 32-bit words, where every byte is a sign-extended Java byte:
+        # a byte with its top bit set fills all the bits above it with ones
         if hash_id == 0:
             digest = hashlib.sha256(bytes_array).digest()
         elif hash_id == 1:
@@ -179,24 +260,67 @@ class CryptographicUtils:
         else:
             digest = hashlib.md5(bytes_array).digest()
 
-        for i in range(0, len(digest), 4):
-            j ^= (
-                (((ParsingUtilities.byte_to_signed_int(digest[i + 3])) << 24) | ((ParsingUtilities.byte_to_signed_int(digest[i + 2])) << 16))
-                | ((ParsingUtilities.byte_to_signed_int(digest[i + 1])) << 8)
-            ) | (ParsingUtilities.byte_to_signed_int(digest[i]))
+        j = 0
+        for word in struct.unpack(f"<{len(digest) // 4}I", digest):
+            if word & 0x80:
+                word |= 0xFFFFFF00
+            if word & 0x8000:
+                word |= 0xFFFF0000
+            if word & 0x800000:
+                word |= 0xFF000000
+            j ^= word
 
-        return j
+        return ParsingUtilities.sign_extend_with_mask(j)
 
     @staticmethod
-    def get_kik_host_name():
+    def get_kik_host_name(version_info: dict = None):
         # The android APK determines the host name for the XMPP domain
         # by using the minor and major version numbers
         # talk(major)(minor)0an.kik.com
 
-        split = kik_version_info["kik_version"].split(sep=".", maxsplit=3)
+        split = (version_info or kik_version_info)["kik_version"].split(sep=".", maxsplit=3)
         ret = "talk"
 
         for i in range(0, 2):
             ret += split[i]
 
         return ret + "0an.kik.com"
+
+
+class KikUuidPool:
+    """
+    A pool of pre-generated message IDs. A daemon thread refills it in batches whenever it drops below half its size;
+    if it runs dry, IDs are generated inline.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self._ids = deque()
+        self._refill = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="Kik UUID Pool", daemon=True)
+        self._thread.start()
+        self._refill.set()
+
+    def get(self) -> str:
+        try:
+            kik_uuid = self._ids.popleft()
+        except IndexError:
+            kik_uuid = CryptographicUtils.make_kik_uuids(1)[0]
+        if len(self._ids) < self.size // 2:
+            self._refill.set()
+        return kik_uuid
+
+    def close(self) -> None:
+        self._closed = True
+        self._refill.set()
+
+    def _run(self):
+        while not self._closed:
+            self._refill.wait()
+            self._refill.clear()
+            while not self._closed and len(self._ids) < self.size:
+                self._ids.extend(CryptographicUtils.make_kik_uuids(min(64, self.size - len(self._ids))))
+
+
+_kik_uuid_pool = None  # type: KikUuidPool
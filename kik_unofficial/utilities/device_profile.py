@@ -0,0 +1,60 @@
+"""
+Values derived from the emulated device configuration.
+
+They only depend on the kik version being emulated, so they are computed once per version
+and shared by every client instead of on every connection.
+"""
+
+import binascii
+import hashlib
+import hmac
+import threading
+
+from kik_unofficial.device_configuration import kik_version_info
+from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
+
+# 15.56.0.28947 is the first version where the roster protocol was changed to 9 (mts)
+ROSTER_V9_VERSION_NUMBER = 15_56_0_28947
+
+
+class DeviceProfile:
+    """
+    The precomputed handshake material of one kik version configuration (see device_configuration.py).
+    Use get_device_profile() to get the shared instance.
+    """
+
+    def __init__(self, version_info: dict):
+        self.version_info = version_info
+        self.kik_version = version_info["kik_version"]
+        self.version_number = int(self.kik_version.replace(".", ""))
+        self.needs_v9_roster_protocol = self.version_number >= ROSTER_V9_VERSION_NUMBER
+        self.host_name = CryptographicUtils.get_kik_host_name(version_info)
+        self.hmac_key = CryptographicUtils.build_hmac_key(version_info)
+        self._hmac = hmac.new(self.hmac_key, digestmod=hashlib.sha1)
+
+    def make_cv(self, hmac_data: str) -> str:
+        """
+        Returns the hex HMAC-SHA1 of the data with the version's HMAC key, as sent in the 'cv' attribute of <k>.
+        """
+        mac = self._hmac.copy()
+        mac.update(hmac_data.encode())
+        return binascii.hexlify(mac.digest()).decode()
+
+
+_profiles = {}  # type: dict[tuple[str, str], DeviceProfile]
+_profiles_lock = threading.Lock()
+
+
+def get_device_profile(version_info: dict = None) -> DeviceProfile:
+    """
+    Returns the shared profile of a version configuration, the emulated one (kik_version_info) by default.
+    """
+    version_info = version_info or kik_version_info
+    key = (version_info["kik_version"], version_info["classes_dex_sha1_digest"])
+    profile = _profiles.get(key)
+    if profile is None:
+        with _profiles_lock:
+            profile = _profiles.get(key)
+            if profile is None:
+                profile = _profiles[key] = DeviceProfile(version_info)
+    return profile
@@ -0,0 +1,85 @@
+"""
+Prepares outgoing images (see ParsingUtilities.parse_image) off the calling thread.
+
+Decoding, resizing, encoding and hashing an image holds the GIL for up to hundreds of milliseconds,
+so the work is done in a pool of worker threads. Pass a ProcessPoolExecutor (created before starting
+the client) to prepare a batch of images on several cores at once.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import threading
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Union
+
+from kik_unofficial.utilities.parsing_utilities import ParsingUtilities, get_file_bytes
+from kik_unofficial.utilities.threading_utils import new_worker_pool
+
+
+def prepare_image(file) -> dict:
+    """
+    Runs in the workers. Returns the parse_image() result of the file.
+    """
+    return ParsingUtilities.parse_image(file)
+
+
+class ImagePreparer:
+    """
+    Prepares images in a pool of workers.
+
+    :param executor: the executor to run parse_image in, e.g. a ProcessPoolExecutor you configured yourself.
+                     If not given, one is created on first use (see new_worker_pool()) and owned by the preparer.
+    :param max_workers: the number of workers of the created pool, defaults to the CPU count
+    """
+
+    def __init__(self, executor: Executor = None, max_workers: int = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Union[Executor, None] = executor
+        self._owns_executor = executor is None
+        self._lock = threading.Lock()
+
+    def submit(self, file) -> Future:
+        """
+        Starts preparing an image.
+
+        :param file: The path to the image file OR its bytes OR an IOBase object
+        :return: a future of the parse_image() result
+        """
+        if isinstance(file, io.IOBase) or hasattr(file, "getvalue"):
+            # file objects can't be sent to another process, their bytes can
+            file = get_file_bytes(file)
+        with self._lock:
+            if self._executor is None:
+                self._executor = new_worker_pool(self.max_workers, thread_name_prefix="Kik Image Preparation")
+            executor = self._executor
+        try:
+            return executor.submit(prepare_image, file)
+        except (BrokenProcessPool, RuntimeError):
+            # the pool broke or the interpreter is shutting down, prepare it in the calling thread
+            future = Future()
+            try:
+                future.set_result(prepare_image(file))
+            except Exception as e:
+                future.set_exception(e)
+            if self._owns_executor:
+                with self._lock:
+                    self._executor = None
+            return future
+
+    def prepare(self, file) -> dict:
+        """
+        Prepares an image in the pool and waits for the result.
+        """
+        return self.submit(file).result()
+
+    def shutdown(self) -> None:
+        """
+        Shuts down the pool if it was created by the preparer.
+        """
+        with self._lock:
+            if self._owns_executor and self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
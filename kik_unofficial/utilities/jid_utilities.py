@@ -1,4 +1,6 @@
 import re
+import sys
+from typing import Union
 
 pm_jid_re = re.compile("^[a-z_0-9\\.]{2,30}(_[a-z0-9]{3})?$")
 alias_jid_re = re.compile("^[a-z0-9_-]{52}_[ab]$")
@@ -116,6 +118,14 @@ def get_local_part(jid: str) -> str:
     return jid[: jid.rindex("@")]  # substring before the last '@'
 
 
+def intern_jid(jid: Union[str, None]) -> Union[str, None]:
+    """
+    Returns the interned copy of a JID, so that the many objects referring to the same user or group
+    (messages, group members, roster entries) share one string.
+    """
+    return sys.intern(str(jid)) if jid is not None else None
+
+
 def jid_to_username(jid: str) -> str:
     """
     Converts a real / PM JID to a username.
@@ -0,0 +1,213 @@
+"""
+A content-addressed cache of prepared outgoing images.
+
+Entries are keyed by the SHA-256 of the source file's bytes and hold the ParsingUtilities.parse_image() result,
+so sending the same image again skips decoding, resizing and hashing it. The content ID an image was uploaded
+under is remembered too: content messages reference uploads by ID (forwarded images do the same), so a new
+message can point at the earlier upload instead of uploading the file again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Union
+
+from kik_unofficial.utilities.parsing_utilities import get_file_bytes
+
+log = logging.getLogger(__name__)
+
+# the bytes entries of a parse_image() result, stored as files in the disk tier
+_BINARY_FIELDS = ("original", "image_bytes")
+_HASH_FIELDS = ("size", "SHA1", "SHA1Scaled", "blockhash", "MD5")
+
+
+class MediaCache:
+    """
+    Caches prepared images in memory, least recently used first out, and optionally on disk.
+
+    :param max_bytes: the memory budget, counted as the size of the encoded original and preview
+    :param directory: if set, entries are also written to this directory and read back on memory misses,
+                      which lets them survive restarts
+    :param max_disk_bytes: the disk budget, unlimited by default
+    :param reuse_uploads_for: seconds during which a previous upload of the same image is referenced instead of
+                              uploading it again. 0 disables it.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: str = None, max_disk_bytes: int = None, reuse_uploads_for: float = 24 * 3600):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.reuse_uploads_for = reuse_uploads_for
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # type: OrderedDict[str, dict]
+        self._uploads = {}  # type: dict[str, tuple[str, float]]
+        self._size = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key_of(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def lookup(self, file) -> tuple[str, bytes, Union[dict, None]]:
+        """
+        Reads the file and looks it up.
+
+        :param file: The path to the image file OR its bytes OR an IOBase object
+        :return: the key of the file, its bytes and the cached parse_image() result, or None on a miss
+        """
+        data = get_file_bytes(file)
+        key = self.key_of(data)
+        return key, data, self.get(key)
+
+    def get(self, key: str) -> Union[dict, None]:
+        with self._lock:
+            parsed = self._entries.get(key)
+            if parsed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return parsed
+        parsed = self._load(key) if self.directory else None
+        with self._lock:
+            if parsed is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, parsed)
+        return parsed
+
+    def put(self, key: str, parsed: dict) -> None:
+        """
+        Stores a parse_image() result under the key of its source bytes.
+        """
+        parsed = {field: value for field, value in parsed.items() if field != "timings"}
+        with self._lock:
+            self._remember(key, parsed)
+        if self.directory:
+            try:
+                self._store(key, parsed)
+            except OSError as e:
+                log.warning(f"Failed to write media cache entry {key}: {e}")
+
+    def get_uploaded_content_id(self, key: str) -> Union[str, None]:
+        """
+        Returns the content ID the image was uploaded under, if that upload can still be referenced.
+        """
+        if not self.reuse_uploads_for:
+            return None
+        with self._lock:
+            upload = self._uploads.get(key)
+        if upload is None and self.directory:
+            upload = self._load_upload(key)
+        if upload is None or time.time() - upload[1] > self.reuse_uploads_for:
+            return None
+        return upload[0]
+
+    def set_uploaded_content_id(self, key: str, content_id: str) -> None:
+        upload = (content_id, time.time())
+        with self._lock:
+            self._uploads[key] = upload
+        if self.directory:
+            try:
+                self._write_atomically(self._path(key, "upload.json"), json.dumps({"content_id": upload[0], "uploaded_at": upload[1]}).encode())
+            except OSError as e:
+                log.warning(f"Failed to write media cache upload {key}: {e}")
+
+    def clear(self) -> None:
+        """
+        Empties the memory tier. The disk tier is left alone.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._uploads.clear()
+            self._size = 0
+
+    def _remember(self, key: str, parsed: dict) -> None:
+        size = self._entry_size(parsed)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= self._entry_size(previous)
+        self._entries[key] = parsed
+        self._size += size
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= self._entry_size(evicted)
+
+    @staticmethod
+    def _entry_size(parsed: dict) -> int:
+        return sum(len(parsed[field]) for field in _BINARY_FIELDS)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def _load(self, key: str) -> Union[dict, None]:
+        try:
+            with open(self._path(key, "json")) as f:
+                parsed = json.load(f)
+            for field in _BINARY_FIELDS:
+                with open(self._path(key, f"{field}.jpg"), "rb") as f:
+                    parsed[field] = f.read()
+            os.utime(self._path(key, "json"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning(f"Ignoring unreadable media cache entry {key}: {e}")
+            return None
+        if any(field not in parsed for field in _HASH_FIELDS):
+            return None
+        return parsed
+
+    def _load_upload(self, key: str) -> Union[tuple[str, float], None]:
+        try:
+            with open(self._path(key, "upload.json")) as f:
+                data = json.load(f)
+            return data["content_id"], data["uploaded_at"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"Ignoring unreadable media cache upload {key}: {e}")
+            return None
+
+    def _store(self, key: str, parsed: dict) -> None:
+        # the metadata is written last, entries without it are treated as missing
+        for field in _BINARY_FIELDS:
+            self._write_atomically(self._path(key, f"{field}.jpg"), parsed[field])
+        metadata = {field: parsed[field] for field in _HASH_FIELDS}
+        self._write_atomically(self._path(key, "json"), json.dumps(metadata).encode())
+        if self.max_disk_bytes is not None:
+            self._trim_disk()
+
+    @staticmethod
+    def _write_atomically(path: str, data: bytes) -> None:
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+
+    def _trim_disk(self) -> None:
+        entries = {}  # key -> (last used, size)
+        for entry in os.scandir(self.directory):
+            key = entry.name.split(".", 1)[0]
+            stat = entry.stat()
+            last_used, size = entries.get(key, (0, 0))
+            entries[key] = (max(last_used, stat.st_mtime), size + stat.st_size)
+        total = sum(size for _, size in entries.values())
+        for key, (_, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_disk_bytes:
+                break
+            for suffix in ("json", "upload.json") + tuple(f"{field}.jpg" for field in _BINARY_FIELDS):
+                try:
+                    os.remove(self._path(key, suffix))
+                except FileNotFoundError:
+                    pass
+            total -= size
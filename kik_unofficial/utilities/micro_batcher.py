@@ -0,0 +1,151 @@
+"""
+The lookup batching shared by PeerInfoBatcher and XiphiasUserResolver: lookups made within a short window are sent
+as one request per request type, and each lookup resolves through a Future once its request is answered.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Union
+
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPElement
+
+
+class MicroBatcher:
+    """
+    A key already waiting or in flight shares its lookup. Subclasses answer from their cache in _get_cached_locked(),
+    and complete the lookups of a response with _complete_locked().
+
+    :param send: sends an XMPP element to kik, e.g. KikClient._send_xmpp_element, which may wait for a connection
+    :param window: the seconds lookups are collected for before their request is sent
+    :param max_batch_size: the request is sent as soon as it has this many keys
+    :param timeout: the seconds to wait for a response once the request was sent,
+                    its lookups then fail with a TimeoutError and can be retried
+    """
+
+    timer_name = "Kik Micro Batcher"
+
+    def __init__(self, send: Callable[[XMPPElement], object], window: float, max_batch_size: int, timeout: float):
+        self.send = send
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self.requests_sent = 0
+        self._pending = {}  # type: dict[type, list[str]]  # request type -> keys waiting for the next request
+        self._futures = {}  # type: dict[str, Future]  # keys waiting or in flight
+        # request ID -> keys and their timeout, which is None until the request was sent
+        self._batches = {}  # type: dict[str, tuple[list[str], Union[threading.Timer, None]]]
+        self._timer: Union[threading.Timer, None] = None
+        self._lock = threading.Lock()
+
+    def flush(self) -> None:
+        """
+        Sends the lookups collected so far without waiting for the window to end.
+        """
+        with self._lock:
+            batches = [(request_type, self._take_batch_locked(request_type)) for request_type in self._pending]
+        for request_type, keys in batches:
+            if keys:
+                self._send(request_type, keys)
+
+    def on_error(self, request_id: str, exception: Exception) -> None:
+        with self._lock:
+            futures = [self._futures.pop(key, None) for key in self._pop_batch_locked(request_id)]
+        self._fail(futures, exception)
+
+    def fail_in_flight(self, exception: Exception) -> None:
+        """
+        Fails the lookups whose request was sent, e.g. when the connection was lost and their responses won't come.
+        Lookups whose request is still waiting for a connection, or for its window, are sent once the client is
+        connected again.
+        """
+        with self._lock:
+            sent = [request_id for request_id, (_, timer) in self._batches.items() if timer is not None]
+            futures = [self._futures.pop(key, None) for request_id in sent for key in self._pop_batch_locked(request_id)]
+        self._fail(futures, exception)
+
+    def _submit(self, request_type: type, key: str) -> Future:
+        batch = None
+        with self._lock:
+            result = self._get_cached_locked(key)
+            if result is not None:
+                future = Future()
+                future.set_result(result)
+                return future
+            future = self._futures.get(key)
+            if future is not None:
+                return future
+            future = self._futures[key] = Future()
+            pending = self._pending.setdefault(request_type, [])
+            pending.append(key)
+            if len(pending) >= self.max_batch_size:
+                batch = self._take_batch_locked(request_type)
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.name = self.timer_name
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._send(request_type, batch)
+        return future
+
+    def _get_cached_locked(self, key: str) -> object:
+        return None
+
+    def _batch_keys_locked(self, request_id: str) -> list[str]:
+        return self._batches.get(request_id, ([], None))[0]
+
+    def _complete_locked(self, request_id: str, results: dict) -> list[tuple[Future, object]]:
+        # the results are answered even if another request asked for them, the keys left unanswered resolve to None
+        keys = self._pop_batch_locked(request_id)
+        return [(self._futures.pop(key, None), results.get(key)) for key in set(keys) | results.keys()]
+
+    def _on_timeout(self, request_id: str) -> None:
+        self.on_error(request_id, TimeoutError(f"No response to request {request_id} in {self.timeout} seconds"))
+
+    def _pop_batch_locked(self, request_id: str) -> list[str]:
+        keys, timer = self._batches.pop(request_id, ([], None))
+        if timer is not None:
+            timer.cancel()
+        return keys
+
+    def _take_batch_locked(self, request_type: type) -> list[str]:
+        batch, self._pending[request_type] = self._pending[request_type], []
+        if self._timer is not None and not any(self._pending.values()):
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _send(self, request_type: type, batch: list[str]) -> None:
+        request = request_type(batch)
+        with self._lock:
+            self._batches[request.message_id] = (batch, None)
+            self.requests_sent += 1
+        try:
+            self.send(request)
+        except Exception as e:
+            self.on_error(request.message_id, e)
+            return
+
+        # the deadline starts once the request is sent, not while it waits for a connection
+        timer = threading.Timer(self.timeout, self._on_timeout, (request.message_id,))
+        timer.name = f"{self.timer_name} Timeout"
+        timer.daemon = True
+        with self._lock:
+            if request.message_id not in self._batches:
+                return  # already answered
+            self._batches[request.message_id] = (batch, timer)
+        timer.start()
+
+    @staticmethod
+    def _resolve(futures: list[tuple[Future, object]]) -> None:
+        for future, result in futures:
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(futures: list, exception: Exception) -> None:
+        for future in futures:
+            if future is not None and not future.done():
+                future.set_exception(exception)
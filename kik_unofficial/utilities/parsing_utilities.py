@@ -3,13 +3,14 @@ import pathlib
 import io
 import os
 import hashlib
-import uuid
+import time
 from typing import Union
+from urllib.parse import urlsplit
 
 from PIL import Image
 from bs4 import Tag
 
-from kik_unofficial.utilities.blockhash import blockhash
+from kik_unofficial.utilities.blockhash import fast_blockhash
 
 
 def get_file_bytes(file_location: str or bytes or pathlib.Path or io.IOBase):
@@ -27,6 +28,18 @@ def get_file_bytes(file_location: str or bytes or pathlib.Path or io.IOBase):
     return data
 
 
+def is_kik_platform_url(url: str) -> bool:
+    """
+    Returns true if the URL points at kik's content platform (https://platform.kik.com), which hosts the files of
+    content messages. Compares the parsed host, so neither user info nor a longer host name can spoof it.
+    """
+    try:
+        parts = urlsplit(url)
+        return parts.scheme == "https" and parts.hostname == "platform.kik.com" and parts.port in (None, 443)
+    except ValueError:
+        return False
+
+
 def get_text_of_tag(element: Tag, tag: str, default: Union[str, None] = None) -> Union[str, None]:
     """
     Returns the text of a direct child, if present.
@@ -106,50 +119,69 @@ class ParsingUtilities:
     def parse_image(file_location: str or bytes or pathlib.Path or io.IOBase) -> dict:
         """
         Converts images to .jpg and compresses/upscales them so that large image files can be sent after compression.
+
+        The source is decoded once (JPEGs at the smallest scale that still covers 1600 px), the preview is derived
+        from the 1600 px image, and the hashes are computed straight from the encoded buffers.
+        The seconds spent in each stage are returned under "timings".
         """
-        preview_out = io.BytesIO()
-        image_out = io.BytesIO()
-        image_out.name = f"{str(uuid.uuid4())}.jpg"
+        timings = {}
+        stage_started = time.perf_counter()
 
-        file_location = get_file_bytes(file_location)
-        if isinstance(file_location, bytes):
-            file_location = io.BytesIO(file_location)
+        def end_stage(name):
+            nonlocal stage_started
+            now = time.perf_counter()
+            timings[name] = now - stage_started
+            stage_started = now
 
-        img = Image.open(file_location)
+        file_location = get_file_bytes(file_location)
+        img = Image.open(io.BytesIO(file_location))
         width, height = img.size
         larger_dim = max(height, width)
-        if img.mode != "RGB":
-            img = img.convert("RGB")
         ratio = larger_dim / 1600
-        image = img.resize((round(width / ratio), round(height / ratio)))
+        image_size = (round(width / ratio), round(height / ratio))
         preview_ratio = larger_dim / 400
-        preview_image = img.resize((round(width / preview_ratio), round(height / preview_ratio)))
+        preview_size = (round(width / preview_ratio), round(height / preview_ratio))
+        if img.format == "JPEG":
+            # let the decoder downscale by up to 8x instead of decoding every pixel of a large photo
+            img.draft("RGB", image_size)
+        img.load()
+        end_stage("decode")
 
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        image = img.resize(image_size) if img.size != image_size else img
+        preview_image = image.resize(preview_size)
+        end_stage("resize")
+
+        image_out = io.BytesIO()
+        preview_out = io.BytesIO()
         image.save(image_out, format="JPEG")
         preview_image.save(preview_out, format="JPEG")
-
-        size = image_out.tell()
         final_og = image_out.getvalue()
         final_pre = preview_out.getvalue()
+        end_stage("encode")
 
-        image_bytes = get_file_bytes(final_pre)
-        sha1_og = ParsingUtilities.read_file_as_sha1(final_og)
-        sha1_scaled = ParsingUtilities.read_file_as_sha1(final_pre)
-        block_scaled = blockhash(preview_image, 16)
+        sha1_og = hashlib.sha1(final_og).hexdigest()
+        sha1_scaled = hashlib.sha1(final_pre).hexdigest()
         md5 = hashlib.md5(final_og).hexdigest()
-        image_out.close()
-        preview_out.close()
+        end_stage("hash")
+
+        block_scaled = fast_blockhash(preview_image, 16)
+        end_stage("blockhash")
+
         preview_image.close()
+        image.close()
         img.close()
 
         return {
-            "image_bytes": image_bytes,
-            "size": size,
+            "image_bytes": final_pre,
+            "size": len(final_og),
             "original": final_og,
             "SHA1": sha1_og,
             "SHA1Scaled": sha1_scaled,
             "blockhash": block_scaled,
             "MD5": md5,
+            "timings": timings,
         }
 
     @staticmethod
@@ -0,0 +1,161 @@
+"""
+A bounded cache of the users a client has learned about (through peer info and xiphias responses),
+indexed for constant time lookups by JID, username and alias JID.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Union
+
+log = logging.getLogger(__name__)
+
+
+class _CacheEntry:
+    __slots__ = ("jid", "username", "alias_jid", "user", "expires_at")
+
+    def __init__(self, jid: str, username: Union[str, None], alias_jid: Union[str, None], user, expires_at: float):
+        self.jid = jid
+        self.username = username
+        self.alias_jid = alias_jid
+        self.user = user  # None for entries loaded from disk, which only know the JID and username
+        self.expires_at = expires_at
+
+
+class PeerCache:
+    """
+    Users are indexed by JID, lowercase username and alias JID. Any object with `jid` and `username`
+    attributes (and optionally `alias_jid`) can be cached, e.g. User or xiphias' UsersResponseUser.
+
+    :param max_entries: the number of users kept, least recently used first out
+    :param ttl: the seconds a user is kept for, forever by default
+    :param path: a JSON file that the JIDs and usernames are loaded from, and saved to by save()
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = None, path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # type: OrderedDict[str, _CacheEntry]
+        self._jids_by_username = {}  # type: dict[str, str]
+        self._jids_by_alias = {}  # type: dict[str, str]
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def add(self, user) -> None:
+        self.add_all([user])
+
+    def add_all(self, users: Iterable) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            for user in users:
+                if user.jid:
+                    self._put(_CacheEntry(user.jid, user.username or None, getattr(user, "alias_jid", None), user, expires_at))
+
+    def get(self, jid: str):
+        """
+        Returns the cached user with this JID or alias JID, or None.
+        """
+        with self._lock:
+            entry = self._lookup(jid) or self._lookup(self._jids_by_alias.get(jid))
+            user = entry.user if entry else None
+            self._count(user is not None)
+            return user
+
+    def get_jid_by_username(self, username: str) -> Union[str, None]:
+        with self._lock:
+            entry = self._lookup(self._jids_by_username.get(username.lower()))
+            self._count(entry is not None)
+            return entry.jid if entry else None
+
+    def get_jid_by_alias(self, alias_jid: str) -> Union[str, None]:
+        with self._lock:
+            entry = self._lookup(self._jids_by_alias.get(alias_jid))
+            self._count(entry is not None)
+            return entry.jid if entry else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, jid: str):
+        with self._lock:
+            return self._lookup(jid) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._jids_by_username.clear()
+            self._jids_by_alias.clear()
+
+    def save(self, path: str = None) -> None:
+        """
+        Saves the JIDs, usernames and alias JIDs, so that a later PeerCache can start warm.
+        """
+        path = path or self.path
+        with self._lock:
+            data = [[entry.jid, entry.username, entry.alias_jid] for entry in self._entries.values()]
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary_path, path)
+
+    def load(self, path: str) -> None:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"Ignoring unreadable peer cache file {path}: {e}")
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            for jid, username, alias_jid in data:
+                self._put(_CacheEntry(jid, username, alias_jid, None, expires_at))
+
+    def _put(self, entry: _CacheEntry) -> None:
+        previous = self._entries.get(entry.jid)
+        if previous:
+            # responses don't always carry the username or the alias, keep the ones known
+            entry.username = entry.username or previous.username
+            entry.alias_jid = entry.alias_jid or previous.alias_jid
+        self._remove(entry.jid)
+        self._entries[entry.jid] = entry
+        if entry.username:
+            self._jids_by_username[entry.username.lower()] = entry.jid
+        if entry.alias_jid:
+            self._jids_by_alias[entry.alias_jid] = entry.jid
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, jid: str) -> None:
+        entry = self._entries.pop(jid, None)
+        if entry is None:
+            return
+        # the indexes may already point at a newer entry of the same username or alias
+        if entry.username and self._jids_by_username.get(entry.username.lower()) == jid:
+            del self._jids_by_username[entry.username.lower()]
+        if entry.alias_jid and self._jids_by_alias.get(entry.alias_jid) == jid:
+            del self._jids_by_alias[entry.alias_jid]
+
+    def _lookup(self, jid: Union[str, None]) -> Union[_CacheEntry, None]:
+        entry = self._entries.get(jid) if jid else None
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._remove(jid)
+            return None
+        self._entries.move_to_end(jid)
+        return entry
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
@@ -0,0 +1,63 @@
+"""
+Collects single-user peer info lookups for a short window and sends them as one kik:iq:friend:batch request.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+from typing import Callable
+
+from kik_unofficial.datatypes.peers import User
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPElement
+from kik_unofficial.datatypes.xmpp.roster import FriendBatchResponse, PeersInfoRequest
+from kik_unofficial.utilities import jid_utilities
+from kik_unofficial.utilities.micro_batcher import MicroBatcher
+from kik_unofficial.utilities.peer_cache import PeerCache
+
+MAX_BATCH_SIZE = 50  # the most JIDs a PeersInfoRequest takes
+
+
+class PeerInfoBatcher(MicroBatcher):
+    """
+    Users fresh in the peer cache are answered right away, and a JID already waiting or in flight shares its lookup.
+
+    :param send: sends an XMPP element to kik, e.g. KikClient._send_xmpp_element
+    :param peer_cache: the cache checked before requesting a user
+    :param window: the seconds lookups are collected for before their batch is sent
+    :param max_batch_size: the batch is sent as soon as it has this many JIDs
+    :param timeout: the seconds to wait for a response once the batch was sent,
+                    its lookups then fail with a TimeoutError and can be retried
+    """
+
+    timer_name = "Kik Peer Info Batcher"
+
+    def __init__(
+        self,
+        send: Callable[[XMPPElement], object],
+        peer_cache: PeerCache,
+        window: float = 0.05,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        timeout: float = 30,
+    ):
+        if not 0 < max_batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        super().__init__(send, window, max_batch_size, timeout)
+        self.peer_cache = peer_cache
+
+    def request(self, peer_jid: str) -> Future:
+        """
+        :return: a future of the User, or of None if kik doesn't know the JID
+        """
+        if not (jid_utilities.is_pm_jid(peer_jid) or jid_utilities.is_alias_jid(peer_jid)):
+            raise ValueError(f"Invalid JID {peer_jid}, must be a valid user JID")
+        user = self.peer_cache.get(peer_jid)
+        if isinstance(user, User):
+            future = Future()
+            future.set_result(user)
+            return future
+        return self._submit(PeersInfoRequest, peer_jid)
+
+    def on_response(self, response: FriendBatchResponse) -> None:
+        with self._lock:
+            futures = self._complete_locked(response.message_id, {user.jid: user for user in response.users})
+        self._resolve(futures)
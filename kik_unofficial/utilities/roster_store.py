@@ -0,0 +1,164 @@
+"""
+Keeps the roster (users and groups) between connections and restarts, synced incrementally with the ts/mts page tokens.
+
+Roster entries are stored as the XML Kik sent them, in SQLite, and parsed again only when they're read.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import Union
+
+from bs4 import BeautifulSoup
+
+from kik_unofficial.datatypes.peers import Group, Peer, RosterUser
+from kik_unofficial.datatypes.xmpp.roster import FetchRosterResponse
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS peers (jid TEXT PRIMARY KEY, kind TEXT NOT NULL, xml TEXT NOT NULL, generation INTEGER NOT NULL);
+"""
+
+_PEER_ELEMENTS = {"item": "user", "g": "group"}
+
+
+class RosterStore:
+    """
+    The roster of one account.
+
+    A sync without page tokens fetches the whole roster: it starts a new generation, and once its last page
+    arrived, entries that weren't in it are dropped. Later syncs send the stored tokens and only get changes.
+
+    :param path: the SQLite database file, keep one per account. By default the roster is only kept in memory.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._peers = {}  # type: dict[str, Peer]  # parsed entries
+
+    @property
+    def timestamp(self) -> Union[str, None]:
+        return self._get_meta("ts")
+
+    @property
+    def mts(self) -> Union[str, None]:
+        return self._get_meta("mts")
+
+    @property
+    def more(self) -> bool:
+        """
+        True if the last page received announced another one.
+        """
+        return self._get_meta("more") == "1"
+
+    def next_request_tokens(self) -> tuple[bool, Union[str, None], Union[str, None]]:
+        """
+        :return: the is_batched, timestamp and mts arguments of the next roster request
+        """
+        return self.more, self.timestamp, self.mts
+
+    def apply(self, response: FetchRosterResponse) -> None:
+        """
+        Applies a page of roster changes and stores its page tokens.
+        If the response asks for a full refresh, the tokens are dropped instead.
+        """
+        with self._lock, self._connection:
+            if response.is_roster_full:
+                self._connection.execute("DELETE FROM meta WHERE key IN ('ts', 'mts', 'more')")
+                return
+
+            if not self._get_meta_locked("ts") and self._get_meta_locked("more") != "1":
+                # no tokens were sent, this is the first page of a full sync
+                self._set_meta_locked("generation", str(self._generation() + 1))
+            generation = self._generation()
+
+            rows = []
+            for element in response.raw_element.query.find_all(_PEER_ELEMENTS.keys(), recursive=False):
+                if "jid" in element.attrs:
+                    rows.append((element["jid"], _PEER_ELEMENTS[element.name], str(element), generation))
+                    self._peers.pop(element["jid"], None)
+            self._connection.executemany("INSERT OR REPLACE INTO peers (jid, kind, xml, generation) VALUES (?, ?, ?, ?)", rows)
+
+            removed = response.removed_users + response.removed_groups
+            self._connection.executemany("DELETE FROM peers WHERE jid = ?", [(jid,) for jid in removed])
+            for jid in removed:
+                self._peers.pop(jid, None)
+
+            if not response.more:
+                # entries not seen during the last full sync are gone
+                stale = self._connection.execute("SELECT jid FROM peers WHERE generation < ?", (generation,)).fetchall()
+                if stale:
+                    self._connection.execute("DELETE FROM peers WHERE generation < ?", (generation,))
+                    for (jid,) in stale:
+                        self._peers.pop(jid, None)
+
+            self._set_meta_locked("ts", response.timestamp)
+            self._set_meta_locked("mts", response.mts)
+            self._set_meta_locked("more", "1" if response.more else "0")
+
+    def get_peer(self, jid: str) -> Union[Peer, None]:
+        with self._lock:
+            peer = self._peers.get(jid)
+            if peer is None:
+                row = self._connection.execute("SELECT kind, xml FROM peers WHERE jid = ?", (jid,)).fetchone()
+                if row is None:
+                    return None
+                peer = self._peers[jid] = self._parse(*row)
+            return peer
+
+    def get_jids(self, kind: str = None) -> list[str]:
+        """
+        :param kind: "user" or "group" to only get those, both by default
+        """
+        with self._lock:
+            if kind:
+                rows = self._connection.execute("SELECT jid FROM peers WHERE kind = ?", (kind,))
+            else:
+                rows = self._connection.execute("SELECT jid FROM peers")
+            return [jid for (jid,) in rows]
+
+    def get_users(self) -> list[RosterUser]:
+        return [self.get_peer(jid) for jid in self.get_jids("user")]
+
+    def get_groups(self) -> list[Group]:
+        return [self.get_peer(jid) for jid in self.get_jids("group")]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM peers").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM peers")
+            self._connection.execute("DELETE FROM meta")
+            self._peers.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _parse(kind: str, xml: str) -> Peer:
+        element = BeautifulSoup(xml, "xml").find(recursive=False)
+        return RosterUser(element) if kind == "user" else Group(element)
+
+    def _generation(self) -> int:
+        return int(self._get_meta_locked("generation") or 0)
+
+    def _get_meta(self, key: str) -> Union[str, None]:
+        with self._lock:
+            return self._get_meta_locked(key)
+
+    def _get_meta_locked(self, key: str) -> Union[str, None]:
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta_locked(self, key: str, value: Union[str, None]) -> None:
+        if value is None:
+            self._connection.execute("DELETE FROM meta WHERE key = ?", (key,))
+        else:
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
@@ -1,4 +1,18 @@
+import os
 import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+
+def new_worker_pool(max_workers: int = None, thread_name_prefix: str = "") -> Executor:
+    """
+    Returns a pool of worker threads for CPU-bound work, one per CPU by default.
+
+    The pools are created from inside a running client, so forking worker processes then would copy a process
+    whose other threads may hold locks. Callers that want worker processes pass an executor they created
+    themselves, before starting any client.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    return ThreadPoolExecutor(max_workers, thread_name_prefix=thread_name_prefix)
 
 
 def run_in_new_thread(fn):
@@ -0,0 +1,192 @@
+"""
+Recording of the raw inbound XMPP byte stream.
+
+A capture file starts with the MAGIC header, followed by records of the form
+<kind: uint8><timestamp: float64, unix seconds><length: uint32><payload>, little endian.
+CONNECT records carry "host:port", DATA records carry the bytes exactly as read from the socket,
+and DISCONNECT records have no payload. Files ending with ".gz" are gzip compressed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import ssl
+import struct
+import threading
+import time
+from asyncio import StreamReader, StreamWriter
+from typing import BinaryIO, Iterator
+
+MAGIC = b"KIKWIRE1"
+RECORD_HEADER = struct.Struct("<BdI")
+
+CONNECT = 1
+DATA = 2
+DISCONNECT = 3
+
+STREAM_LIMIT = 2**16  # same as asyncio.open_connection
+
+
+def _open(path: str, mode: str) -> BinaryIO:
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+class WireCaptureWriter:
+    """
+    Appends inbound traffic to a capture file. Safe to share between connections of the same client.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = _open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+
+    def connected(self, host: str, port: int) -> None:
+        self._write(CONNECT, f"{host}:{port}".encode())
+
+    def data_received(self, data: bytes) -> None:
+        self._write(DATA, data)
+
+    def disconnected(self) -> None:
+        self._write(DISCONNECT, b"")
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def _write(self, kind: int, payload: bytes) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(RECORD_HEADER.pack(kind, time.time(), len(payload)))
+                self._file.write(payload)
+
+
+class WireCaptureRecord:
+    def __init__(self, kind: int, timestamp: float, payload: bytes):
+        self.kind = kind
+        self.timestamp = timestamp
+        self.payload = payload
+
+    def __repr__(self):
+        return f"WireCaptureRecord(kind={self.kind}, timestamp={self.timestamp}, length={len(self.payload)})"
+
+
+def read_capture(path: str) -> Iterator[WireCaptureRecord]:
+    """
+    Iterates over the records of a capture file.
+    """
+    with _open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a wire capture file")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) < RECORD_HEADER.size:
+                # the client was killed in the middle of a write
+                return
+            kind, timestamp, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield WireCaptureRecord(kind, timestamp, payload)
+
+
+def read_connections(path: str) -> list[list[WireCaptureRecord]]:
+    """
+    Splits a capture file into connections, each a list of its DATA records.
+    """
+    connections = []
+    current = None
+    for record in read_capture(path):
+        if record.kind == CONNECT:
+            current = []
+            connections.append(current)
+        elif record.kind == DATA:
+            if current is None:
+                current = []
+                connections.append(current)
+            current.append(record)
+        elif record.kind == DISCONNECT:
+            current = None
+    return connections
+
+
+class CapturingStreamReader(StreamReader):
+    """
+    A StreamReader that records every chunk read from the socket before it is parsed.
+    """
+
+    def __init__(self, capture: WireCaptureWriter, limit: int = STREAM_LIMIT):
+        super().__init__(limit=limit)
+        self.capture = capture
+
+    def feed_data(self, data: bytes) -> None:
+        self.capture.data_received(bytes(data))
+        super().feed_data(data)
+
+
+async def open_capturing_connection(host: str, port: int, ssl_context: ssl.SSLContext, capture: WireCaptureWriter) -> tuple[StreamReader, StreamWriter]:
+    """
+    Same as asyncio.open_connection(), but the inbound stream is recorded to `capture`.
+    """
+    loop = asyncio.get_running_loop()
+    reader = CapturingStreamReader(capture)
+    protocol = asyncio.StreamReaderProtocol(reader)
+    transport, _ = await loop.create_connection(lambda: protocol, host, port, ssl=ssl_context)
+    capture.connected(host, port)
+    writer = StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+async def _feed(reader: StreamReader, records: list[WireCaptureRecord], realtime: bool) -> None:
+    previous = records[0].timestamp if records else 0
+    for record in records:
+        if realtime and record.timestamp > previous:
+            await asyncio.sleep(record.timestamp - previous)
+        previous = record.timestamp
+        reader.feed_data(record.payload)
+    reader.feed_eof()
+
+
+async def _replay_stanzas(path: str, log, realtime: bool) -> list[tuple[int, object]]:
+    from kik_unofficial.parser.parser import KikXmlParser
+
+    stanzas = []
+    for index, records in enumerate(read_connections(path)):
+        reader = StreamReader(limit=STREAM_LIMIT)
+        # the parser reads while the data is fed, as it does from a socket
+        feeder = asyncio.create_task(_feed(reader, records, realtime))
+        parser = KikXmlParser(reader, log)
+        try:
+            stanzas.append((index, await parser.read_initial_k()))
+            while True:
+                stanzas.append((index, await parser.read_next_stanza()))
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            # e.g. the stream being closed with </k>
+            log.debug("Replay of connection %s ended: %r", index, e)
+        finally:
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
+    return stanzas
+
+
+def replay_stanzas(path: str, log, realtime: bool = False) -> list[tuple[int, object]]:
+    """
+    Feeds a capture through KikXmlParser without any network or client involved.
+    Useful for parser benchmarks and for checking parser changes against real-world traffic.
+
+    :param path: the capture file
+    :param log: the logger handed to the parser
+    :param realtime: if True, data is fed with the delays it was recorded with
+    :return: a list of (connection index, parsed stanza) pairs, starting with each connection's <k> element
+    """
+    return asyncio.run(_replay_stanzas(path, log, realtime))
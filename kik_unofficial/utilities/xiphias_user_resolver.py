@@ -0,0 +1,100 @@
+"""
+Resolves user JIDs and public group alias JIDs through xiphias, collecting the lookups made within a short window
+into one GetUsers or GetUsersByAlias call, and caching the results.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Union
+
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPElement
+from kik_unofficial.datatypes.xmpp.xiphias import UsersByAliasRequest, UsersByAliasResponse, UsersRequest, UsersResponse, UsersResponseUser
+from kik_unofficial.utilities import jid_utilities
+from kik_unofficial.utilities.micro_batcher import MicroBatcher
+
+MAX_BATCH_SIZE = 50
+
+
+class XiphiasUserResolver(MicroBatcher):
+    """
+    Results are cached under both the alias JID and the real JID they carry, and a JID already waiting
+    or in flight shares its lookup.
+
+    :param send: sends an XMPP element to kik, e.g. KikClient._send_xmpp_element
+    :param ttl: the seconds a resolved user is reused for
+    :param max_entries: the number of JIDs cached, least recently used first out
+    :param window: the seconds lookups are collected for before their call is sent
+    :param max_batch_size: the call is sent as soon as it has this many JIDs
+    :param timeout: the seconds to wait for a response once the call was sent,
+                    its lookups then fail with a TimeoutError and can be retried
+    """
+
+    timer_name = "Kik Xiphias User Resolver"
+
+    def __init__(
+        self,
+        send: Callable[[XMPPElement], object],
+        ttl: float = 600,
+        max_entries: int = 10000,
+        window: float = 0.05,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        timeout: float = 30,
+    ):
+        super().__init__(send, window, max_batch_size, timeout)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # type: OrderedDict[str, tuple[float, UsersResponseUser]]
+
+    def resolve(self, jid: str) -> Future:
+        """
+        :param jid: a user JID, or the alias JID of a public group member (e.g. IncomingGroupChatMessage.alias_sender)
+        :return: a future of the UsersResponseUser, or of None if kik returned nothing for the JID
+        """
+        if jid_utilities.is_alias_jid(jid):
+            return self._submit(UsersByAliasRequest, jid)
+        elif jid_utilities.is_pm_jid(jid):
+            return self._submit(UsersRequest, jid)
+        raise ValueError(f"Invalid JID {jid}, must be a valid user or alias JID")
+
+    def get_cached(self, jid: str) -> Union[UsersResponseUser, None]:
+        with self._lock:
+            return self._get_cached_locked(jid)
+
+    def on_response(self, response: Union[UsersResponse, UsersByAliasResponse]) -> None:
+        results = {}  # type: dict[str, UsersResponseUser]
+        with self._lock:
+            if isinstance(response, UsersByAliasResponse):
+                jids = self._batch_keys_locked(response.message_id)
+                for payload, user in zip(response.message.payloads, response.users):
+                    alias_jid = user.alias_jid or (jids[payload.request_index] if payload.request_index < len(jids) else None)
+                    if alias_jid:
+                        results[alias_jid] = user
+            for user in response.users:
+                if user.jid:
+                    results[user.jid] = user
+
+            expires_at = time.monotonic() + self.ttl
+            for jid, user in results.items():
+                self._cache[jid] = (expires_at, user)
+                self._cache.move_to_end(jid)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            futures = self._complete_locked(response.message_id, results)
+        self._resolve(futures)
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _get_cached_locked(self, jid: str) -> Union[UsersResponseUser, None]:
+        cached = self._cache.get(jid)
+        if cached is None:
+            return None
+        if cached[0] < time.monotonic():
+            del self._cache[jid]
+            return None
+        self._cache.move_to_end(jid)
+        return cached[1]
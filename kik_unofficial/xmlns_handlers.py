@@ -54,16 +54,28 @@ class XMPPChatMessageHandler(XmppHandler):
         if app_id == "com.kik.cards":
             self.callback.on_card_received(chatting.IncomingCardMessage(data))
         elif app_id in ["com.kik.ext.gallery", "com.kik.ext.camera"]:
-            self.callback.on_image_received(chatting.IncomingImageMessage(data))
+            message = chatting.IncomingImageMessage(data)
+            self.prefetch_media(message)
+            self.callback.on_image_received(message)
         elif app_id == "com.kik.ext.gif":
             self.callback.on_gif_received(chatting.IncomingGifMessage(data))
         elif app_id == "com.kik.ext.stickers":
             self.callback.on_group_sticker(chatting.IncomingGroupSticker(data))
         elif app_id in ["com.kik.ext.video-camera", "com.kik.ext.video-gallery"]:
-            self.callback.on_video_received(chatting.IncomingVideoMessage(data))
+            message = chatting.IncomingVideoMessage(data)
+            self.prefetch_media(message)
+            self.callback.on_video_received(message)
         else:
             log.debug(f"[-] Received unknown content message. contents: {str(data)}")
 
+    def prefetch_media(self, message):
+        media_fetcher = self.client.media_fetcher
+        if media_fetcher:
+            try:
+                media_fetcher.maybe_prefetch(message)
+            except Exception as e:
+                log.warning(f"[-] Failed to start prefetching content {message.content_id}: {e}")
+
 
 class XMPPGroupChatMessageHandler(XMPPChatMessageHandler):
     def handle(self, data: BeautifulSoup):
@@ -150,7 +162,10 @@ class RegisterOrLoginResponseHandler(XmppHandler):
 
 class RosterResponseHandler(XmppHandler):
     def handle(self, data: BeautifulSoup):
-        self.callback.on_roster_received(FetchRosterResponse(data))
+        response = FetchRosterResponse(data)
+        if self.client.roster_store is not None:
+            self.client._on_roster_page(response)
+        self.callback.on_roster_received(response)
 
 
 class PeersInfoResponseHandler(XmppHandler):
@@ -162,12 +177,15 @@ class PeersInfoResponseHandler(XmppHandler):
         elif xmlns == "kik:iq:friend:batch":
             peers_info = FriendBatchResponse(data)
         else:
+            # no such username
+            self.client._resolve_username_lookups(data.get("id"), [])
             return
 
-        # add this user to the list of known users if it wasn't encountered before
-        for peer_info in peers_info.users:
-            self.client._known_users_information.add(peer_info)
-        self.client._new_user_added_event.set()
+        # remember these users to resolve their usernames later
+        self.client.peer_cache.add_all(peers_info.users)
+        self.client._resolve_username_lookups(data.get("id"), peers_info.users)
+        if xmlns == "kik:iq:friend:batch":
+            self.client.peer_info_batcher.on_response(peers_info)
 
         self.callback.on_peer_info_received(peers_info)
 
@@ -176,9 +194,15 @@ class XiphiasHandler(XmppHandler):
     def handle(self, data: BeautifulSoup):
         method = data.query["method"]
         if method == "GetUsers":
-            self.callback.on_xiphias_get_users_response(UsersResponse(data))
+            response = UsersResponse(data)
+            self.client.peer_cache.add_all(response.users)
+            self.client.xiphias_user_resolver.on_response(response)
+            self.callback.on_xiphias_get_users_response(response)
         elif method == "GetUsersByAlias":
-            self.callback.on_xiphias_get_users_response(UsersByAliasResponse(data))
+            response = UsersByAliasResponse(data)
+            self.client.peer_cache.add_all(response.users)
+            self.client.xiphias_user_resolver.on_response(response)
+            self.callback.on_xiphias_get_users_response(response)
         elif method == "FindGroups":
             self.callback.on_group_search_response(GroupSearchResponse(data))
         else:
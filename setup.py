@@ -36,9 +36,8 @@ setup(
         "unofficial",
         "python",
     ],
-    packages=find_packages(exclude=["docs", "test"]),
+    packages=find_packages(exclude=["docs", "test", "benchmarks"]),
     install_requires=[
-        "pbkdf2",
         "rsa",
         "lxml",
         "bs4",
@@ -53,7 +52,7 @@ setup(
         "beautifulsoup4~=4.12.2",
         "colorama",
     ],
-    extras_require={"dev": [], "test": []},
-    package_data={"kik_unofficial": []},
+    extras_require={"dev": [], "test": ["pytest"], "fast": ["cryptography", "numpy"]},
+    package_data={"kik_unofficial": ["mock_server/*.pem"]},
     entry_points={"console_scripts": ["kikapi=kik_unofficial.cmdline:execute"]},
 )
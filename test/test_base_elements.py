@@ -0,0 +1,46 @@
+import gc
+import weakref
+
+import pytest
+from bs4 import BeautifulSoup
+
+from kik_unofficial.datatypes.xmpp.base_elements import XMPPResponse
+from kik_unofficial.datatypes.xmpp.chatting import IncomingErrorMessage, IncomingImageMessage
+
+IMAGE_MESSAGE = (
+    '<message type="chat" id="2b4f8e4c-9f7e-4a55-9a3f-0c8f6b6a1e21" from="friend_a1b@talk.kik.com" to="mockbot_a1b@talk.kik.com">'
+    '<content id="7a4a4c3e-6a5e-4d51-9a43-4f7f0f2e8b10" app-id="com.kik.ext.gallery" v="2">'
+    "<strings><app-name>Gallery</app-name><file-url>https://platform.kik.com/content/files/7a4a4c3e</file-url></strings>"
+    "<images><preview>aGVsbG8=</preview></images>"
+    "</content></message>"
+)
+ERROR_MESSAGE = (
+    '<message type="error" id="2b4f8e4c-9f7e-4a55-9a3f-0c8f6b6a1e22" from="friend_a1b@talk.kik.com">'
+    '<error code="500" type="wait"><text>try again</text></error></message>'
+)
+
+
+@pytest.fixture
+def released_trees():
+    XMPPResponse.retain_raw_element = False
+    yield
+    XMPPResponse.retain_raw_element = True
+
+
+@pytest.mark.parametrize("response_type, stanza", [(IncomingImageMessage, IMAGE_MESSAGE), (IncomingErrorMessage, ERROR_MESSAGE)], ids=["content", "error"])
+def test_kept_elements_dont_keep_the_tree(released_trees, response_type, stanza):
+    soup = BeautifulSoup(stanza, "xml")
+    tree = weakref.ref(soup)
+    response = response_type(soup.find(True))
+    del soup
+    gc.collect()
+    assert response.raw_element is None
+    assert tree() is None
+
+
+def test_content_is_parsed_from_the_detached_copy(released_trees):
+    message = IncomingImageMessage(BeautifulSoup(IMAGE_MESSAGE, "xml").message)
+    gc.collect()
+    assert message.image_url == "https://platform.kik.com/content/files/7a4a4c3e"
+    assert message.strings["app-name"] == "Gallery"
+    assert message.images == {"preview": b"hello"}
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+from PIL import Image
+
+from kik_unofficial.utilities import blockhash
+
+pytestmark = pytest.mark.skipif(blockhash.numpy is None, reason="numpy isn't installed")
+
+
+def random_image(rng: random.Random, width: int, height: int, mode: str) -> Image.Image:
+    length = width * height * len(mode)
+    return Image.frombytes(mode, (width, height), rng.getrandbits(length * 8).to_bytes(length, "little"))
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+def test_blockhash_numpy_matches_blockhash(mode):
+    rng = random.Random(0)
+    # even sizes (multiples of 16) take the block sum path, the others the weighted one
+    sizes = [(16, 16), (160, 96), (400, 300), (400, 400)] + [(rng.randint(16, 160), rng.randint(16, 160)) for _ in range(40)]
+    for width, height in sizes:
+        image = random_image(rng, width, height, mode)
+        assert blockhash.blockhash_numpy(image, 16) == blockhash.blockhash(image, 16), (width, height)
+
+
+@pytest.mark.parametrize("value", [0, 1, 128, 255])
+def test_blockhash_numpy_matches_blockhash_on_flat_images(value):
+    for size in [(16, 16), (37, 121)]:
+        image = Image.new("RGB", size, (value, value, value))
+        assert blockhash.blockhash_numpy(image, 16) == blockhash.blockhash(image, 16)
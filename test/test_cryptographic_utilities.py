@@ -0,0 +1,79 @@
+import binascii
+import hashlib
+import hmac
+import random
+import string
+import uuid
+
+import pytest
+
+from kik_unofficial.utilities.cryptographic_utilities import CryptographicUtils
+
+# (username, password, key) derived with the pbkdf2 package key_from_password used before hashlib.pbkdf2_hmac
+PASSWORD_KEY_VECTORS = [
+    ("mockbot_a1b", "password", "73f35f05b3b81087c7187e03411ca0c5"),
+    ("MockBot", "pässwörd", "a2e6518976dc1f6fb7abec04627940f1"),
+    ("user", "", "8995cb1d861a1abf0914f378f3c28436"),
+]
+
+
+def reference_key_from_password(username: str, password: str) -> str:
+    # PBKDF2-HMAC-SHA1 as pbkdf2.PBKDF2(sha1_password, salt, 8192).read(16) computes it, one HMAC round at a time
+    sha1_password = binascii.hexlify(hashlib.sha1(password.encode("UTF-8")).digest())
+    salt = (username.lower() + "niCRwL7isZHny24qgLvy").encode("UTF-8")
+    u = hmac.new(sha1_password, salt + b"\x00\x00\x00\x01", hashlib.sha1).digest()
+    block = int.from_bytes(u, "big")
+    for _ in range(8191):
+        u = hmac.new(sha1_password, u, hashlib.sha1).digest()
+        block ^= int.from_bytes(u, "big")
+    return binascii.hexlify(block.to_bytes(20, "big")[:16]).decode("UTF-8")
+
+
+@pytest.mark.parametrize("username, password, key", PASSWORD_KEY_VECTORS)
+def test_key_from_password_matches_golden_vectors(username, password, key):
+    assert CryptographicUtils.key_from_password.__wrapped__(username, password) == key
+    assert CryptographicUtils.key_from_password(username, password) == key
+
+
+def test_key_from_password_matches_pbkdf2():
+    rng = random.Random(0)
+    for _ in range(10):
+        username = "".join(rng.choices(string.ascii_letters + string.digits + "_.", k=rng.randint(1, 20)))
+        password = "".join(rng.choices(string.printable + "éß€", k=rng.randint(0, 30)))
+        assert CryptographicUtils.key_from_password.__wrapped__(username, password) == reference_key_from_password(username, password)
+
+
+def embeds_bits_like_kik(kik_uuid: str) -> bool:
+    # a version 4 UUID with one of its top 7 bits set, whose least significant half embeds six bits of the
+    # most significant half at positions derived from it, like classes2/kik/core/net/f.java
+    value = uuid.UUID(kik_uuid)
+    if str(value) != kik_uuid or value.version != 4 or value.variant != uuid.RFC_4122:
+        return False
+    most_significant_bits, least_significant_bits = value.int >> 64, value.int & (2**64 - 1)
+    if most_significant_bits.bit_length() < 57:
+        return False
+    i3, i2 = ((3, 6), (2, 5), (7, 1), (9, 5))[most_significant_bits >> 62]
+    step = (((most_significant_bits >> i2) & 1) + 1) | (((most_significant_bits >> i3) & 1) << 1)
+    j = ((most_significant_bits >> 24) << 2) ^ ((most_significant_bits >> 16) & 0xFF) ^ ((most_significant_bits >> 8) & 0xFF)
+    expected = {}
+    i = 1
+    for i4 in range(6):
+        i = (i + step * 7) % 60
+        expected[i + 2] = (j >> i4) & 1  # later writes to the same position win
+    return all((least_significant_bits >> position) & 1 == bit for position, bit in expected.items())
+
+
+def test_make_kik_uuid_embeds_its_bits():
+    samples = [CryptographicUtils.make_kik_uuid() for _ in range(5000)] + CryptographicUtils.make_kik_uuids(5000)
+    assert all(embeds_bits_like_kik(kik_uuid) for kik_uuid in samples)
+    assert len(set(samples)) == len(samples)
+
+
+def test_pooled_kik_uuids_embed_their_bits():
+    CryptographicUtils.enable_kik_uuid_pool(256)
+    try:
+        samples = [CryptographicUtils.make_kik_uuid() for _ in range(1000)]
+    finally:
+        CryptographicUtils.disable_kik_uuid_pool()
+    assert all(embeds_bits_like_kik(kik_uuid) for kik_uuid in samples)
+    assert len(set(samples)) == len(samples)
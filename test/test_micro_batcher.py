@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+from kik_unofficial.utilities.peer_cache import PeerCache
+from kik_unofficial.utilities.peer_info_batcher import PeerInfoBatcher
+
+JID = "friend_a1b@talk.kik.com"
+
+
+class Connection:
+    """
+    A send function that waits for the connection like KikClient._send_xmpp_element.
+    """
+
+    def __init__(self):
+        self.connected = threading.Event()
+        self.sent = []
+
+    def send(self, request):
+        self.connected.wait(5)
+        self.sent.append(request)
+
+
+def test_lookups_waiting_for_a_connection_survive_its_loss_and_time_out_once_sent():
+    connection = Connection()
+    batcher = PeerInfoBatcher(connection.send, PeerCache(), window=0.01, timeout=0.2)
+    future = batcher.request(JID)
+    time.sleep(0.4)  # longer than the timeout, which only starts once the request is sent
+    assert not future.done()
+
+    batcher.fail_in_flight(ConnectionError("The connection to kik was lost"))
+    assert not future.done()
+
+    connection.connected.set()
+    with pytest.raises(TimeoutError, match="No response"):
+        future.result(2)
+    assert len(connection.sent) == 1
+    assert not batcher._futures and not batcher._batches
+
+
+def test_sent_lookups_fail_when_the_connection_is_lost():
+    connection = Connection()
+    connection.connected.set()
+    batcher = PeerInfoBatcher(connection.send, PeerCache(), window=0.01, timeout=30)
+    future = batcher.request(JID)
+    batcher.flush()
+    assert len(connection.sent) == 1
+
+    batcher.fail_in_flight(ConnectionError("The connection to kik was lost"))
+    with pytest.raises(ConnectionError):
+        future.result(1)
+    assert batcher.request(JID) is not future